@@ -3,22 +3,31 @@
 #--------------------------------------------------------
 
 import os
+import sys
 import numpy as np
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+# LOGIC: Shared helpers live in ../rag_core, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core import VectorStore
+from rag_core.embeddings import EmbeddingClient
+from rag_core.embedding_cache import EmbeddingCache
+from rag_core.tracing import tracer
+
 # --- SETUP ---
 load_dotenv(dotenv_path=".env")
 api_key = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=api_key)
 
 # --- HELPER: GET EMBEDDING ---
+# The client batches texts and retries on rate limits (see rag_core/embeddings.py).
+# Texts embedded on a previous run come straight from the shared on-disk cache.
+embedder = EmbeddingClient(cache=EmbeddingCache())
+
+@tracer.traced("get_embedding", items=lambda vec: 1)
 def get_embedding(text):
-    response = genai.embed_content(
-        model="models/text-embedding-004",
-        content=text
-    )
-    return response['embedding']
+    return embedder.embed_one(text)
 
 #--------------------------------------------------------
 
@@ -50,24 +59,15 @@ def cosine_similarity(vec_a, vec_b):
 The Goal: Find the best match for the user's question.
 """
 
-def search_vector_store(query):
+def search_vector_store(query, k=3, where=None):
     # 1. Convert Query to Vector
     query_vec = get_embedding(query)
     
-    # 2. Compare against EVERY document in the store
-    results = []
-    for item in vector_store:
-        doc_vec = item["vector"]
-        score = cosine_similarity(query_vec, doc_vec)
-        
-        results.append({
-            "text": item["text"],
-            "score": score
-        })
-    
-    # 3. Sort by highest score first
-    # (Lambda function explanation: Sort based on the 'score' key)
-    results.sort(key=lambda x: x["score"], reverse=True)
+    # 2. Score EVERY document with one matrix-vector product (or, with a
+    #    metadata filter, only the documents that pass it),
+    # 3. then keep only the top-k (partial selection, no full sort)
+    with tracer.span("search", items=len(vector_store)):
+        results = vector_store.search(query_vec, k=k, where=where)
     
     print("\n--- SEARCH RESULTS ---")
     for result in results:
@@ -94,25 +94,34 @@ if __name__ == "__main__":
         "You need an Aero-2000 suit to breathe on Mars."
     ]
 
-    # 2. The Vector Store (A simple list to hold data)
-    vector_store = []
+    # 2. The Vector Store (one float32 matrix + parallel text/id lists)
+    vector_store = VectorStore()
 
     print("Building Vector Store...")
+    # Embed every document in batched requests instead of one call per text
+    with tracer.span("embed_documents", items=len(documents)):
+        vectors = embedder.embed(documents)
+
+    # Metadata makes filtered search possible: {"topic": "mars"} only scores Mars documents
+    topics = ["mars", "mars", "food", "geography", "mars"]
+
+    # Store text AND vector together (the vectors are normalized on the way in)
+    vector_store.add(vectors, documents, ids=[f"doc{i}" for i in range(len(documents))],
+                     metadatas=[{"topic": topic} for topic in topics])
     for doc in documents:
-        # Get the embedding (using the function from Day 3)
-        vec = get_embedding(doc) # We will define this helper function
-        
-        # Store text AND vector together
-        vector_store.append({
-            "text": doc,
-            "vector": vec
-        })
         print(f"Stored: '{doc[:20]}...'")
+    print(f"Embedding cache: {embedder.cache.stats()}")
 
 
     # 3. USER QUERY
     user_query = "How do I buy things on Mars?"
     print(f"\n--- USER QUERY: '{user_query}' ---")
 
-    search_vector_store(user_query)
+    with tracer.trace("question"):
+        search_vector_store(user_query)
+    print(f"\n⏱️ {tracer.summary()}")
+
+    # 4. FILTERED QUERY: same question, only documents tagged "mars" are scored
+    print(f"\n--- FILTERED QUERY: '{user_query}' where topic = 'mars' ---")
+    search_vector_store(user_query, where={"topic": "mars"})
 #--------------------------------------------------------
\ No newline at end of file
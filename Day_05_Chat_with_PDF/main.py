@@ -1,65 +1,125 @@
 import os
+import sys
+import json
+import hashlib
 import numpy as np
 import google.generativeai as genai
 from dotenv import load_dotenv
-from pypdf import PdfReader
+
+# LOGIC: Shared helpers live in ../rag_core, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core.embeddings import EmbeddingClient, GeminiEmbeddingBackend
+from rag_core.embedding_cache import EmbeddingCache
+from rag_core.atomic_write import write_atomic
+from rag_core.chunking import iter_pdf_pages, iter_chunks
+from rag_core.bm25 import BM25Index
+from rag_core.hybrid import HybridRetriever
+from rag_core.tracing import tracer, token_usage
 
 # --- CONFIGURATION ---
 load_dotenv(dotenv_path=".env")
 api_key = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=api_key)
 
-# --- STEP 2: PDF LOADER ---
+EMBED_MODEL = "models/text-embedding-004"
+CACHE_DIR = ".rag_cache"  # Embedded chunks are saved here between runs
+embedder = EmbeddingClient(GeminiEmbeddingBackend(EMBED_MODEL), cache=EmbeddingCache())
+HYBRID_ALPHA = 0.5  # 1.0 = pure vector search, 0.0 = pure keyword search
+HYBRID_PREFILTER = None  # e.g. 200: only score vectors of the 200 best keyword hits
+
+# --- STEP 2: PDF LOADER (Streaming) ---
+# Every step is timed by rag_core/tracing.py (set RAG_TRACE_FILE=traces.jsonl to keep the spans)
+@tracer.traced("load_pdf")
 def load_pdf(file_path):
+    # Yields one page of text at a time instead of building one giant string
     try:
-        reader = PdfReader(file_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        yield from iter_pdf_pages(file_path)
     except Exception as e:
-        print(f"Error reading PDF: {e}")
-        return None
-
-# --- STEP 3: CHUNKER ---
-def split_text(text, chunk_size=1000, overlap=100):
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start += chunk_size - overlap 
-    return chunks
-
-# --- STEP 4: RETRIEVAL ---
-def find_best_chunk(query, chunks):
-    # Embed Query
-    query_vec = genai.embed_content(
-        model="models/text-embedding-004", content=query
-    )['embedding']
-    
-    chunk_data = []
-    print(f"Scanning {len(chunks)} chunks...")
-    
-    # Embed Chunks & Calculate Score
-    for chunk in chunks:
-        chunk_vec = genai.embed_content(
-            model="models/text-embedding-004", content=chunk
-        )['embedding']
-        
-        # Cosine Similarity Formula
-        dot_product = np.dot(query_vec, chunk_vec)
-        norm_a = np.linalg.norm(query_vec)
-        norm_b = np.linalg.norm(chunk_vec)
-        score = dot_product / (norm_a * norm_b)
-        
-        chunk_data.append({"text": chunk, "score": score})
-    
-    # Sort by Score
-    chunk_data.sort(key=lambda x: x["score"], reverse=True)
-    return chunk_data[0]
+        # Re-raised: a half-read PDF must never end up in the cache below
+        raise RuntimeError(f"Error reading PDF: {e}") from e
+
+# --- STEP 3: CHUNKER (Streaming) ---
+@tracer.traced("split_text")
+def split_text(pages, chunk_size=1000, overlap=100):
+    # Sliding window over the page stream; chunks may span page boundaries
+    return iter_chunks(pages, chunk_size, overlap)
+
+# --- STEP 4: INDEXING (Embed Once, Reuse Forever) ---
+def file_hash(file_path):
+    # Hash the raw bytes so any edit to the PDF produces a new cache key
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def build_index(chunk_stream):
+    print("Embedding chunks (one-time cost)...")
+    # Chunks flow straight into batched, concurrent requests as pages are parsed
+    chunks, blocks = [], []
+    with tracer.span("embed_chunks") as span:
+        for batch, vectors in embedder.embed_stream(chunk_stream):
+            chunks.extend(batch)
+            blocks.append(vectors)
+        span.set(items=len(chunks))
+    if not blocks:
+        return chunks, np.zeros((0, 0), dtype=np.float32)
+
+    # Store unit-length rows so a query only needs one matrix-vector product
+    matrix = np.vstack(blocks)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return chunks, matrix / norms
 
-# --- STEP 5: GENERATION ---
+def load_or_build_index(file_path, chunk_size=1000, overlap=100):
+    # The key covers everything that changes the vectors: bytes, chunking and model
+    key = f"{file_hash(file_path)}_{chunk_size}_{overlap}_{EMBED_MODEL.split('/')[-1]}"
+    matrix_path = os.path.join(CACHE_DIR, f"{key}.npy")
+    chunks_path = os.path.join(CACHE_DIR, f"{key}.json")
+    bm25_path = os.path.join(CACHE_DIR, f"{key}.bm25.npz")
+
+    if os.path.exists(matrix_path) and os.path.exists(chunks_path):
+        print("Loading cached embeddings...")
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            chunks = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode="r")  # Memory-mapped: pages load on first use
+        if os.path.exists(bm25_path):
+            return chunks, matrix, BM25Index.load(bm25_path)
+    else:
+        print("Reading PDF...")
+        chunks, matrix = build_index(split_text(load_pdf(file_path), chunk_size, overlap))
+        if not chunks:
+            # Nothing extracted (e.g. a scanned PDF): don't cache, so the next run tries again
+            print("Warning: no text found in the PDF.")
+            bm25 = BM25Index()
+            bm25.add(chunks)
+            return chunks, matrix, bm25
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Chunks first, vectors last: the cache only counts as present once both exist
+        write_atomic(chunks_path, lambda f: f.write(json.dumps(chunks).encode("utf-8")))
+        write_atomic(matrix_path, lambda f: np.save(f, matrix))
+
+    # Keyword index over the same chunks, saved next to the embeddings
+    bm25 = BM25Index()
+    bm25.add(chunks)
+    write_atomic(bm25_path, bm25.save)
+    return chunks, matrix, bm25
+
+# --- STEP 5: RETRIEVAL (Hybrid: Keywords + Vectors) ---
+def find_best_chunk(query, retriever):
+    # Embed ONLY the query; the chunk vectors come from the index
+    with tracer.span("embed_query", items=1):
+        query_vec = embedder.embed_one(query)
+
+    if np.linalg.norm(query_vec) == 0 or len(retriever.texts) == 0:
+        return {"text": "", "score": 0.0}
+
+    # Fused score = alpha * cosine + (1 - alpha) * normalized BM25
+    with tracer.span("search", items=len(retriever.texts)):
+        best = retriever.search(query, query_vec, k=1)[0]
+    return {"text": best["text"], "score": best["score"]}
+
+# --- STEP 6: GENERATION ---
 def ask_gemini(chunk_text, user_question):
     model = genai.GenerativeModel('gemini-2.0-flash')
     prompt = f"""
@@ -69,7 +129,10 @@ def ask_gemini(chunk_text, user_question):
     ### QUESTION:
     {user_question}
     """
-    response = model.generate_content(prompt)
+    with tracer.span("generate") as span:
+        response = model.generate_content(prompt)
+        prompt_tokens, response_tokens = token_usage(response, prompt)
+        span.set(prompt_tokens=prompt_tokens, response_tokens=response_tokens)
     return response.text
 
 # --- EXECUTION ---
@@ -81,11 +144,17 @@ if __name__ == "__main__":
         print("Error: 'document.pdf' not found in this folder.")
         exit()
 
-    # 2. Ingest
-    print("Reading PDF...")
-    raw_text = load_pdf(pdf_file)
-    chunks = split_text(raw_text)
-    print(f"Split PDF into {len(chunks)} chunks.")
+    # 2. Ingest (embeds on the first run, loads from disk afterwards)
+    try:
+        with tracer.trace("ingest"):
+            chunks, matrix, bm25 = load_or_build_index(pdf_file)
+    except Exception as e:
+        # PDF, embedding (API key, rate limit) or cache errors: the index was not saved
+        print(f"Ingestion failed: {e}")
+        sys.exit(1)
+    print(f"⏱️ {tracer.summary()}")
+    retriever = HybridRetriever(matrix, chunks, bm25, alpha=HYBRID_ALPHA, prefilter=HYBRID_PREFILTER)
+    print(f"Index ready with {len(chunks)} chunks.")
 
     # 3. Interactive Loop
     while True:
@@ -93,10 +162,12 @@ if __name__ == "__main__":
         if query.lower() == 'quit':
             break
             
-        print("Searching...")
-        best_match = find_best_chunk(query, chunks)
-        print(f"Best match score: {best_match['score']:.4f}")
-        
-        print("Generating answer...")
-        answer = ask_gemini(best_match['text'], query)
-        print(f"\n--- AI Answer ---\n{answer}\n")
\ No newline at end of file
+        with tracer.trace("question"):
+            print("Searching...")
+            best_match = find_best_chunk(query, retriever)
+            print(f"Best match score: {best_match['score']:.4f}")
+
+            print("Generating answer...")
+            answer = ask_gemini(best_match['text'], query)
+        print(f"\n--- AI Answer ---\n{answer}\n")
+        print(f"⏱️ {tracer.summary()}")
\ No newline at end of file
@@ -1,28 +1,28 @@
 import os
-import chromadb
-import google.generativeai as genai
+import sys
 from dotenv import load_dotenv
 
+# LOGIC: Shared helpers live in ../rag_core, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core.backends import chroma_collection
+from rag_core.embeddings import EmbeddingClient, GeminiEmbeddingBackend
+from rag_core.embedding_cache import EmbeddingCache
+from rag_core.chroma_ingest import upsert_texts
+from rag_core.tracing import tracer
+
 # --- SETUP ---
 load_dotenv(dotenv_path=".env")
 api_key = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=api_key)
-
-# Initialize ChromaDB (Persistent Storage)
-# This will create a folder named 'chroma_db' in your directory
-client = chromadb.PersistentClient(path="./chroma_db")
-
-
-# 3. Create (or Get) a Collection
-# Think of a collection like a SQL Table. Name it "rag_experiment".
-collection = client.get_or_create_collection(name="rag_experiment")
 
 # --- HELPER ---
+# The client batches texts and retries on rate limits (see rag_core/embeddings.py).
+# Texts embedded on a previous run come straight from the shared on-disk cache
+# (the Gemini SDK is only imported once something actually misses it).
+embedder = EmbeddingClient(GeminiEmbeddingBackend(api_key=api_key), cache=EmbeddingCache())
+
+@tracer.traced("get_embedding", items=lambda vec: 1)
 def get_embedding(text):
-    return genai.embed_content(
-        model="models/text-embedding-004",
-        content=text
-    )['embedding']
+    return embedder.embed_one(text).tolist()
 
 # --- MAIN EXECUTION ---
 if __name__ == "__main__":
@@ -31,47 +31,50 @@ if __name__ == "__main__":
 
         The Difference: Chroma needs 3 things:
 
-        - IDs: A unique name for each chunk (e.g., "doc1", "doc2").
+        - IDs: A unique name for each chunk. We use a hash of the text, so the
+          same text always gets the same ID and re-runs never create duplicates.
 
         - Embeddings: The vector list.
 
         - Documents: The actual text.
     """
-    # 1. DATA INGESTION
-    # Only add data if the collection is empty (to avoid duplicates for this test)
-    if collection.count() == 0:
-        print("Database is empty. Adding data...")
-        documents = [
-            "Mars is the fourth planet from the Sun.",
-            "The capital of France is Paris.",
-            "Python is a great language for AI.",
-            "Elon Musk wants to colonize Mars.",
-            "Croissants are a popular French pastry."
-        ]
-        
-        for i, doc in enumerate(documents):
-            print(f"Embedding doc {i}...")
-            vec = get_embedding(doc)
-            collection.add(
-                ids=[str(i)],
-                embeddings=[vec],
-                documents=[doc]
-            )
-    else:
-        print("Data already exists in DB. Skipping ingestion.")
+    # Initialize ChromaDB (Persistent Storage) and create (or get) a collection.
+    # This will create a folder named 'chroma_db' in your directory.
+    # Think of a collection like a SQL Table. Name it "rag_experiment".
+    # chromadb is imported here, not at the top: the import alone takes ~2 s.
+    collection = chroma_collection("./chroma_db", "rag_experiment")
+
+    # 1. DATA INGESTION (Idempotent Bulk Upsert)
+    # Safe to run every time: only new or changed documents are embedded and written.
+    documents = [
+        "Mars is the fourth planet from the Sun.",
+        "The capital of France is Paris.",
+        "Python is a great language for AI.",
+        "Elon Musk wants to colonize Mars.",
+        "Croissants are a popular French pastry."
+    ]
+
+    with tracer.trace("ingest", items=len(documents)):
+        result = upsert_texts(collection, documents, embedder.embed, delete_missing=True)
+    print(f"Synced corpus: {result['added']} added, {result['unchanged']} unchanged, "
+          f"{result['deleted']} removed.")
 
     print(f"Collection Count: {collection.count()}")
+    print(f"Embedding cache: {embedder.cache.stats()}")
 
     # 2. QUERY
     user_query = "Tell me about food in France"
     print(f"\nSearching for: '{user_query}'")
     
-    query_vec = get_embedding(user_query) # 1. Embed Query
-    
-    results = collection.query(
-        query_embeddings=[query_vec],
-        n_results=2 # 2. Ask Chroma for the Top 2 matches
-    )
+    with tracer.trace("question"):
+        query_vec = get_embedding(user_query) # 1. Embed Query
+
+        with tracer.span("search", items=collection.count()):
+            results = collection.query(
+                query_embeddings=[query_vec],
+                n_results=2 # 2. Ask Chroma for the Top 2 matches
+            )
+    print(f"⏱️ {tracer.summary()}")
     
     # 3. DISPLAY
     print("\n--- RESULTS ---")
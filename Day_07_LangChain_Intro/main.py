@@ -1,59 +1,126 @@
+import json
 import os
+import sys
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-# --- SETUP ---
-load_dotenv(dotenv_path=".env")
-api_key = os.getenv("GEMINI_API_KEY")
-if not os.getenv("GEMINI_API_KEY"):
-    raise ValueError("API Key not found!")
-
-# --- 1. LOAD & SPLIT ---
-# Ensure 'document.pdf' exists in this folder!
-if not os.path.exists("document.pdf"):
-    print("Error: Please add 'document.pdf' to this folder.")
-    exit()
-
-print("Loading and Chunking PDF...")
-loader = PyPDFLoader("document.pdf")
-docs = loader.load()
-
-# Intelligent Chunking
-splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-chunks = splitter.split_documents(docs)
-print(f"Generated {len(chunks)} chunks.")
-
-# --- 2. VECTOR STORE ---
-print("Embedding data into ChromaDB...")
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=api_key)
-
-# This one line handles: Embedding -> Upserting -> Saving
-vector_store = Chroma.from_documents(
-    documents=chunks,
-    embedding=embeddings,
-    persist_directory="./chroma_db"
-)
-
-# --- 3. RETRIEVAL ---
-query = input("\nAsk a question about the PDF: ")
-
-# Retrieve top 3 chunks
-retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-relevant_docs = retriever.invoke(query)
-
-print(f"\nFound {len(relevant_docs)} relevant context chunks.")
-
-# --- 4. GENERATION ---
-print("Generating Answer...")
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key)
-
-# Combine context
-context_text = "\n\n".join([doc.page_content for doc in relevant_docs])
-
-prompt = f"""
+
+# LOGIC: Shared helpers live in ../rag_core, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core.backends import chroma_store, document_splitter, gemini_chat, gemini_embeddings
+from rag_core.embedding_cache import EmbeddingCache
+from rag_core.pdf_extract import load_pdf_documents
+from rag_core.bm25 import BM25Index
+from rag_core.atomic_write import write_atomic, write_json_atomic
+from rag_core.hybrid import reciprocal_rank_fusion
+from rag_core.tracing import tracer, langchain_callbacks
+from rag_core.context_packing import pack_context
+from rag_core.incremental_index import IncrementalIndexer
+
+
+def main():
+    # --- SETUP ---
+    load_dotenv(dotenv_path=".env")
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not os.getenv("GEMINI_API_KEY"):
+        raise ValueError("API Key not found!")
+
+    # --- 1. LOAD & SPLIT ---
+    # Ensure 'document.pdf' exists in this folder!
+    if not os.path.exists("document.pdf"):
+        print("Error: Please add 'document.pdf' to this folder.")
+        exit()
+
+    print("Syncing the PDF into ChromaDB...")
+    EMBED_MODEL = "models/text-embedding-004"
+    CHUNK_SIZE, CHUNK_OVERLAP = 800, 100
+
+    # Every stage is timed by rag_core/tracing.py (set RAG_TRACE_FILE=traces.jsonl to keep the spans)
+    with tracer.trace("ingest"):
+        # Intelligent Chunking (start_index lets the context packer stitch neighbours back together).
+        # The splitter is only imported and built if a page actually changed (rag_core/backends.py).
+        split_documents = document_splitter(CHUNK_SIZE, CHUNK_OVERLAP, add_start_index=True)
+
+        # --- 2. VECTOR STORE ---
+        # Wrapped so chunks embedded on a previous run are served from the on-disk cache
+        with tracer.span("open_store"):
+            embeddings = gemini_embeddings(EMBED_MODEL, api_key=api_key, cache=EmbeddingCache())
+            vector_store = chroma_store(embeddings, persist_directory="./chroma_db")
+
+        # Incremental re-index: a manifest of file / page hashes and chunk IDs lives next to the store.
+        # Unchanged PDF -> skipped without parsing; changed pages -> re-embedded; stale chunks -> deleted.
+        indexer = IncrementalIndexer(
+            vector_store,
+            "./chroma_db/index_manifest.json",
+            tracer.traced("split_text", items=len)(split_documents),
+            config={"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP, "embedding_model": EMBED_MODEL},
+        )
+        with tracer.span("sync_index") as span:
+            # Pages are extracted in a process pool; same Document-per-page output as PyPDFLoader
+            stats = indexer.sync(["document.pdf"], tracer.traced("load_pdf", items=len)(load_pdf_documents))
+            span.set(items=stats["chunks_added"])
+        print(f"Index: {stats['pages_indexed']} pages re-indexed, {stats['pages_unchanged']} unchanged, "
+              f"+{stats['chunks_added']} / -{stats['chunks_deleted']} chunks.")
+
+        # Keyword (BM25) index over the stored chunks, for exact terms like "Aero-2000".
+        # Saved next to the collection with the chunk IDs it was built from (row order); chunk IDs
+        # include the page hash, so it is only rebuilt when the stored chunks change.
+        BM25_PATH, BM25_IDS_PATH = "./chroma_db/bm25.npz", "./chroma_db/bm25_ids.json"
+        with tracer.span("bm25_index") as span:
+            chunks = indexer.documents()
+            chunk_ids = [chunk.id for chunk in chunks]
+            saved_ids = None
+            if os.path.exists(BM25_PATH) and os.path.exists(BM25_IDS_PATH):
+                with open(BM25_IDS_PATH, "r", encoding="utf-8") as f:
+                    saved_ids = json.load(f)
+            if saved_ids == chunk_ids:
+                bm25 = BM25Index.load(BM25_PATH)
+            else:
+                bm25 = BM25Index()
+                bm25.add([chunk.page_content for chunk in chunks])
+                # Atomic writes, IDs last: an interrupted run leaves a mismatch, i.e. a rebuild
+                write_atomic(BM25_PATH, bm25.save)
+                write_json_atomic(BM25_IDS_PATH, chunk_ids)
+            span.set(items=len(chunks), rebuilt=saved_ids != chunk_ids)
+        print(f"{len(chunks)} chunks in the store (BM25 {'rebuilt' if saved_ids != chunk_ids else 'loaded'}).")
+
+    print(f"⏱️ {tracer.summary()}")
+    print(f"Embedding cache: {embeddings.cache.stats()}")
+
+    # --- 3. RETRIEVAL ---
+    query = input("\nAsk a question about the PDF: ")
+
+    with tracer.trace("question"):
+        # Hybrid retrieval: take the best candidates from BOTH searches...
+        CANDIDATES = 10
+        with tracer.span("search", items=len(chunks)):
+            dense_docs = vector_store.similarity_search(query, k=CANDIDATES)
+            lexical_rows, _ = bm25.search(query, CANDIDATES)
+
+            # ...then merge the two rankings (Reciprocal Rank Fusion) and keep the top 3
+            docs_by_text = {doc.page_content: doc for doc in dense_docs}
+            docs_by_text.update({chunks[row].page_content: chunks[row] for row in lexical_rows})
+            fused = reciprocal_rank_fusion([
+                [doc.page_content for doc in dense_docs],
+                [chunks[row].page_content for row in lexical_rows],
+            ])
+            relevant_docs = [docs_by_text[text] for text in fused[:3]]
+
+        print(f"\nFound {len(relevant_docs)} relevant context chunks.")
+
+        # --- 4. GENERATION ---
+        print("Generating Answer...")
+        llm = gemini_chat("gemini-2.0-flash", api_key=api_key)
+
+        # Combine context: overlapping hits are merged, repeats dropped, and the
+        # result is capped at CONTEXT_TOKEN_BUDGET (best hits first)
+        CONTEXT_TOKEN_BUDGET = 600
+        with tracer.span("pack_context", items=len(relevant_docs)) as span:
+            packed = pack_context(relevant_docs, budget_tokens=CONTEXT_TOKEN_BUDGET)
+            context_text = packed["text"]
+            span.set(prompt_tokens=packed["stats"]["tokens"])
+        print(f"Context: {packed['stats']['packed']} passages, ~{packed['stats']['tokens']} tokens "
+              f"(was ~{packed['stats']['naive_tokens']}).")
+
+        prompt = f"""
 Answer the user's question based on the context provided below.
 If the answer is not in the context, say "I don't know".
 
@@ -64,6 +131,14 @@ Question:
 {query}
 """
 
-response = llm.invoke(prompt)
-print("\n=== ANSWER ===")
-print(response.content)
\ No newline at end of file
+        # The callback records the LLM call as a span, with its token usage
+        response = llm.invoke(prompt, config={"callbacks": [langchain_callbacks(tracer)]})
+
+    print("\n=== ANSWER ===")
+    print(response.content)
+    print(f"\n⏱️ {tracer.summary()}")
+
+
+# Guarded: PDF pages are extracted in worker processes, which re-import this file
+if __name__ == "__main__":
+    main()
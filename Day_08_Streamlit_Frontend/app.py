@@ -1,10 +1,22 @@
 import os
+import sys
+import hashlib
+import threading
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# LOGIC: Shared helpers live in ../rag_core, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# LangChain / Chroma / Gemini are imported by rag_core.backends on first use, so the page renders first
+from rag_core.backends import create, gemini_chat, gemini_embeddings, stub_chat, text_splitter
+from rag_core.embedding_cache import EmbeddingCache
+from rag_core.pdf_extract import load_pdf_documents
+from rag_core.pipeline_registry import PipelineRegistry
+from rag_core.streaming import stream_answer
+from rag_core.answer_cache import SemanticAnswerCache
+from rag_core.conversation_memory import estimate_tokens
+from rag_core.tracing import tracer
+from rag_core.context_packing import pack_context
 
 # --- SETUP ---
 load_dotenv(dotenv_path=".env")
@@ -14,6 +26,44 @@ if not api_key:
     st.error("API Key not found! Check .env file.")
     st.stop()
 
+# --- PIPELINE CONFIG ---
+LLM_MODEL = "gemini-2.0-flash"
+TEMPERATURE = None  # None = the model's default
+RETRIEVAL_K = 3
+CONTEXT_TOKEN_BUDGET = 600  # Cap on retrieved text per prompt (~4 characters per token)
+# Set RAG_STUB_LLM=1 to stream canned tokens offline (RAG_STUB_DELAY = seconds per token)
+USE_STUB_LLM = bool(os.getenv("RAG_STUB_LLM"))
+EMBED_MODEL = "models/text-embedding-004"
+CHUNK_SIZE, CHUNK_OVERLAP = 800, 100
+# Per-session vector store: "chroma", or "memory" (LangChain's InMemoryVectorStore, no chromadb import)
+SESSION_STORE = os.getenv("RAG_SESSION_STORE", "chroma")
+ANSWER_CACHE_THRESHOLD = 0.95  # Cosine similarity needed to reuse a previous answer
+ANSWER_CACHE_TTL = 3600  # Seconds
+
+# --- SHARED RESOURCES ---
+# One cache/registry per process; Streamlit reruns the script but keeps these objects
+@st.cache_resource
+def get_embedding_cache():
+    return EmbeddingCache()
+
+@st.cache_resource
+def get_registry():
+    return PipelineRegistry()
+
+@st.cache_resource
+def get_answer_cache():
+    # Shared by every session: users asking about the same PDF share answers
+    return SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_TTL, max_entries=5000)
+
+def build_llm(model, temperature):
+    if USE_STUB_LLM:
+        return stub_chat(delay=float(os.getenv("RAG_STUB_DELAY", "0.05")))
+    return gemini_chat(model, api_key=api_key, temperature=temperature)
+
+# Built on the first message only; every later turn reuses the same client
+registry = get_registry()
+answer_cache = get_answer_cache()
+
 # --- UI CONFIG ---
 st.set_page_config(page_title="RAG Chatbot", layout="wide")
 st.title("🤖 Chat with your PDF")
@@ -24,29 +74,44 @@ with st.sidebar:
     st.header("Data Source")
     uploaded_file = st.file_uploader("Upload a PDF", type="pdf")
     process_btn = st.button("Process Document")
+    show_timings = st.checkbox("⏱️ Show per-request timings")
 
 # --- LOGIC: PROCESS PDF ---
 if process_btn and uploaded_file:
-    with st.spinner("Reading, Chunking, and Embedding..."):
+    with st.spinner("Reading, Chunking, and Embedding..."), tracer.trace("ingest") as ingest_trace:
         # 1. Save temp file
         with open("temp.pdf", "wb") as f:
             f.write(uploaded_file.getbuffer())
         
         # 2. Load & Split
-        loader = PyPDFLoader("temp.pdf")
-        docs = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-        chunks = splitter.split_documents(docs)
+        with tracer.span("load_pdf") as span:
+            # Serial: forking the threaded Streamlit server could deadlock on another thread's lock
+            docs = load_pdf_documents("temp.pdf", workers=1)
+            span.set(items=len(docs))
+        with tracer.span("split_text") as span:
+            # start_index lets the context packer stitch overlapping neighbours back together
+            splitter = text_splitter(CHUNK_SIZE, CHUNK_OVERLAP, add_start_index=True)
+            chunks = splitter.split_documents(docs)
+            span.set(items=len(chunks))
         
         # 3. Create Vector Store
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=api_key)
+        # Re-uploading the same PDF is served from the embedding cache
+        embeddings = gemini_embeddings(EMBED_MODEL, api_key=api_key, cache=get_embedding_cache())
         
         # Note: We use a temporary in-memory DB for the session to avoid locking issues
-        vector_store = Chroma.from_documents(chunks, embeddings)
+        with tracer.span("embed_and_store", items=len(chunks)):
+            vector_store = create("session_store", SESSION_STORE, chunks, embeddings)
         
-        # Save to Session State
+        # Save to Session State. The version changes whenever the indexed content
+        # would change, so cached answers for an older store can never match.
         st.session_state["vector_store"] = vector_store
-        st.success(f"Processed {len(chunks)} chunks!")
+        st.session_state["embeddings"] = embeddings
+        pdf_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        st.session_state["store_version"] = f"{pdf_hash}:{CHUNK_SIZE}:{CHUNK_OVERLAP}:{EMBED_MODEL}"
+        stats = embeddings.cache.stats()
+        st.success(f"Processed {len(chunks)} chunks! (embedding cache: {stats['hits']} hits, {stats['misses']} misses)")
+    if show_timings:
+        st.caption(f"⏱️ {tracer.summary(tracer.get_trace(ingest_trace.trace_id))}")
 
 # --- CHAT UI ---
 if "messages" not in st.session_state:
@@ -56,9 +121,20 @@ if "messages" not in st.session_state:
 for msg in st.session_state["messages"]:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
+        if msg.get("ttft") is not None:
+            st.caption(f"⏱️ First token {msg['ttft']:.2f}s · total {msg['total']:.2f}s")
+        if show_timings and msg.get("timings"):
+            with st.expander("⏱️ Timings"):
+                st.table(msg["timings"])
 
 # Handle Input
 if prompt := st.chat_input("Ask something about the PDF..."):
+    # 0. A new message cancels any answer still streaming for this session
+    if "cancel_generation" in st.session_state:
+        st.session_state["cancel_generation"].set()
+    cancel_event = threading.Event()
+    st.session_state["cancel_generation"] = cancel_event
+
     # 1. Show User Message
     st.session_state["messages"].append({"role": "user", "content": prompt})
     with st.chat_message("user"):
@@ -66,30 +142,78 @@ if prompt := st.chat_input("Ask something about the PDF..."):
 
     # 2. Process Answer
     if "vector_store" in st.session_state:
-        with st.chat_message("assistant"):
+        with st.chat_message("assistant"), tracer.trace("question") as question_trace:
             stream_container = st.empty()
             
-            # Retrieve
-            retriever = st.session_state["vector_store"].as_retriever(search_kwargs={"k": 3})
-            relevant_docs = retriever.invoke(prompt)
-            context_text = "\n\n".join([doc.page_content for doc in relevant_docs])
+            # Embed the question once: used for the answer cache AND for retrieval
+            with tracer.span("embed_query", items=1):
+                query_vec = st.session_state["embeddings"].embed_query(prompt)
+            version = st.session_state["store_version"]
             
-            # Generate
-            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key)
-            rag_prompt = f"""
-            You are a helpful assistant. Answer based ONLY on the context below.
-            
-            Context:
-            {context_text}
-            
-            Question:
-            {prompt}
-            """
-            
-            response = llm.invoke(rag_prompt)
-            st.markdown(response.content)
-            
-            # Save History
-            st.session_state["messages"].append({"role": "assistant", "content": response.content})
+            with tracer.span("answer_cache_lookup"):
+                cached = answer_cache.lookup(query_vec, version)
+            if cached:
+                # Near-duplicate question about the same document: skip retrieval + LLM
+                stream_container.markdown(cached["answer"])
+                st.caption(f"⚡ Answered from cache (similarity {cached['score']:.2f})")
+                message = {"role": "assistant", "content": cached["answer"]}
+            else:
+                # Retrieve (only the per-session vector store changes between users)
+                with tracer.span("search", items=RETRIEVAL_K):
+                    relevant_docs = st.session_state["vector_store"].similarity_search_by_vector(query_vec, k=RETRIEVAL_K)
+                # Overlapping hits are merged and repeats dropped, within the token budget
+                with tracer.span("pack_context", items=len(relevant_docs)) as span:
+                    packed = pack_context(relevant_docs, budget_tokens=CONTEXT_TOKEN_BUDGET)
+                    context_text = packed["text"]
+                    span.set(prompt_tokens=packed["stats"]["tokens"])
+                
+                # Generate (the LLM client comes from the process-wide registry)
+                llm = registry.get(("llm", LLM_MODEL, TEMPERATURE), lambda: build_llm(LLM_MODEL, TEMPERATURE))
+                rag_prompt = f"""
+                You are a helpful assistant. Answer based ONLY on the context below.
+                
+                Context:
+                {context_text}
+                
+                Question:
+                {prompt}
+                """
+                
+                # Stream tokens into the container as they arrive
+                with tracer.span("generate", prompt_tokens=estimate_tokens(rag_prompt)) as span:
+                    result = stream_answer(llm, rag_prompt, stream_container.markdown, cancel_event)
+                    span.set(response_tokens=estimate_tokens(result.text), ttft=result.ttft)
+                if result.ttft is not None:
+                    st.caption(f"⏱️ First token {result.ttft:.2f}s · total {result.total:.2f}s")
+                
+                # Only complete answers are worth reusing
+                if not result.cancelled:
+                    sources = [{"content": d.page_content, "metadata": d.metadata} for d in relevant_docs]
+                    answer_cache.store(query_vec, version, result.text, sources)
+                
+                message = {
+                    "role": "assistant",
+                    "content": result.text,
+                    "ttft": result.ttft,
+                    "total": result.total,
+                }
+
+        # Save History (with this request's spans for the timing panel)
+        message["timings"] = tracer.table(tracer.get_trace(question_trace.trace_id))
+        st.session_state["messages"].append(message)
+        if show_timings:
+            with st.expander("⏱️ Timings"):
+                st.table(message["timings"])
     else:
-        st.warning("Please upload and process a PDF first!")
\ No newline at end of file
+        st.warning("Please upload and process a PDF first!")
+
+# --- INSTRUMENTATION: construction time saved by the registry ---
+with st.sidebar:
+    stats = registry.stats()
+    with st.expander("⚙️ Pipeline Cache"):
+        st.write(f"Built: {stats['builds']} · Reused: {stats['reuses']}")
+        st.write(f"Construction time saved: {stats['saved_seconds'] * 1000:.1f} ms")
+    cache_stats = answer_cache.stats()
+    with st.expander("⚡ Answer Cache"):
+        st.write(f"Hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} hits / {cache_stats['misses']} misses)")
+        st.write(f"Entries: {cache_stats['entries']} · evicted: {cache_stats['evictions']} · expired: {cache_stats['expirations']}")
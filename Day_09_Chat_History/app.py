@@ -1,14 +1,18 @@
 import os
+import sys
 import streamlit as st
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import HumanMessage, AIMessage
+
+# LOGIC: Shared helpers live in ../rag_core, one level above this script.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# LangChain / Chroma / Gemini are imported by rag_core.backends on first use, so the page renders first
+from rag_core.backends import create, gemini_chat, gemini_embeddings, stuff_documents_chain, text_splitter
+from rag_core.embedding_cache import EmbeddingCache
+from rag_core.pdf_extract import load_pdf_documents
+from rag_core.pipeline_registry import PipelineRegistry
+from rag_core.conversation_memory import ConversationMemory
+from rag_core.tracing import tracer, langchain_callbacks
+from rag_core.context_packing import pack_context
 
 # --- SETUP ---
 load_dotenv(dotenv_path=".env")
@@ -18,6 +22,86 @@ if not api_key:
     st.error("API Key not found!")
     st.stop()
 
+# --- PIPELINE CONFIG ---
+LLM_MODEL = "gemini-2.0-flash"
+TEMPERATURE = 0
+RETRIEVAL_K = 4  # Same as as_retriever()'s default
+HISTORY_TOKEN_BUDGET = 1500  # Recent turns sent verbatim; older ones are summarized
+CONTEXT_TOKEN_BUDGET = 800  # Cap on retrieved text per prompt
+# Per-session vector store: "chroma", or "memory" (LangChain's InMemoryVectorStore, no chromadb import)
+SESSION_STORE = os.getenv("RAG_SESSION_STORE", "chroma")
+
+# --- SHARED RESOURCES ---
+# One cache/registry per process; Streamlit reruns the script but keeps these objects
+@st.cache_resource
+def get_embedding_cache():
+    return EmbeddingCache()
+
+@st.cache_resource
+def get_registry():
+    return PipelineRegistry()
+
+# --- PIPELINE (built once per process, not once per message) ---
+def build_pipeline(model, temperature):
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+    llm = gemini_chat(model, api_key=api_key, temperature=temperature)
+
+    # --- THE NEW PART: HISTORY AWARENESS ---
+
+    # 1. Define sub-prompt to rephrase the question
+    contextualize_q_system_prompt = """
+    Given a chat history and the latest user question which might reference context in the chat history, 
+    formulate a standalone question which can be understood without the chat history. 
+    Do NOT answer the question, just reformulate it if needed and otherwise return it as is.
+    """
+
+    contextualize_q_prompt = ChatPromptTemplate.from_messages([
+        ("system", contextualize_q_system_prompt),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{input}"),
+    ])
+
+    # 2. The Rewriter. Only called when ConversationMemory says the question is a follow-up.
+    rewrite_chain = contextualize_q_prompt | llm | StrOutputParser()
+
+    # 3. Define the Answer Prompt (Standard RAG + summary of older turns)
+    qa_system_prompt = """
+    You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. 
+    If you don't know the answer, just say that you don't know. 
+    
+    Summary of the earlier conversation: {summary}
+    
+    {context}
+    """
+
+    qa_prompt = ChatPromptTemplate.from_messages([
+        ("system", qa_system_prompt),
+        MessagesPlaceholder("chat_history"), # Only the recent window goes here
+        ("human", "{input}"),
+    ])
+
+    # 4. The Summarizer: folds turns that leave the window into a running summary
+    summary_prompt = ChatPromptTemplate.from_messages([
+        ("system", "Update the running summary of a conversation. Keep names, numbers and facts. Be brief."),
+        ("human", "Current summary:\n{summary}\n\nNew lines:\n{new_lines}\n\nUpdated summary:"),
+    ])
+
+    return {
+        "rewrite": rewrite_chain,
+        "answer": stuff_documents_chain(llm, qa_prompt),
+        "summarize": summary_prompt | llm | StrOutputParser(),
+    }
+
+def get_pipeline():
+    return registry.get(("pipeline", LLM_MODEL, TEMPERATURE), lambda: build_pipeline(LLM_MODEL, TEMPERATURE))
+
+def summarize_turns(summary, new_lines):
+    return get_pipeline()["summarize"].invoke({"summary": summary or "(empty)", "new_lines": new_lines})
+
+registry = get_registry()
+
 # --- UI CONFIG ---
 st.set_page_config(page_title="Context-Aware RAG", layout="wide")
 st.title("🧠 Context-Aware Chatbot (Day 9)")
@@ -28,40 +112,62 @@ with st.sidebar:
     st.header("Data Source")
     uploaded_file = st.file_uploader("Upload PDF", type="pdf")
     process_btn = st.button("Process Document")
+    show_timings = st.checkbox("⏱️ Show per-request timings")
 
 # --- STATE MANAGEMENT ---
 if "vector_store" not in st.session_state:
     st.session_state["vector_store"] = None
 if "chat_history" not in st.session_state:
-    st.session_state["chat_history"] = []
+    st.session_state["chat_history"] = []  # Full transcript, for display only
+if "memory" not in st.session_state:
+    # What the LLM actually sees: a bounded window + summary
+    st.session_state["memory"] = ConversationMemory(HISTORY_TOKEN_BUDGET, summarizer=summarize_turns)
 
 # --- 1. PROCESSING LOGIC ---
 if process_btn and uploaded_file:
-    with st.spinner("Processing..."):
+    with st.spinner("Processing..."), tracer.trace("ingest") as ingest_trace:
         # Save temp
         with open("temp.pdf", "wb") as f:
             f.write(uploaded_file.getbuffer())
             
         # Load & Split
-        loader = PyPDFLoader("temp.pdf")
-        docs = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-        chunks = splitter.split_documents(docs)
+        with tracer.span("load_pdf") as span:
+            # Serial: forking the threaded Streamlit server could deadlock on another thread's lock
+            docs = load_pdf_documents("temp.pdf", workers=1)
+            span.set(items=len(docs))
+        with tracer.span("split_text") as span:
+            # start_index lets the context packer stitch overlapping neighbours back together
+            splitter = text_splitter(chunk_size=800, chunk_overlap=100, add_start_index=True)
+            chunks = splitter.split_documents(docs)
+            span.set(items=len(chunks))
         
         # Embed & Store
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004", google_api_key=api_key)
-        vector_store = Chroma.from_documents(chunks, embeddings) # In-memory for session
+        # Re-uploading the same PDF is served from the embedding cache
+        embeddings = gemini_embeddings("models/text-embedding-004", api_key=api_key, cache=get_embedding_cache())
+        with tracer.span("embed_and_store", items=len(chunks)):
+            vector_store = create("session_store", SESSION_STORE, chunks, embeddings) # In-memory for session
         
         st.session_state["vector_store"] = vector_store
-        st.success("PDF Processed!")
+        stats = embeddings.cache.stats()
+        st.success(f"PDF Processed! (embedding cache: {stats['hits']} hits, {stats['misses']} misses)")
+    if show_timings:
+        st.caption(f"⏱️ {tracer.summary(tracer.get_trace(ingest_trace.trace_id))}")
 
 # --- 2. MAIN CHAT LOGIC ---
 if st.session_state["vector_store"]:
+    # Only needed once there is a document to chat about
+    from langchain_core.documents import Document
+    from langchain_core.messages import AIMessage, HumanMessage
+
     # Display History
     for msg in st.session_state["chat_history"]:
         role = "user" if isinstance(msg, HumanMessage) else "assistant"
         with st.chat_message(role):
             st.markdown(msg.content)
+            timings = msg.additional_kwargs.get("timings")
+            if show_timings and timings:
+                with st.expander("⏱️ Timings"):
+                    st.table(timings)
 
     # Handle Input
     if user_input := st.chat_input("Ask something..."):
@@ -73,59 +179,63 @@ if st.session_state["vector_store"]:
 
         # B. Generate Answer
         with st.chat_message("assistant"):
-            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key, temperature=0)
-            retriever = st.session_state["vector_store"].as_retriever()
-            
-            # --- THE NEW PART: HISTORY AWARENESS ---
-            
-            # 1. Define sub-prompt to rephrase the question
-            contextualize_q_system_prompt = """
-            Given a chat history and the latest user question which might reference context in the chat history, 
-            formulate a standalone question which can be understood without the chat history. 
-            Do NOT answer the question, just reformulate it if needed and otherwise return it as is.
-            """
-            
-            contextualize_q_prompt = ChatPromptTemplate.from_messages([
-                ("system", contextualize_q_system_prompt),
-                MessagesPlaceholder("chat_history"),
-                ("human", "{input}"),
-            ])
-            
-            # 2. Create the "History Aware Retriever" (The Rewriter)
-            history_aware_retriever = create_history_aware_retriever(
-                llm, retriever, contextualize_q_prompt
-            )
-            
-            # 3. Define the Answer Prompt (Standard RAG)
-            qa_system_prompt = """
-            You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. 
-            If you don't know the answer, just say that you don't know. 
-            
-            {context}
-            """
+            # Built once per process; only the session's memory and vector store differ
+            pipeline = get_pipeline()
+            memory = st.session_state["memory"]
+            history = memory.window()
             
-            qa_prompt = ChatPromptTemplate.from_messages([
-                ("system", qa_system_prompt),
-                MessagesPlaceholder("chat_history"), # Context goes here too
-                ("human", "{input}"),
-            ])
-            
-            # 4. Create the Final Chain
-            question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
-            rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
-            
-            # 5. Run the Chain
-            with st.spinner("Thinking..."):
-                response = rag_chain.invoke({
+            with st.spinner("Thinking..."), tracer.trace("question") as question_trace:
+                # Chain steps and LLM calls (with token usage) are recorded as spans
+                config = {"callbacks": [langchain_callbacks(tracer)]}
+
+                # 1. Rewrite only if the question depends on earlier turns (cached)
+                with tracer.span("rewrite"):
+                    standalone = memory.standalone_question(
+                        user_input,
+                        lambda q: pipeline["rewrite"].invoke({"input": q, "chat_history": history}, config=config),
+                    )
+                
+                # 2. Retrieve with the standalone question
+                with tracer.span("search", items=RETRIEVAL_K):
+                    relevant_docs = st.session_state["vector_store"].similarity_search(standalone, k=RETRIEVAL_K)
+
+                # Stuff merged, de-duplicated passages instead of every raw hit
+                with tracer.span("pack_context", items=len(relevant_docs)) as span:
+                    packed = pack_context(relevant_docs, budget_tokens=CONTEXT_TOKEN_BUDGET)
+                    context_docs = [Document(page_content=p["text"], metadata=p["metadata"]) for p in packed["passages"]]
+                    span.set(prompt_tokens=packed["stats"]["tokens"])
+                
+                # 3. Answer with the bounded history + summary
+                answer = pipeline["answer"].invoke({
                     "input": user_input,
-                    "chat_history": st.session_state["chat_history"]
-                })
+                    "chat_history": history,
+                    "summary": memory.summary or "(none)",
+                    "context": context_docs,
+                }, config=config)
+
+                # Save to History (the memory window may fold old turns into the summary)
+                memory.add("human", user_input)
+                memory.add("ai", answer)
             
             # Show Answer
-            st.markdown(response["answer"])
-            
-            # Save to History
-            st.session_state["chat_history"].append(AIMessage(content=response["answer"]))
+            st.markdown(answer)
+            timings = tracer.table(tracer.get_trace(question_trace.trace_id))
+            if show_timings:
+                with st.expander("⏱️ Timings"):
+                    st.table(timings)
+            st.session_state["chat_history"].append(AIMessage(content=answer, additional_kwargs={"timings": timings}))
 
 else:
-    st.info("Please upload a PDF to start.")
\ No newline at end of file
+    st.info("Please upload a PDF to start.")
+
+# --- INSTRUMENTATION: construction time saved by the registry ---
+with st.sidebar:
+    stats = registry.stats()
+    with st.expander("⚙️ Pipeline Cache"):
+        st.write(f"Built: {stats['builds']} · Reused: {stats['reuses']}")
+        st.write(f"Construction time saved: {stats['saved_seconds'] * 1000:.1f} ms")
+    memory_stats = st.session_state["memory"].stats()
+    with st.expander("🧠 Conversation Memory"):
+        st.write(f"Turns in window: {memory_stats['turns_in_window']} · ~{memory_stats['prompt_tokens']} history tokens")
+        st.write(f"Rewrites: {memory_stats['rewrites']} · skipped: {memory_stats['rewrites_skipped']} "
+                 f"· cached: {memory_stats['rewrite_cache_hits']}")
@@ -0,0 +1,85 @@
+"""
+Benchmark: IVF approximate search vs. exact VectorStore search.
+
+Reports recall@k against brute force and p50/p99 query latency for several
+nprobe settings. Vectors are synthetic but clustered (like real embeddings),
+so no API key is needed.
+
+    python benchmarks/bench_ann.py
+    python benchmarks/bench_ann.py --sizes 100000 1000000 --dim 768 --n-lists 1024
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core import VectorStore
+from rag_core.ann import IVFIndex
+
+
+def clustered_vectors(n, dim, n_topics, rng, batch=100_000):
+    # Each vector = a random "topic" direction + noise
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    for start in range(0, n, batch):
+        rows = min(batch, n - start)
+        yield topics[rng.integers(0, n_topics, rows)] + 0.6 * rng.standard_normal((rows, dim), dtype=np.float32)
+
+
+def latencies(search, queries):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return results, np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def recall(approx, exact):
+    hits = [len({r["id"] for r in a} & {r["id"] for r in e}) / max(len(e), 1) for a, e in zip(approx, exact)]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--n-lists", type=int, default=None, help="default: ~sqrt(N)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    print(f"{'N':>9} | {'index':>12} | {'recall@' + str(args.k):>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 58)
+    for n in args.sizes:
+        rng = np.random.default_rng(0)
+        n_lists = args.n_lists or max(16, int(np.sqrt(n)))
+        exact = VectorStore(dim=args.dim, capacity=n)
+        ivf = IVFIndex(args.dim, n_lists=n_lists)
+
+        build_start = time.perf_counter()
+        for block in clustered_vectors(n, args.dim, n_topics=max(32, n // 500), rng=rng):
+            texts = [""] * block.shape[0]
+            exact.add(block, texts)
+            ivf.add(block, texts)
+        build_s = time.perf_counter() - build_start
+
+        queries = next(clustered_vectors(args.queries, args.dim, n_topics=max(32, n // 500), rng=rng))
+        truth, p50, p99 = latencies(lambda q: exact.search(q, args.k), queries)
+        print(f"{n:>9} | {'exact':>12} | {1.0:>9.3f} | {p50:>8.2f} | {p99:>8.2f}")
+        for nprobe in args.nprobe:
+            if nprobe > n_lists:
+                continue
+            found, p50, p99 = latencies(lambda q: ivf.search(q, args.k, nprobe=nprobe), queries)
+            label = f"ivf/{nprobe}"
+            print(f"{n:>9} | {label:>12} | {recall(found, truth):>9.3f} | {p50:>8.2f} | {p99:>8.2f}")
+        print(f"{'':>9}   (n_lists={n_lists}, build {build_s:.1f}s incl. k-means)")
+        del exact, ivf
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: prompt tokens for "\\n\\n".join(top-k) vs. pack_context().
+
+Splits the bundled documents the way Days 7-9 do (RecursiveCharacterTextSplitter,
+800 / 100 overlap, with start_index), retrieves the top-k chunks with BM25
+(no API key needed) for a fixed question list plus one question per chunk
+(a few of its words), and compares the context sent to the LLM:
+  - naive:  every hit joined with "\\n\\n" (Days 7-9 before packing)
+  - merged: overlapping / adjacent hits stitched, duplicates dropped, no budget
+  - budget: merged, then filled best-first up to --budget tokens
+
+    python benchmarks/bench_context_packing.py
+    python benchmarks/bench_context_packing.py --k 3 4 8 --budget 600
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from rag_core.bm25 import BM25Index
+from rag_core.context_packing import pack_context
+from rag_core.pdf_extract import load_pdf_documents
+
+SOURCES = [
+    "Day_05_Chat_with_PDF/document.pdf",
+    "Day_08_Streamlit_Frontend/temp.pdf",
+    "Day_02_Text_File_RAG/mars_colony_guide.txt",
+]
+QUERIES = [
+    "What is the currency used on Mars?",
+    "Red-Credits exchange rate",
+    "Aero-2000 maintenance schedule",
+    "How do I get oxygen in the colony?",
+    "Who is in charge of the settlement?",
+    "emergency procedures during a dust storm",
+]
+
+
+def load_chunks(chunk_size, overlap):
+    docs = []
+    for path in SOURCES:
+        full_path = os.path.join(ROOT, path)
+        if not os.path.exists(full_path):
+            continue
+        if path.endswith(".pdf"):
+            docs.extend(load_pdf_documents(full_path))
+        else:
+            with open(full_path, "r", encoding="utf-8") as f:
+                docs.append(Document(page_content=f.read(), metadata={"source": full_path, "page": 0}))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap, add_start_index=True)
+    return splitter.split_documents(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[3, 4, 6, 10])
+    parser.add_argument("--budget", type=int, default=800, help="context token budget")
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.chunk_size, args.overlap)
+    if not chunks:
+        print("No bundled documents found.")
+        return
+    bm25 = BM25Index()
+    bm25.add([chunk.page_content for chunk in chunks])
+
+    rng = np.random.default_rng(args.seed)
+    queries = list(QUERIES)
+    for chunk in chunks:
+        words = chunk.page_content.split()
+        start = int(rng.integers(0, max(1, len(words) - 6)))
+        queries.append(" ".join(words[start:start + 6]))
+    print(f"{len(chunks)} chunks from {len(SOURCES)} documents, {len(queries)} questions\n")
+
+    print(f"{'k':>3} | {'naive tok':>9} | {'merged tok':>10} | {'saved':>6} | {'budget tok':>10} | "
+          f"{'max budget':>10} | {'saved':>6} | {'pack us':>8}")
+    print("-" * 87)
+    for k in args.k:
+        naive, merged, budgeted, timings = [], [], [], []
+        for query in queries:
+            rows, scores = bm25.search(query, k)
+            hits = [(chunks[row], float(score)) for row, score in zip(rows, scores)]
+            if not hits:
+                continue
+            unlimited = pack_context(hits, budget_tokens=10**9)
+            start = time.perf_counter()
+            packed = pack_context(hits, budget_tokens=args.budget)
+            timings.append((time.perf_counter() - start) * 1e6)
+            naive.append(unlimited["stats"]["naive_tokens"])
+            merged.append(unlimited["stats"]["tokens"])
+            budgeted.append(packed["stats"]["tokens"])
+        naive_mean, merged_mean, budget_mean = np.mean(naive), np.mean(merged), np.mean(budgeted)
+        print(f"{k:>3} | {naive_mean:>9.0f} | {merged_mean:>10.0f} | {1 - merged_mean / naive_mean:>6.1%} | "
+              f"{budget_mean:>10.0f} | {max(budgeted):>10} | {1 - budget_mean / naive_mean:>6.1%} | "
+              f"{np.median(timings):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: dense-only vs. hybrid (BM25 + dense) retrieval.
+
+Chunks the bundled PDFs (and the Day 2 Mars guide), builds the BM25 index
+and a fake-embedding matrix, then reports build time and p50/p99 query
+latency for dense-only, hybrid, and hybrid with a lexical prefilter.
+Embeddings come from FakeEmbeddingBackend, so no API key is needed;
+--repeat copies the corpus to simulate bigger collections.
+
+    python benchmarks/bench_hybrid.py
+    python benchmarks/bench_hybrid.py --repeat 200 --prefilter 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from rag_core import normalize_rows, top_k
+from rag_core.bm25 import BM25Index
+from rag_core.chunking import iter_chunks, iter_pdf_pages
+from rag_core.embeddings import EmbeddingClient, FakeEmbeddingBackend
+from rag_core.hybrid import HybridRetriever
+
+SOURCES = [
+    "Day_05_Chat_with_PDF/document.pdf",
+    "Day_07_LangChain_Intro/document.pdf",
+    "Day_02_Text_File_RAG/mars_colony_guide.txt",
+]
+QUERIES = [
+    "What is the currency used on Mars?",
+    "Red-Credits exchange rate",
+    "Aero-2000 maintenance schedule",
+    "How do I get oxygen in the colony?",
+    "Who is in charge of the settlement?",
+    "emergency procedures during a dust storm",
+]
+
+
+def load_chunks(chunk_size, overlap):
+    chunks = []
+    for path in SOURCES:
+        full_path = os.path.join(ROOT, path)
+        if not os.path.exists(full_path):
+            continue
+        if path.endswith(".pdf"):
+            pages = iter_pdf_pages(full_path)
+        else:
+            with open(full_path, "r", encoding="utf-8") as f:
+                pages = [f.read()]
+        chunks.extend(iter_chunks(pages, chunk_size, overlap))
+    return chunks
+
+
+def latencies(search, queries, rounds):
+    timings = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--prefilter", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    base = load_chunks(args.chunk_size, args.overlap)
+    if not base:
+        print("No bundled documents found.")
+        return
+    embedder = EmbeddingClient(FakeEmbeddingBackend(dim=args.dim))
+    base_matrix = normalize_rows(embedder.embed(base))
+    query_vecs = {q: normalize_rows(embedder.embed_one(q))[0] for q in QUERIES}
+
+    print(f"{'chunks':>9} | {'retriever':>16} | {'build ms':>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 62)
+    for repeat in args.repeat:
+        texts = base * repeat
+        matrix = np.tile(base_matrix, (repeat, 1))
+
+        start = time.perf_counter()
+        bm25 = BM25Index()
+        bm25.add(texts)
+        bm25.search(QUERIES[0], 1)  # Postings are packed on first use; count it as build time
+        build_ms = (time.perf_counter() - start) * 1000
+
+        hybrid = HybridRetriever(matrix, texts, bm25)
+        runs = [
+            ("dense", 0.0, lambda q: top_k(matrix @ query_vecs[q], args.k)),
+            ("bm25", build_ms, lambda q: bm25.search(q, args.k)),
+            ("hybrid", build_ms, lambda q: hybrid.search(q, query_vecs[q], args.k)),
+            (f"hybrid/pre{args.prefilter}", build_ms,
+             lambda q: hybrid.search(q, query_vecs[q], args.k, prefilter=args.prefilter)),
+        ]
+        for label, build, search in runs:
+            p50, p99 = latencies(search, QUERIES, args.rounds)
+            print(f"{len(texts):>9} | {label:>16} | {build:>9.1f} | {p50:>8.3f} | {p99:>8.3f}")
+        del texts, matrix, bm25, hybrid
+
+
+if __name__ == "__main__":
+    main()
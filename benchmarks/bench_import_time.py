@@ -0,0 +1,143 @@
+"""
+Benchmark: startup import cost per entry point, and per backend.
+
+Entry points (Day scripts, the service, the bulk ingester) run top-level
+code, so they are not imported whole. Instead their module-level import
+statements are read with `ast` and executed, in order, in a fresh Python
+process: exactly what a cold start pays before the script's first line of
+real work. Each entry point runs --rounds times (median reported); the
+OS file cache is warm after the first round, as on a restarted worker.
+
+Backends: every factory in rag_core/backends.py is measured the same way
+(its own import statements, in a fresh process): the cost paid only when
+that backend is selected.
+
+Packages missing from this environment are reported and skipped, so
+totals only cover what is installed.
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --baseline HEAD~1   # same entry points at another git revision
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "Day_04_Vector_Store/main.py",
+    "Day_05_Chat_with_PDF/main.py",
+    "Day_06_ChromaDB/main.py",
+    "Day_07_LangChain_Intro/main.py",
+    "Day_08_Streamlit_Frontend/app.py",
+    "Day_09_Chat_History/app.py",
+    "rag_core/service.py",
+    "rag_core/bulk_ingest.py",
+]
+
+# Runs in a child process: times each import statement, prints {"seconds", "slowest", "missing"}
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+timings, missing = [], []
+for statement in {statements!r}:
+    start = time.perf_counter()
+    try:
+        exec(statement, {{}})
+    except ImportError as exc:
+        missing.append(getattr(exc, "name", None) or str(exc))
+        continue
+    timings.append((time.perf_counter() - start, statement))
+timings.sort(reverse=True)
+print(json.dumps({{"seconds": sum(t for t, _ in timings), "slowest": timings[:2], "missing": missing}}))
+"""
+
+
+def import_statements(nodes):
+    """Source of the import statements directly in `nodes` (not inside functions or blocks)."""
+    statements = []
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            statements.append("import " + ", ".join(alias.name for alias in node.names))
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = ", ".join(alias.name for alias in node.names)
+            statements.append(f"from {node.module} import {names}")
+    return statements
+
+
+def read_source(path, revision=None):
+    if revision is None:
+        with open(os.path.join(ROOT, path), "r", encoding="utf-8") as f:
+            return f.read()
+    result = subprocess.run(["git", "show", f"{revision}:{path}"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout if result.returncode == 0 else None
+
+
+def measure(statements, rounds):
+    runs = []
+    for _ in range(rounds):
+        output = subprocess.run([sys.executable, "-c", PROBE.format(root=ROOT, statements=statements)],
+                                cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    runs.sort(key=lambda run: run["seconds"])
+    return runs[len(runs) // 2]
+
+
+def backend_statements():
+    with open(os.path.join(ROOT, "rag_core", "backends.py"), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return {node.name: import_statements(ast.walk(node)) for node in tree.body if isinstance(node, ast.FunctionDef)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--baseline", help="git revision to compare against (e.g. HEAD~1)")
+    parser.add_argument("--no-backends", action="store_true", help="skip the per-backend table")
+    args = parser.parse_args()
+
+    header = f"{'entry point':<34} | {'startup s':>9}"
+    if args.baseline:
+        header += f" | {args.baseline + ' s':>10} | {'saved':>6}"
+    print(header + " | slowest import")
+    print("-" * (len(header) + 40))
+    missing = set()
+    for path in ENTRY_POINTS:
+        source = read_source(path)
+        if source is None:
+            continue
+        run = measure(import_statements(ast.parse(source).body), args.rounds)
+        missing.update(run["missing"])
+        line = f"{path:<34} | {run['seconds']:>9.2f}"
+        if args.baseline:
+            old_source = read_source(path, args.baseline)
+            if old_source is None:
+                line += f" | {'-':>10} | {'-':>6}"
+            else:
+                old = measure(import_statements(ast.parse(old_source).body), args.rounds)
+                missing.update(old["missing"])
+                line += f" | {old['seconds']:>10.2f} | {old['seconds'] - run['seconds']:>5.2f}s"
+        slowest = run["slowest"][0] if run["slowest"] else (0.0, "-")
+        print(f"{line} | {slowest[1]} ({slowest[0]:.2f}s)")
+
+    if not args.no_backends:
+        print(f"\n{'backend (rag_core/backends.py)':<34} | {'import s':>9} | imports")
+        print("-" * 80)
+        for name, statements in backend_statements().items():
+            if not statements:
+                continue
+            run = measure(statements, args.rounds)
+            missing.update(run["missing"])
+            label = "not installed" if run["missing"] and not run["slowest"] else f"{run['seconds']:>9.2f}"
+            print(f"{name:<34} | {label:>9} | {'; '.join(statements)}")
+
+    if missing:
+        print(f"\nNot installed here (excluded from the totals): {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: metadata-filtered search, scoring everything vs. prefiltering.
+
+Builds a VectorStore of random vectors with chunk-style metadata
+(source file, page, upload session) and times, per filter:
+  - scan + mask: score ALL rows, then drop the ones that fail the filter
+    (the mask is precomputed, so this is the best case for scanning)
+  - prefilter:   resolve the filter through the posting lists, then score
+    only the candidates (resolve time included)
+Results are checked to be identical.
+
+    python benchmarks/bench_metadata_filter.py
+    python benchmarks/bench_metadata_filter.py --sizes 100000 500000 --dim 384
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from rag_core import VectorStore, normalize_rows, top_k
+
+FILTERS = [
+    ("one source", {"source": "file-00042.pdf"}),
+    ("pages 0-4", {"page": {"$lte": 4}}),
+    ("source AND pages", {"$and": [{"source": {"$in": ["file-00001.pdf", "file-00002.pdf"]}},
+                                   {"page": {"$gte": 10, "$lt": 20}}]}),
+    ("session OR source", {"$or": [{"session": "s07"}, {"source": "file-00003.pdf"}]}),
+    ("not session s00", {"session": {"$ne": "s00"}}),
+]
+
+
+def timed(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 300_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--sources", type=int, default=2000, help="distinct source files")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'N':>9} | {'filter':>18} | {'matches':>8} | {'scan+mask ms':>12} | {'prefilter ms':>12} | "
+          f"{'resolve ms':>10} | {'speedup':>7}")
+    print("-" * 96)
+    for n in args.sizes:
+        rng = np.random.default_rng(0)
+        sources = rng.integers(0, args.sources, n)
+        pages = rng.integers(0, 50, n)
+        sessions = rng.integers(0, 20, n)
+        metadatas = [{"source": f"file-{s:05d}.pdf", "page": int(p), "session": f"s{x:02d}"}
+                     for s, p, x in zip(sources, pages, sessions)]
+        store = VectorStore(dim=args.dim, capacity=n)
+        for start in range(0, n, 50_000):
+            stop = min(start + 50_000, n)
+            store.add(rng.standard_normal((stop - start, args.dim), dtype=np.float32),
+                      [f"chunk {i}" for i in range(start, stop)], metadatas=metadatas[start:stop])
+        query = rng.standard_normal(args.dim).astype(np.float32)
+        unit_query = normalize_rows(query)[0]
+
+        for label, where in FILTERS:
+            store.search(query, args.k, where=where)  # Builds the packed postings / range tables once
+            mask = np.zeros(n, dtype=bool)
+            mask[store.index.resolve(where)] = True
+
+            def scan():
+                scores = store.vectors @ unit_query
+                scores[~mask] = -np.inf
+                return [store.ids[i] for i in top_k(scores, args.k) if mask[i]]
+
+            scan_ms, expected = timed(scan, args.rounds)
+            filtered_ms, results = timed(lambda: store.search(query, args.k, where=where), args.rounds)
+            resolve_ms, _ = timed(lambda: store.index.resolve(where), args.rounds)
+            assert [r["id"] for r in results] == expected, label
+            print(f"{n:>9} | {label:>18} | {mask.mean():>8.2%} | {scan_ms:>12.2f} | {filtered_ms:>12.2f} | "
+                  f"{resolve_ms:>10.3f} | {scan_ms / filtered_ms:>6.1f}x")
+        del store, metadatas
+
+
+if __name__ == "__main__":
+    main()
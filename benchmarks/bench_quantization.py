@@ -0,0 +1,87 @@
+"""
+Benchmark: float32 VectorStore vs. int8 and binary QuantizedVectorStore.
+
+Reports RAM per vector, recall@k against exact float32 search, and p50/p99
+query latency for several rescore shortlist sizes. The quantized stores keep
+their float32 rows on disk (memory-mapped) in a temporary directory.
+Vectors are synthetic but clustered, so no API key is needed.
+
+    python benchmarks/bench_quantization.py
+    python benchmarks/bench_quantization.py --sizes 1000000 --rescore 1 4 16
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core import VectorStore
+from rag_core.quantization import QuantizedVectorStore
+
+
+def clustered_vectors(n, dim, n_topics, rng, batch=100_000):
+    # Each vector = a random "topic" direction + noise
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    for start in range(0, n, batch):
+        rows = min(batch, n - start)
+        yield topics[rng.integers(0, n_topics, rows)] + 0.6 * rng.standard_normal((rows, dim), dtype=np.float32)
+
+
+def latencies(search, queries):
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return results, np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def recall(approx, exact):
+    hits = [len({r["id"] for r in a} & {r["id"] for r in e}) / max(len(e), 1) for a, e in zip(approx, exact)]
+    return float(np.mean(hits))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    header = f"{'N':>9} | {'store':>14} | {'bytes/vec':>9} | {'recall@' + str(args.k):>9} | {'p50 ms':>8} | {'p99 ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for n in args.sizes:
+        rng = np.random.default_rng(0)
+        n_topics = max(32, n // 500)
+        with tempfile.TemporaryDirectory() as tmp:
+            exact = VectorStore(dim=args.dim, capacity=n)
+            stores = {mode: QuantizedVectorStore(args.dim, mode=mode, directory=os.path.join(tmp, mode))
+                      for mode in ("int8", "binary")}
+            for block in clustered_vectors(n, args.dim, n_topics, rng):
+                texts = [""] * block.shape[0]
+                exact.add(block, texts)
+                for store in stores.values():
+                    store.add(block, texts)
+
+            queries = next(clustered_vectors(args.queries, args.dim, n_topics, rng))
+            truth, p50, p99 = latencies(lambda q: exact.search(q, args.k), queries)
+            print(f"{n:>9} | {'float32':>14} | {args.dim * 4:>9} | {1.0:>9.3f} | {p50:>8.2f} | {p99:>8.2f}")
+            for mode, store in stores.items():
+                per_vector = store.memory_usage()["bytes_per_vector"]
+                for factor in args.rescore:
+                    found, p50, p99 = latencies(lambda q: store.search(q, args.k, rescore=factor), queries)
+                    label = f"{mode}/x{factor}"
+                    print(f"{n:>9} | {label:>14} | {per_vector:>9.0f} | {recall(found, truth):>9.3f} "
+                          f"| {p50:>8.2f} | {p99:>8.2f}")
+            del exact, stores
+
+
+if __name__ == "__main__":
+    main()
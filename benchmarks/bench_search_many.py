@@ -0,0 +1,103 @@
+"""
+Benchmark: answering a batch of queries one at a time vs. search_many.
+
+In-house VectorStore (random vectors), per store size:
+  - loop:        store.search(query) for every query
+  - search_many: blocked matrix-matrix products + row-wise top-k
+Chroma (in-memory collection, --chroma-size vectors):
+  - loop:    one collection.query call per query
+  - batched: chroma_search_texts, one query call per --batch queries
+Embedding is a local stub so only search is timed. Results are checked to
+be identical.
+
+    python benchmarks/bench_search_many.py
+    python benchmarks/bench_search_many.py --sizes 100000 --queries 5000 --dim 768
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from rag_core import VectorStore
+from rag_core.batch_search import chroma_search_texts
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def bench_store(n, args, queries):
+    rng = np.random.default_rng(1)
+    store = VectorStore(dim=args.dim, capacity=n)
+    for start in range(0, n, 50_000):
+        stop = min(start + 50_000, n)
+        store.add(rng.standard_normal((stop - start, args.dim), dtype=np.float32),
+                  [f"chunk {i}" for i in range(start, stop)])
+    store.search(queries[0], args.k)  # Warm-up
+
+    loop_s, expected = timed(lambda: [store.search(q, args.k) for q in queries])
+    many_s, results = timed(lambda: store.search_many(queries, args.k))
+    assert [[r["id"] for r in hits] for hits in results] == [[r["id"] for r in hits] for hits in expected]
+    print(f"{'VectorStore':>11} | {n:>9} | {len(queries):>7} | {loop_s * 1000:>9.0f} | {many_s * 1000:>10.0f} | "
+          f"{len(queries) / many_s:>8.0f} | {loop_s / many_s:>6.1f}x")
+
+
+def bench_chroma(args, queries):
+    try:
+        import chromadb
+    except ImportError:
+        print(f"{'Chroma':>11} | chromadb not installed, skipped")
+        return
+    rng = np.random.default_rng(2)
+    n = args.chroma_size
+    collection = chromadb.EphemeralClient().get_or_create_collection(
+        "bench_search_many", metadata={"hnsw:space": "cosine"})
+    vectors = rng.standard_normal((n, args.dim), dtype=np.float32)
+    for start in range(0, n, 5000):
+        stop = min(start + 5000, n)
+        collection.add(ids=[str(i) for i in range(start, stop)], embeddings=vectors[start:stop].tolist(),
+                       documents=[f"chunk {i}" for i in range(start, stop)])
+
+    # The "texts" are query row numbers; the stub embedder looks them up
+    texts = list(range(len(queries)))
+    embed = lambda batch: queries[batch]
+
+    def loop():
+        return [collection.query(query_embeddings=[queries[i].tolist()], n_results=args.k)["ids"][0] for i in texts]
+
+    loop_s, expected = timed(loop)
+    many_s, results = timed(lambda: [hit["ids"] for hit in chroma_search_texts(
+        collection, texts, embed, k=args.k, batch_size=args.batch)])
+    assert results == expected
+    print(f"{'Chroma':>11} | {n:>9} | {len(queries):>7} | {loop_s * 1000:>9.0f} | {many_s * 1000:>10.0f} | "
+          f"{len(queries) / many_s:>8.0f} | {loop_s / many_s:>6.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--chroma-size", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=500, help="queries per Chroma call")
+    args = parser.parse_args()
+
+    queries = np.random.default_rng(0).standard_normal((args.queries, args.dim), dtype=np.float32)
+    print(f"{'store':>11} | {'N':>9} | {'queries':>7} | {'loop ms':>9} | {'batched ms':>10} | {'q/s':>8} | "
+          f"{'speedup':>7}")
+    print("-" * 79)
+    for n in args.sizes:
+        bench_store(n, args, queries)
+    bench_chroma(args, queries)
+
+
+if __name__ == "__main__":
+    main()
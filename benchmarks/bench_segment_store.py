@@ -0,0 +1,104 @@
+"""
+Benchmark: startup time of a SegmentStore vs. loading a full in-memory store.
+
+For each size, writes the same random vectors + texts both as a SegmentStore
+and as the Day 5 style `.npy` + `.json` pair, then times (in fresh
+processes, so nothing is already in Python's memory):
+  - open: time until the store is ready to answer queries
+  - first query / warm query latency
+
+The OS page cache stays warm between runs, which is the common case for a
+service restarting on the same machine.
+
+    python benchmarks/bench_segment_store.py
+    python benchmarks/bench_segment_store.py --sizes 1000000 --dim 768
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from rag_core.segment_store import SegmentStore
+
+# Runs in a child process: prints open / first query / warm query times in ms
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import numpy as np
+sys.path.append({root!r})
+from rag_core import VectorStore
+from rag_core.segment_store import SegmentStore
+kind, path, dim = {kind!r}, {path!r}, {dim}
+t0 = time.perf_counter()
+if kind == "segments":
+    store = SegmentStore(path, readonly=True)
+else:
+    with open(path + ".json", "r", encoding="utf-8") as f:
+        texts = json.load(f)
+    store = VectorStore(dim=dim)
+    store.add(np.load(path + ".npy"), texts)
+t1 = time.perf_counter()
+query = np.random.default_rng(1).standard_normal(dim).astype(np.float32)
+store.search(query, 3)
+t2 = time.perf_counter()
+store.search(query, 3)
+t3 = time.perf_counter()
+print(json.dumps([(t1 - t0) * 1000, (t2 - t1) * 1000, (t3 - t2) * 1000]))
+"""
+
+
+def probe(kind, path, dim):
+    code = PROBE.format(root=ROOT, kind=kind, path=path, dim=dim)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--batch", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'N':>9} | {'format':>12} | {'write s':>8} | {'open ms':>9} | {'1st query':>9} | {'warm ms':>8}")
+    print("-" * 70)
+    for n in args.sizes:
+        rng = np.random.default_rng(0)
+        with tempfile.TemporaryDirectory() as tmp:
+            flat = os.path.join(tmp, "flat")
+            start = time.perf_counter()
+            store = SegmentStore(os.path.join(tmp, "segments"), segment_size=args.batch * 4)
+            blocks, texts = [], []
+            for offset in range(0, n, args.batch):
+                rows = min(args.batch, n - offset)
+                block = rng.standard_normal((rows, args.dim), dtype=np.float32)
+                chunk_texts = [f"chunk {offset + i}" for i in range(rows)]
+                store.add(block, chunk_texts)
+                blocks.append(block)
+                texts.extend(chunk_texts)
+            write_segments = time.perf_counter() - start
+            store.close()
+
+            start = time.perf_counter()
+            np.save(flat + ".npy", np.vstack(blocks))
+            with open(flat + ".json", "w", encoding="utf-8") as f:
+                json.dump(texts, f)
+            write_flat = time.perf_counter() - start
+            del blocks, texts
+
+            for label, kind, path, write_s in (("npy+json", "flat", flat, write_flat),
+                                               ("segments", "segments", os.path.join(tmp, "segments"), write_segments)):
+                open_ms, first_ms, warm_ms = probe(kind, path, args.dim)
+                print(f"{n:>9} | {label:>12} | {write_s:>8.2f} | {open_ms:>9.1f} | {first_ms:>9.1f} | {warm_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
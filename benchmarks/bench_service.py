@@ -0,0 +1,86 @@
+"""
+Benchmark: concurrent chats against the async RAGService.
+
+Fires `--users` questions at once (in-process, no HTTP) with the offline
+stub backends: a fake embedder that takes `--embed-latency` seconds per
+request and a stub LLM. Compares one-at-a-time serving with the service
+at different micro-batching windows, and reports throughput, p50/p99
+latency and how many embedding requests were actually sent.
+
+    python benchmarks/bench_service.py
+    python benchmarks/bench_service.py --users 500 --windows 0 2 5 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core import VectorStore
+from rag_core.embeddings import EmbeddingClient, FakeEmbeddingBackend
+from rag_core.service import RAGService
+from rag_core.streaming import StubStreamingLLM
+
+
+def build(args, window):
+    backend = FakeEmbeddingBackend(dim=args.dim, latency=args.embed_latency)
+    embedder = EmbeddingClient(backend)
+    store = VectorStore(dim=args.dim)
+    texts = [f"chunk {i} about the Mars colony" for i in range(args.chunks)]
+    store.add(embedder.embed(texts), texts)
+    backend.calls = 0
+    llm = StubStreamingLLM(text="A short stubbed answer.", delay=args.llm_delay)
+    service = RAGService(embedder, lambda question, vec, k: store.search(vec, k), llm,
+                         max_generations=args.max_generations, batch_window=window)
+    return service, backend
+
+
+async def run_users(service, questions, concurrent):
+    latencies = []
+
+    async def one(question):
+        start = time.perf_counter()
+        await service.ask(question)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*(one(q) for q in questions))
+    else:
+        for question in questions:
+            await one(question)
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--llm-delay", type=float, default=0.01, help="seconds per stub token")
+    parser.add_argument("--max-generations", type=int, default=64)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 5], help="batching windows in ms")
+    parser.add_argument("--sequential-users", type=int, default=20)
+    args = parser.parse_args()
+    questions = [f"Question number {i} about Mars?" for i in range(args.users)]
+
+    print(f"{'mode':>18} | {'users':>5} | {'req/s':>7} | {'p50 ms':>8} | {'p99 ms':>8} | {'embed calls':>11}")
+    print("-" * 72)
+    runs = [("one at a time", 5, False, args.sequential_users)]
+    runs += [(f"async, {w:g} ms window", w, True, args.users) for w in args.windows]
+    for label, window_ms, concurrent, users in runs:
+        service, backend = build(args, window_ms / 1000)
+        elapsed, latencies = asyncio.run(run_users(service, questions[:users], concurrent))
+        ms = np.array(latencies) * 1000
+        print(f"{label:>18} | {users:>5} | {users / elapsed:>7.1f} | {np.percentile(ms, 50):>8.1f} "
+              f"| {np.percentile(ms, 99):>8.1f} | {backend.calls:>11}")
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: ShardedStore query latency vs. number of worker processes.
+
+Writes random vectors into a ShardedStore (in a temp directory) with
+--shards shards, then times single queries for each worker count:
+  - 0 workers: every shard scanned in-process, one after another
+  - N workers: shards spread over N processes, scanned in parallel, merged
+Results are checked against the in-process scan. Speedups need free cores:
+workers beyond os.cpu_count() only add scheduling overhead.
+
+    python benchmarks/bench_sharded_store.py
+    python benchmarks/bench_sharded_store.py --size 2000000 --dim 768 --shards 8 --workers 0 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from rag_core.sharded_store import ShardedStore
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=500_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--shards", type=int, default=max(4, cores))
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({0, 1, 2, 4, cores}))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ShardedStore(directory, num_shards=args.shards, dim=args.dim, max_shard_rows=args.size)
+        start = time.perf_counter()
+        for first in range(0, args.size, 100_000):
+            count = min(100_000, args.size - first)
+            store.add(rng.standard_normal((count, args.dim), dtype=np.float32),
+                      [f"chunk {first + i}" for i in range(count)])
+        print(f"{args.size} vectors x {args.dim} dims in {args.shards} shards {store.shard_sizes()[:4]}..., "
+              f"written in {time.perf_counter() - start:.1f}s, {cores} CPU(s)\n")
+
+        print(f"{'workers':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'q/s':>7} | {'speedup':>7}")
+        print("-" * 48)
+        expected, baseline = None, None
+        for workers in args.workers:
+            store.workers = workers
+            if workers:
+                store.start(workers)
+            store.search(queries[0], args.k)  # Warm-up: page cache + worker start
+            timings, results = [], []
+            for query in queries:
+                begin = time.perf_counter()
+                results.append([hit["id"] for hit in store.search(query, args.k)])
+                timings.append((time.perf_counter() - begin) * 1000)
+            if expected is None:
+                expected = results
+            assert results == expected, f"{workers} workers returned different results"
+            p50 = float(np.median(timings))
+            baseline = baseline or p50
+            print(f"{workers:>7} | {p50:>8.1f} | {np.percentile(timings, 95):>8.1f} | {1000 / np.mean(timings):>7.1f} | "
+                  f"{baseline / p50:>6.2f}x")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: Day 4's list-of-dicts loop vs. the matrix-backed VectorStore.
+
+Uses random vectors, so no API key is needed.
+
+    python benchmarks/bench_vector_store.py
+    python benchmarks/bench_vector_store.py --sizes 10000 100000 1000000 --dim 768
+
+The Python loop gets very slow past 100k vectors, so it is skipped above
+--loop-limit and only the store is timed.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rag_core import VectorStore
+
+
+# --- BASELINE: the original Day 4 search ---
+def cosine_similarity(vec_a, vec_b):
+    dot_product = np.dot(vec_a, vec_b)
+    norm_a = np.linalg.norm(vec_a)
+    norm_b = np.linalg.norm(vec_b)
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot_product / (norm_a * norm_b)
+
+
+def loop_search(vector_store, query_vec, k):
+    results = []
+    for item in vector_store:
+        score = cosine_similarity(query_vec, item["vector"])
+        results.append({"text": item["text"], "score": score})
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results[:k]
+
+
+# --- TIMING ---
+def time_queries(search, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def build_store(n, dim, rng, batch=50_000):
+    store = VectorStore(dim=dim, capacity=n)
+    for start in range(0, n, batch):
+        rows = min(batch, n - start)
+        store.add(rng.standard_normal((rows, dim), dtype=np.float32),
+                  [f"doc {i}" for i in range(start, start + rows)])
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--loop-limit", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    print(f"{'N':>10} | {'loop (ms)':>10} | {'store (ms)':>10} | {'speedup':>8}")
+    print("-" * 48)
+    for n in args.sizes:
+        store = build_store(n, args.dim, rng)
+        store_ms = time_queries(lambda q: store.search(q, k=args.k), queries)
+
+        if n <= args.loop_limit:
+            # The loop is slow, so a handful of queries is enough for a median
+            as_dicts = [{"text": t, "vector": v} for t, v in zip(store.texts, store.vectors)]
+            loop_ms = time_queries(lambda q: loop_search(as_dicts, q, args.k), queries[:3])
+            del as_dicts
+            print(f"{n:>10} | {loop_ms:>10.2f} | {store_ms:>10.2f} | {loop_ms / store_ms:>7.1f}x")
+        else:
+            print(f"{n:>10} | {'skipped':>10} | {store_ms:>10.2f} | {'-':>8}")
+        del store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Synthetic corpora for benchmarks: deterministic text and multi-page PDFs.
+
+Text is built from a fixed pseudo-vocabulary with a Zipf-like word
+distribution (a few very common words, a long tail of rare ones), plus
+product-style names such as "Aero-2041" so keyword search has something
+to find. The same seed always produces the same corpus.
+
+The PDF writer has no dependencies: it emits a plain PDF 1.4 file with
+one Helvetica text stream per page, which pypdf / PyPDFLoader can read.
+"""
+
+import numpy as np
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "no", "vi", "da", "pe", "zo", "chi", "mar", "on", "el", "ist"]
+
+
+def vocabulary(size=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES, rng.integers(2, 5))))
+    # Shuffle so the common (low-rank) words are not all alphabetical neighbours
+    return [str(w) for w in rng.permutation(sorted(words))]
+
+
+def synthetic_text(n_words, seed=0, vocab=None):
+    rng = np.random.default_rng(seed)
+    vocab = vocab or vocabulary(seed=0)
+    # Zipf ranks, clipped to the vocabulary size
+    ranks = np.minimum(rng.zipf(1.3, n_words), len(vocab)) - 1
+    words = [vocab[r] for r in ranks]
+    for i in rng.choice(n_words, max(1, n_words // 200), replace=False):
+        words[i] = f"Aero-{rng.integers(1000, 9999)}"
+    sentences, start = [], 0
+    while start < n_words:
+        length = int(rng.integers(6, 18))
+        sentence = " ".join(words[start:start + length])
+        sentences.append(sentence[:1].upper() + sentence[1:] + ".")
+        start += length
+    return " ".join(sentences)
+
+
+def synthetic_documents(n_docs, words_per_doc=200, seed=0):
+    vocab = vocabulary(seed=0)
+    return [synthetic_text(words_per_doc, seed=seed * 1_000_003 + i, vocab=vocab) for i in range(n_docs)]
+
+
+def synthetic_questions(n, seed=1):
+    vocab = vocabulary(seed=0)
+    rng = np.random.default_rng(seed)
+    return [f"What does the guide say about {' '.join(rng.choice(vocab[:500], 3))}?" for _ in range(n)]
+
+
+# --- PDF WRITER ---
+def _escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text, width=90):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def write_pdf(path, pages):
+    """Writes one page per string in `pages` (long pages are cut at ~60 lines)."""
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for i, text in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        lines = _wrap(text)[:60]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({_escape(l)}) Tj T*" for l in lines) + " ET"
+        stream = stream.encode("latin-1", errors="replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(out)
+    count = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % count
+    for number in range(1, count):
+        out += b"%010d 00000 n \n" % offsets[number]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def synthetic_pdf(path, n_pages, words_per_page=450, seed=0):
+    vocab = vocabulary(seed=0)
+    write_pdf(path, [synthetic_text(words_per_page, seed=seed * 1_000_003 + i, vocab=vocab) for i in range(n_pages)])
+    return path
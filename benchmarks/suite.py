@@ -0,0 +1,307 @@
+"""
+Offline benchmark suite: ingest throughput and query latency per pipeline.
+
+Every scenario runs in its own fresh Python process (so peak RSS belongs to
+that scenario alone) against a synthetic corpus, with deterministic fake
+backends: FakeEmbeddingBackend for embeddings and StubStreamingLLM for
+generation. No API key or network is needed.
+
+Scenarios:
+  day04_list_store     Day 4's list of dicts: embed one text at a time, Python loop search
+  day04_vector_store   rag_core.VectorStore: batched embedding, one matrix product per query
+  day05_chunk_scan     Day 5: synthetic PDF -> stream chunks -> embed -> hybrid scan -> stub answer
+  day06_chroma         Day 6: content-hash bulk upsert into a Chroma collection, collection.query
+  day07_langchain      Day 7: PDF loader -> splitter -> Chroma.from_documents -> similarity_search
+
+Each scenario reports:
+  ingest: chunks, seconds, chunks_per_sec
+  query:  p50 / p95 / p99 / mean ms (embed query + search)
+  answer: p50 / p95 / p99 ms (query + prompt + stub generation), where the pipeline generates
+  peak_rss_mb
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --scenarios day05_chunk_scan day07_langchain --pages 400
+    python benchmarks/suite.py --output after.json --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from corpus import synthetic_documents, synthetic_pdf, synthetic_questions
+
+SCENARIOS = {}
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+# --- MEASUREMENT HELPERS ---
+def peak_rss_mb():
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS reports bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def percentiles(timings):
+    ms = np.asarray(timings) * 1000
+    return {"p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)), "mean_ms": float(ms.mean()), "count": int(ms.size)}
+
+
+def timed(func, inputs):
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - start)
+    return percentiles(timings)
+
+
+def ingest_stats(chunks, seconds):
+    return {"chunks": chunks, "seconds": seconds, "chunks_per_sec": chunks / seconds if seconds else 0.0}
+
+
+def fake_embedder(args):
+    from rag_core.embeddings import EmbeddingClient, FakeEmbeddingBackend
+
+    return EmbeddingClient(FakeEmbeddingBackend(dim=args.dim, latency=args.embed_latency))
+
+
+def fake_llm(args):
+    from rag_core.streaming import StubStreamingLLM
+
+    return StubStreamingLLM(delay=args.llm_delay)
+
+
+def fake_langchain_embeddings(args):
+    from langchain_core.embeddings import Embeddings
+
+    embedder = fake_embedder(args)
+
+    class FakeLangChainEmbeddings(Embeddings):
+        def embed_documents(self, texts):
+            return embedder.embed(texts).tolist()
+
+        def embed_query(self, text):
+            return embedder.embed_one(text).tolist()
+
+    return FakeLangChainEmbeddings()
+
+
+def corpus_pdf(args, workdir):
+    return synthetic_pdf(os.path.join(workdir, "corpus.pdf"), args.pages, seed=args.seed)
+
+
+# --- SCENARIOS ---
+@scenario
+def day04_list_store(args, workdir):
+    from bench_vector_store import loop_search
+
+    embedder = fake_embedder(args)
+    documents = synthetic_documents(args.docs, seed=args.seed)
+    start = time.perf_counter()
+    vector_store = [{"text": doc, "vector": embedder.embed_one(doc).tolist()} for doc in documents]
+    ingest = ingest_stats(len(vector_store), time.perf_counter() - start)
+
+    questions = synthetic_questions(args.queries)
+    query = timed(lambda q: loop_search(vector_store, embedder.embed_one(q), args.k), questions)
+    return {"ingest": ingest, "query": query}
+
+
+@scenario
+def day04_vector_store(args, workdir):
+    from rag_core import VectorStore
+
+    embedder = fake_embedder(args)
+    documents = synthetic_documents(args.docs, seed=args.seed)
+    start = time.perf_counter()
+    store = VectorStore(dim=args.dim)
+    store.add(embedder.embed(documents), documents)
+    ingest = ingest_stats(len(store), time.perf_counter() - start)
+
+    questions = synthetic_questions(args.queries)
+    query = timed(lambda q: store.search(embedder.embed_one(q), args.k), questions)
+    return {"ingest": ingest, "query": query}
+
+
+@scenario
+def day05_chunk_scan(args, workdir):
+    from rag_core.bm25 import BM25Index
+    from rag_core.chunking import iter_chunks, iter_pdf_pages
+    from rag_core.hybrid import HybridRetriever
+    from rag_core.vector_store import normalize_rows
+
+    embedder, llm = fake_embedder(args), fake_llm(args)
+    pdf = corpus_pdf(args, workdir)
+    start = time.perf_counter()
+    chunks, blocks = [], []
+    for batch, vectors in embedder.embed_stream(iter_chunks(iter_pdf_pages(pdf), 1000, 100)):
+        chunks.extend(batch)
+        blocks.append(vectors)
+    bm25 = BM25Index()
+    bm25.add(chunks)
+    retriever = HybridRetriever(normalize_rows(np.vstack(blocks)), chunks, bm25)
+    ingest = ingest_stats(len(chunks), time.perf_counter() - start)
+
+    def ask(question):
+        best = retriever.search(question, embedder.embed_one(question), k=1)[0]
+        return llm.invoke(f"Answer the question based ONLY on the context below.\n{best['text']}\n{question}")
+
+    questions = synthetic_questions(args.queries)
+    query = timed(lambda q: retriever.search(q, embedder.embed_one(q), args.k), questions)
+    return {"ingest": ingest, "query": query, "answer": timed(ask, questions)}
+
+
+@scenario
+def day06_chroma(args, workdir):
+    import chromadb
+    from rag_core.chroma_ingest import upsert_texts
+
+    embedder = fake_embedder(args)
+    documents = synthetic_documents(args.docs, seed=args.seed)
+    collection = chromadb.PersistentClient(path=os.path.join(workdir, "chroma_db")).get_or_create_collection(
+        name="bench")
+    start = time.perf_counter()
+    upsert_texts(collection, documents, embedder.embed)
+    ingest = ingest_stats(collection.count(), time.perf_counter() - start)
+
+    def search(question):
+        return collection.query(query_embeddings=[embedder.embed_one(question).tolist()], n_results=args.k)
+
+    return {"ingest": ingest, "query": timed(search, synthetic_questions(args.queries))}
+
+
+@scenario
+def day07_langchain(args, workdir):
+    from langchain_chroma import Chroma
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from rag_core.pdf_extract import load_pdf_documents
+
+    embeddings, llm = fake_langchain_embeddings(args), fake_llm(args)
+    pdf = corpus_pdf(args, workdir)
+    start = time.perf_counter()
+    docs = load_pdf_documents(pdf)
+    chunks = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100).split_documents(docs)
+    vector_store = Chroma.from_documents(documents=chunks, embedding=embeddings,
+                                         persist_directory=os.path.join(workdir, "chroma_db"))
+    ingest = ingest_stats(len(chunks), time.perf_counter() - start)
+
+    def ask(question):
+        context = "\n\n".join(doc.page_content for doc in vector_store.similarity_search(question, k=3))
+        return llm.invoke(f"Answer the question based ONLY on the following context:\n{context}\n{question}")
+
+    questions = synthetic_questions(args.queries)
+    query = timed(lambda q: vector_store.similarity_search(q, k=args.k), questions)
+    return {"ingest": ingest, "query": query, "answer": timed(ask, questions)}
+
+
+# --- RUNNER ---
+def run_child(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            result = SCENARIOS[args.child](args, workdir)
+        except ImportError as exc:
+            result = {"skipped": f"missing dependency: {exc.name or exc}"}
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def run_scenario(name, argv):
+    command = [sys.executable, os.path.abspath(__file__), "--child", name] + argv
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "failed"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def flatten(results):
+    flat = {}
+    for name, result in results.items():
+        for section, values in result.items():
+            if isinstance(values, dict):
+                for metric, value in values.items():
+                    flat[(name, f"{section}.{metric}")] = value
+            elif isinstance(values, (int, float)):
+                flat[(name, section)] = values
+    return flat
+
+
+def compare(baseline, current):
+    old, new = flatten(baseline["results"]), flatten(current["results"])
+    print(f"\n{'scenario':<20} | {'metric':<22} | {'baseline':>11} | {'current':>11} | {'change':>8}")
+    print("-" * 84)
+    for key in sorted(old.keys() & new.keys()):
+        name, metric = key
+        if metric.endswith(".count") or metric.endswith(".chunks"):
+            continue
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{name:<20} | {metric:<22} | {old[key]:>11.2f} | {new[key]:>11.2f} | {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--docs", type=int, default=2000, help="documents for the text scenarios")
+    parser.add_argument("--pages", type=int, default=200, help="pages of the synthetic PDF")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="fake seconds per embedding request")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="fake seconds per generated token")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report to diff against")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    params = {k: v for k, v in vars(args).items() if k not in ("scenarios", "output", "compare", "child")}
+    argv = [arg for key, value in params.items() for arg in (f"--{key.replace('_', '-')}", str(value))]
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": {},
+    }
+    for name in args.scenarios:
+        print(f"Running {name}...", file=sys.stderr)
+        report["results"][name] = run_scenario(name, argv)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Shared building blocks for the 100 Days of RAG scripts.
+
+Each day's script stays self-contained, but anything that several days need
+(vector math, storage, embedding plumbing) lives here so it is written once.
+Scripts add the repo root to sys.path and import from `rag_core`.
+
+Importing the package is free: the names below are loaded on first access,
+so `from rag_core.tracing import tracer` does not pull in numpy. Third-party
+backends (Chroma, Gemini, LangChain) are only imported through
+`rag_core.backends`, when a script selects them.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "VectorStore": "rag_core.vector_store",
+    "normalize_rows": "rag_core.vector_store",
+    "top_k": "rag_core.vector_store",
+    "top_k_rows": "rag_core.vector_store",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'rag_core' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
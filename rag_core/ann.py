@@ -0,0 +1,213 @@
+"""
+🧩 Approximate Nearest Neighbours (IVF Index)
+
+The Goal: Search millions of vectors without scoring every single one.
+
+The Algorithm: Inverted File (IVF) with a coarse quantizer.
+1. Train: Run k-means on a sample to find `n_lists` centroids. Each centroid
+   owns one "inverted list" (a bucket of nearby vectors). Call
+   `train(sample)`, or just `add()`: rows are buffered (and searched
+   exactly) until `train_size` of them (~39 per list) are in.
+2. Insert: Each new vector goes into the bucket of its nearest centroid.
+   Inserts are incremental; no rebuild needed.
+3. Search: Score the query against the centroids only, open the `nprobe`
+   best buckets, and score exactly the vectors inside them.
+
+`nprobe` is the speed/recall dial: nprobe = n_lists is brute force,
+nprobe = 1 scans roughly 1/n_lists of the corpus.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from rag_core.vector_store import normalize_rows, top_k
+
+_BLOCK = 65_536  # Rows assigned per matrix product, to bound temporary memory
+MIN_POINTS_PER_LIST = 39  # Fewer training points per centroid and k-means buckets come out lopsided
+
+
+def _assign(vectors, centroids):
+    labels = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], _BLOCK):
+        labels[start:start + _BLOCK] = np.argmax(vectors[start:start + _BLOCK] @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=20, seed=0):
+    # k-means on unit vectors, using cosine similarity as the distance
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=n_clusters)
+        # Re-seed empty clusters with random points so no bucket is wasted
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class _InvertedList:
+    """One bucket: a growable contiguous block of vectors plus their row numbers."""
+
+    def __init__(self, dim):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.size = 0
+
+    def extend(self, vectors, rows):
+        needed = self.size + len(rows)
+        if needed > self.rows.shape[0]:
+            capacity = max(needed, 2 * self.rows.shape[0], 16)
+            grown = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            grown_rows = np.empty(capacity, dtype=np.int64)
+            grown_rows[:self.size] = self.rows[:self.size]
+            self.vectors, self.rows = grown, grown_rows
+        self.vectors[self.size:needed] = vectors
+        self.rows[self.size:needed] = rows
+        self.size = needed
+
+
+class IVFIndex:
+    """Approximate cosine search with the same `add` / `search` API as VectorStore."""
+
+    def __init__(self, dim, n_lists=256, nprobe=8, seed=0, train_size=None):
+        self.dim = dim
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.seed = seed
+        self.train_size = max(train_size or n_lists * MIN_POINTS_PER_LIST, n_lists)
+        self.centroids = None
+        self.lists = []
+        self._pending = _InvertedList(dim)  # Rows added before training, assigned once it happens
+        self.texts = []
+        self.ids = []
+
+    def __len__(self):
+        return len(self.texts)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def train(self, vectors, sample_size=None):
+        """Fits the centroids on `vectors` (at least `train_size` rows) and re-files every row already added."""
+        vectors = normalize_rows(vectors)
+        if vectors.shape[0] < self.train_size:
+            raise ValueError(f"Need at least {self.train_size} training vectors for {self.n_lists} lists, "
+                             f"got {vectors.shape[0]}.")
+        # ~64 points per centroid is plenty for k-means to settle
+        sample_size = sample_size or self.n_lists * 64
+        if vectors.shape[0] > sample_size:
+            rng = np.random.default_rng(self.seed)
+            vectors = vectors[rng.choice(vectors.shape[0], sample_size, replace=False)]
+        self.centroids = spherical_kmeans(vectors, self.n_lists, seed=self.seed)
+        # Buffered rows, or on a re-train every bucket, move to their nearest new centroid
+        old = self.lists + [self._pending]
+        self.lists = [_InvertedList(self.dim) for _ in range(self.n_lists)]
+        self._pending = _InvertedList(self.dim)
+        for bucket in old:
+            if bucket.size:
+                self._insert(bucket.vectors[:bucket.size], bucket.rows[:bucket.size])
+
+    def add(self, vectors, texts, ids=None):
+        vectors = normalize_rows(vectors)
+        texts = list(texts)
+        if len(texts) != vectors.shape[0]:
+            raise ValueError(f"Got {vectors.shape[0]} vectors but {len(texts)} texts.")
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}.")
+        start = len(self.texts)
+        if ids is None:
+            ids = [str(i) for i in range(start, start + len(texts))]
+        ids = list(ids)
+        if len(ids) != len(texts):
+            raise ValueError(f"Got {len(texts)} texts but {len(ids)} ids.")
+
+        rows = np.arange(start, start + len(texts))
+        if self.is_trained:
+            self._insert(vectors, rows)
+        else:
+            self._pending.extend(vectors, rows)
+        self.texts.extend(texts)
+        self.ids.extend(str(i) for i in ids)
+        if not self.is_trained and self._pending.size >= self.train_size:
+            self.train(self._pending.vectors[:self._pending.size])
+        return ids
+
+    def _insert(self, vectors, rows):
+        labels = _assign(vectors, self.centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(self.n_lists + 1))
+        for list_no in range(self.n_lists):
+            members = order[bounds[list_no]:bounds[list_no + 1]]
+            if members.size:
+                self.lists[list_no].extend(vectors[members], rows[members])
+
+    def search(self, query, k=3, nprobe=None):
+        if not self.texts:
+            return []
+        query = normalize_rows(query)[0]
+        if self.is_trained:
+            nprobe = min(nprobe or self.nprobe, self.n_lists)
+            buckets = [self.lists[list_no] for list_no in top_k(self.centroids @ query, nprobe)]
+        else:
+            buckets = [self._pending]  # Too few rows to train on yet: exact search
+
+        scores, rows = [], []
+        for bucket in buckets:
+            if bucket.size:
+                scores.append(bucket.vectors[:bucket.size] @ query)
+                rows.append(bucket.rows[:bucket.size])
+        if not scores:
+            return []
+        scores = np.concatenate(scores)
+        rows = np.concatenate(rows)
+        return [
+            {"id": self.ids[rows[i]], "text": self.texts[rows[i]], "score": float(scores[i])}
+            for i in top_k(scores, k)
+        ]
+
+    # --- PERSISTENCE ---
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        # Untrained: the buffered rows are saved as a single bucket, and there are no centroids
+        buckets = self.lists if self.is_trained else [self._pending]
+        state = {
+            "sizes": np.array([bucket.size for bucket in buckets], dtype=np.int64),
+            "vectors": np.concatenate([b.vectors[:b.size] for b in buckets]),
+            "rows": np.concatenate([b.rows[:b.size] for b in buckets]),
+        }
+        if self.is_trained:
+            state["centroids"] = self.centroids
+        np.savez(os.path.join(directory, "ivf.npz"), **state)
+        with open(os.path.join(directory, "payload.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "n_lists": self.n_lists, "nprobe": self.nprobe, "seed": self.seed,
+                       "train_size": self.train_size, "texts": self.texts, "ids": self.ids}, f)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "payload.json"), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        data = np.load(os.path.join(directory, "ivf.npz"))
+        trained = "centroids" in data
+        n_lists = payload.get("n_lists") or data["centroids"].shape[0]
+        index = cls(payload["dim"], n_lists=n_lists, nprobe=payload["nprobe"], seed=payload["seed"],
+                    train_size=payload.get("train_size"))
+        if trained:
+            index.centroids = data["centroids"]
+            index.lists = [_InvertedList(index.dim) for _ in range(index.n_lists)]
+        offsets = np.concatenate([[0], np.cumsum(data["sizes"])])
+        vectors, rows = data["vectors"], data["rows"]
+        for list_no, bucket in enumerate(index.lists if trained else [index._pending]):
+            lo, hi = offsets[list_no], offsets[list_no + 1]
+            bucket.vectors, bucket.rows, bucket.size = vectors[lo:hi].copy(), rows[lo:hi].copy(), int(hi - lo)
+        index.texts = payload["texts"]
+        index.ids = payload["ids"]
+        return index
@@ -0,0 +1,116 @@
+"""
+🧩 Semantic Answer Cache
+
+The Goal: Answer "How do I pay on Mars?" and "What's the money on Mars?"
+with one LLM call, not two.
+
+The Algorithm:
+1. Key: The query's embedding plus the version of the document collection
+   it was answered against (e.g. the PDF's content hash).
+2. Lookup: Cosine similarity between the new query and every cached query
+   of the same version (one matrix-vector product). If the best score is
+   above `threshold`, return the stored answer and its source chunks.
+3. Expiry: Entries older than `ttl_seconds` are dropped; when the cache is
+   full the least recently used entry is evicted.
+4. Invalidation: A changed collection gets a new version, so old answers
+   can no longer match. `invalidate(version)` drops them eagerly.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from rag_core.vector_store import normalize_rows
+
+
+class SemanticAnswerCache:
+    """Returns stored answers for near-duplicate questions against the same collection version."""
+
+    def __init__(self, threshold=0.95, ttl_seconds=3600, max_entries=1000, clock=time.monotonic):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._clock = clock
+        self._entries = OrderedDict()  # entry id -> dict, oldest use first
+        self._next_id = 0
+        self._matrices = {}  # version -> (entry ids, stacked query vectors)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        self._matrices.pop(entry["version"], None)
+
+    def _expire(self, now):
+        expired = [eid for eid, e in self._entries.items() if now - e["created"] > self.ttl_seconds]
+        for entry_id in expired:
+            self._drop(entry_id)
+        self.expirations += len(expired)
+
+    def _matrix(self, version):
+        if version not in self._matrices:
+            ids = [eid for eid, e in self._entries.items() if e["version"] == version]
+            vectors = np.vstack([self._entries[eid]["vector"] for eid in ids]) if ids else None
+            self._matrices[version] = (ids, vectors)
+        return self._matrices[version]
+
+    def lookup(self, query_vec, version):
+        """Returns {"answer", "sources", "score"} on a hit, else None."""
+        query = normalize_rows(query_vec)[0]
+        with self._lock:
+            self._expire(self._clock())
+            ids, vectors = self._matrix(version)
+            if vectors is not None:
+                scores = vectors @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    entry = self._entries[entry_id]
+                    return {"answer": entry["answer"], "sources": entry["sources"], "score": float(scores[best])}
+            self.misses += 1
+            return None
+
+    def store(self, query_vec, version, answer, sources=()):
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "vector": normalize_rows(query_vec)[0],
+                "version": version,
+                "answer": answer,
+                "sources": list(sources),
+                "created": self._clock(),
+            }
+            self._matrices.pop(version, None)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, version=None):
+        """Drops every entry for `version` (or everything if version is None)."""
+        with self._lock:
+            stale = [eid for eid, e in self._entries.items() if version is None or e["version"] == version]
+            for entry_id in stale:
+                self._drop(entry_id)
+            return len(stale)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,29 @@
+"""
+🧩 Atomic Writes (No Half-Written Files)
+
+The Goal: A crash, Ctrl+C or full disk in the middle of a save must never
+leave a truncated manifest, matrix or index behind for the next run to load.
+
+The Algorithm: Temp File + Rename.
+1. Write: The content goes to `<path>.tmp`, next to the target.
+2. Flush: It is fsync'ed, so the bytes are on disk before the rename.
+3. Swap: `os.replace` renames it over `<path>` in one step: readers see the
+   old file or the new one, never a mix.
+"""
+
+import json
+import os
+
+
+def write_atomic(path, write, binary=True):
+    """Calls `write(f)` on a temp file, then renames it to `path`."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb" if binary else "w", encoding=None if binary else "utf-8") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def write_json_atomic(path, payload, indent=None):
+    write_atomic(path, lambda f: json.dump(payload, f, indent=indent), binary=False)
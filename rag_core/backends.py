@@ -0,0 +1,120 @@
+"""
+🧩 Backend Adapters (Pay for a Backend Only When You Use It)
+
+The Goal: Start fast. On one core, `import langchain_chroma` takes ~3.6 s,
+`chromadb` ~2.5 s and `langchain_text_splitters` ~0.8 s. When Days 6-9
+import them at the top, every script run, Streamlit cold start and
+autoscaled service worker pays that before doing any work, even on paths
+that never touch them (a stubbed LLM, an unchanged corpus, an empty chat).
+
+The Algorithm: Light Core + Lazy Adapters.
+1. Core: Chunking, vector math, context packing, prompt assembly and
+   tracing (the rest of rag_core) need only the standard library + numpy,
+   and `import rag_core` itself loads nothing until a name is used.
+2. Adapters: Every third-party backend sits behind a factory below that
+   imports it INSIDE the function, so nothing is loaded until the factory
+   is called.
+3. Select: `create(kind, name, ...)` picks a factory from BACKENDS by name
+   (e.g. RAG_SESSION_STORE=memory), so a backend that is not selected is
+   never imported.
+
+`python benchmarks/bench_import_time.py` tracks the import cost of every
+entry point (Day scripts, the service) and of each backend.
+"""
+
+
+# --- EMBEDDINGS ---
+def gemini_embeddings(model, api_key=None, cache=None):
+    """LangChain Gemini embeddings, served through an EmbeddingCache when `cache` is given."""
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    embeddings = GoogleGenerativeAIEmbeddings(model=model, google_api_key=api_key)
+    if cache is None:
+        return embeddings
+    from rag_core.langchain_embeddings import CachedEmbeddings
+
+    return CachedEmbeddings(embeddings, cache, model_name=model)
+
+
+# --- LLMS ---
+def gemini_chat(model, api_key=None, temperature=None):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    kwargs = {} if temperature is None else {"temperature": temperature}
+    return ChatGoogleGenerativeAI(model=model, google_api_key=api_key, **kwargs)
+
+
+def stub_chat(model=None, api_key=None, temperature=None, delay=0.05):
+    """Offline stand-in for `gemini_chat` (same signature, no network, no heavy imports)."""
+    from rag_core.streaming import StubStreamingLLM
+
+    return StubStreamingLLM(delay=delay)
+
+
+def stuff_documents_chain(llm, prompt):
+    from langchain.chains.combine_documents import create_stuff_documents_chain
+
+    return create_stuff_documents_chain(llm, prompt)
+
+
+# --- TEXT SPLITTING ---
+def text_splitter(chunk_size=800, chunk_overlap=100, add_start_index=True):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                          add_start_index=add_start_index)
+
+
+def document_splitter(chunk_size=800, chunk_overlap=100, add_start_index=True):
+    """`split_documents` callable that builds the splitter on its first call (never, if nothing changed)."""
+    splitter = []
+
+    def split_documents(documents):
+        if not splitter:
+            splitter.append(text_splitter(chunk_size, chunk_overlap, add_start_index))
+        return splitter[0].split_documents(documents)
+
+    return split_documents
+
+
+# --- VECTOR STORES ---
+def chroma_collection(path, name):
+    """Raw chromadb collection in a persistent client at `path` (Day 6)."""
+    import chromadb
+
+    return chromadb.PersistentClient(path=path).get_or_create_collection(name=name)
+
+
+def chroma_store(embedding, persist_directory=None):
+    """LangChain Chroma store (persistent when `persist_directory` is set)."""
+    from langchain_chroma import Chroma
+
+    return Chroma(embedding_function=embedding, persist_directory=persist_directory)
+
+
+def chroma_from_documents(documents, embedding):
+    from langchain_chroma import Chroma
+
+    return Chroma.from_documents(documents, embedding)
+
+
+def memory_from_documents(documents, embedding):
+    """Per-session store without chromadb: LangChain's InMemoryVectorStore (exact search)."""
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    return InMemoryVectorStore.from_documents(documents, embedding)
+
+
+# --- SELECTION ---
+BACKENDS = {
+    "llm": {"gemini": gemini_chat, "stub": stub_chat},
+    "session_store": {"chroma": chroma_from_documents, "memory": memory_from_documents},
+}
+
+
+def create(kind, name, *args, **kwargs):
+    """Builds the `name` backend of `kind`; only that backend's packages get imported."""
+    choices = BACKENDS.get(kind, {})
+    if name not in choices:
+        raise ValueError(f"Unknown {kind} backend {name!r}; choose from {sorted(choices)}.")
+    return choices[name](*args, **kwargs)
@@ -0,0 +1,45 @@
+"""
+🧩 Batched Multi-Query Search (Evaluation Sets, Query Logs, Re-Ranking Runs)
+
+The Goal: Answer thousands of questions at once without paying one embedding
+request, one Python loop iteration and one pass over the store per question.
+
+The Algorithm: Batch -> Embed Once -> Score Once.
+1. Batch: The questions are cut into batches of `batch_size`.
+2. Embed: Each batch is ONE `embed(texts)` call (EmbeddingClient.embed
+   already splits it into API-sized requests and sends them in parallel).
+3. Score: The in-house store scores the whole batch with
+   `VectorStore.search_many` (blocked matrix-matrix products + row-wise
+   top-k); Chroma gets ONE `collection.query(query_embeddings=batch)` call.
+4. Stream: Results are yielded batch by batch, so memory is bounded by
+   `batch_size`, not by the number of questions.
+"""
+
+from rag_core.chroma_ingest import batches
+
+DEFAULT_QUERY_BATCH = 1000
+
+
+def search_texts(store, texts, embed, k=3, where=None, batch_size=DEFAULT_QUERY_BATCH):
+    """
+    Yields `store.search` results for every text, in order.
+    `embed` maps a list of texts to a matrix of vectors (e.g. EmbeddingClient.embed).
+    """
+    for batch in batches(list(texts), batch_size):
+        yield from store.search_many(embed(batch), k, where=where)
+
+
+def chroma_search_texts(collection, texts, embed, k=3, where=None, batch_size=DEFAULT_QUERY_BATCH):
+    """
+    Same as `search_texts` for a Chroma collection: one embed call and one
+    `query` call per batch. Yields {"ids", "documents", "metadatas", "distances"}
+    per text (closest first, Chroma distances: lower is better).
+    """
+    fields = ("ids", "documents", "metadatas", "distances")
+    for batch in batches(list(texts), batch_size):
+        vectors = embed(batch)
+        vectors = vectors.tolist() if hasattr(vectors, "tolist") else [list(v) for v in vectors]
+        response = collection.query(query_embeddings=vectors, n_results=k, where=where,
+                                    include=["documents", "metadatas", "distances"])
+        for i in range(len(batch)):
+            yield {field: response[field][i] for field in fields}
@@ -0,0 +1,131 @@
+"""
+🧩 The Inverted Index (BM25 Keyword Search)
+
+The Goal: Find chunks by exact terms like part numbers, "Red-Credits" or
+"Aero-2000". Embeddings often blur or miss these.
+
+The Algorithm: Okapi BM25 over an inverted index.
+1. Tokenize: Lowercase words. Hyphenated names are kept whole ("aero-2000")
+   AND split into parts ("aero", "2000"), so both spellings match.
+2. Index: For every term, keep a posting list of (chunk number, count).
+3. Score: Only chunks that contain a query term are touched.
+   score = sum over query terms of
+           idf(term) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg_len))
+"""
+
+import json
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from rag_core.vector_store import top_k
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_][a-z0-9]+)*")
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        if "-" in token or "_" in token:
+            tokens.extend(re.split(r"[-_]", token))
+    return tokens
+
+
+class BM25Index:
+    """Incrementally built BM25 index over a list of chunks (chunk number = row)."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = []
+        self._pending = defaultdict(list)  # term -> [(row, tf), ...] not yet packed
+        self._postings = {}  # term -> (rows int32 array, tf float32 array)
+        self._lengths = None  # doc_lengths as an array, rebuilt after adds
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, texts):
+        self._lengths = None
+        for text in texts:
+            row = len(self.doc_lengths)
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self._pending[term].append((row, tf))
+
+    def _pack(self):
+        # Fold pending postings into compact NumPy arrays (done lazily, once per batch of adds)
+        for term, entries in self._pending.items():
+            rows = np.array([r for r, _ in entries], dtype=np.int32)
+            tfs = np.array([t for _, t in entries], dtype=np.float32)
+            if term in self._postings:
+                old_rows, old_tfs = self._postings[term]
+                rows, tfs = np.concatenate([old_rows, rows]), np.concatenate([old_tfs, tfs])
+            self._postings[term] = (rows, tfs)
+        self._pending.clear()
+
+    def _term_scores(self, query):
+        if self._pending:
+            self._pack()
+        if self._lengths is None:
+            self._lengths = np.asarray(self.doc_lengths, dtype=np.float32)
+            self._avg_len = max(float(self._lengths.mean()), 1e-9) if self.doc_lengths else 1.0
+        n = len(self.doc_lengths)
+        lengths, avg_len = self._lengths, self._avg_len
+        for term in set(tokenize(query)):
+            if term not in self._postings:
+                continue
+            rows, tfs = self._postings[term]
+            idf = np.log(1.0 + (n - rows.size + 0.5) / (rows.size + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / avg_len)
+            yield rows, idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+    def scores(self, query):
+        """Dense array of BM25 scores, one per chunk (0 where no term matches)."""
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        for rows, term_scores in self._term_scores(query):
+            np.add.at(scores, rows, term_scores)
+        return scores
+
+    def search(self, query, k=10):
+        """Returns (rows, scores) of the k best lexical matches, best first."""
+        parts = list(self._term_scores(query))
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        # Sum per-term scores per chunk, touching only the matched postings
+        rows, inverse = np.unique(np.concatenate([r for r, _ in parts]), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate([s for _, s in parts])).astype(np.float32)
+        best = top_k(totals, k)
+        return rows[best].astype(np.int64), totals[best]
+
+    # --- PERSISTENCE (stored next to the embeddings) ---
+    def save(self, path):
+        if self._pending:
+            self._pack()
+        terms = list(self._postings)
+        sizes = np.array([self._postings[t][0].size for t in terms], dtype=np.int64)
+        np.savez(
+            path,
+            params=np.array([self.k1, self.b]),
+            doc_lengths=np.asarray(self.doc_lengths, dtype=np.int32),
+            sizes=sizes,
+            rows=np.concatenate([self._postings[t][0] for t in terms]) if terms else np.empty(0, np.int32),
+            tfs=np.concatenate([self._postings[t][1] for t in terms]) if terms else np.empty(0, np.float32),
+            terms=np.frombuffer(json.dumps(terms).encode("utf-8"), dtype=np.uint8),
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        k1, b = data["params"].tolist()
+        index = cls(k1=k1, b=b)
+        index.doc_lengths = data["doc_lengths"].tolist()
+        terms = json.loads(data["terms"].tobytes().decode("utf-8"))
+        offsets = np.concatenate([[0], np.cumsum(data["sizes"])])
+        rows, tfs = data["rows"], data["tfs"]
+        for i, term in enumerate(terms):
+            index._postings[term] = (rows[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]])
+        return index
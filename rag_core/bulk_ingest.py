@@ -0,0 +1,382 @@
+"""
+🧩 Bulk Ingestion (Whole Directories, Resumable)
+
+The Goal: Index a directory tree with tens of thousands of PDFs and text
+files in one run, using every core, and pick up where an interrupted run
+stopped instead of starting over.
+
+The Algorithm: A Three-Stage Pipeline Joined by Bounded Queues.
+1. Walk: Every .pdf / .txt / .md file under the root, in a stable order.
+   Files already in the checkpoint (same size + mtime) are skipped.
+2. Extract + Chunk (process pool): Each worker parses one file and cuts
+   every page into sliding-window chunks (chunking.py). At most
+   `2 x workers` files are in flight.
+3. Embed (thread): Chunks of many small files are packed into full API
+   batches (EmbeddingClient keeps several requests in flight). The queues
+   between stages are bounded: when embedding is the bottleneck they fill
+   up and extraction pauses (backpressure), so memory stays flat.
+4. Write (main thread): Vectors are buffered and appended to a SegmentStore
+   in large batches. A file is added to `checkpoint.jsonl` only after ALL
+   its chunks are committed. Chunk IDs are "<hash of path>-<page>-<n>", so
+   before a file's first chunks are written, every row the store already
+   holds for that path (a half-written earlier attempt, or an older,
+   longer version of the file) is tombstoned.
+5. Report: Items, busy seconds and throughput for every stage.
+
+    python -m rag_core.bulk_ingest ./corpus --store ./corpus_index
+    python -m rag_core.bulk_ingest ./corpus --store ./corpus_index --stub --workers 8
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from rag_core.chroma_ingest import content_id
+from rag_core.chunking import iter_chunks
+from rag_core.segment_store import SegmentStore
+
+EXTENSIONS = (".pdf", ".txt", ".md")
+CHECKPOINT = "checkpoint.jsonl"
+_DONE = object()
+
+
+# --- STAGE 1: WALK ---
+def find_files(root, extensions=EXTENSIONS):
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(extensions):
+                yield os.path.join(directory, name)
+
+
+def file_signature(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class Checkpoint:
+    """Append-only JSONL of finished files: {"path", "signature", "chunks"}."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # A torn last line from a crash
+                    self.done[record["path"]] = record["signature"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, path, signature):
+        return self.done.get(path) == signature
+
+    def mark(self, records):
+        for record in records:
+            self._file.write(json.dumps(record) + "\n")
+            self.done[record["path"]] = record["signature"]
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+# --- STAGE 2: EXTRACT + CHUNK (worker process) ---
+def _read_pages(path):
+    if path.lower().endswith(".pdf"):
+        from pypdf import PdfReader
+
+        return [page.extract_text() or "" for page in PdfReader(path).pages]
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [f.read()]
+
+
+def source_key(path):
+    return content_id(path)
+
+
+def extract_and_chunk(path, chunk_size=1000, overlap=100):
+    """Returns (texts, metadatas, ids, seconds) for one file."""
+    start = time.perf_counter()
+    texts, metadatas, ids = [], [], []
+    key = source_key(path)
+    for page, text in enumerate(_read_pages(path)):
+        for number, chunk in enumerate(iter_chunks(text, chunk_size, overlap)):
+            if chunk.strip():
+                texts.append(chunk)
+                metadatas.append({"source": path, "page": page})
+                ids.append(f"{key}-{page}-{number}")
+    return texts, metadatas, ids, time.perf_counter() - start
+
+
+# --- THE PIPELINE ---
+class BulkIngestor:
+    """Walk -> extract/chunk (processes) -> embed (thread) -> write (batched) with a checkpoint."""
+
+    def __init__(self, store, embedder, checkpoint_path, workers=None, chunk_size=1000, overlap=100,
+                 queue_size=8, embed_group=None, write_batch=5000, progress=None):
+        self.store = store
+        self.embedder = embedder
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.queue_size = queue_size
+        # Enough chunks to keep every embedding request slot busy
+        batch_size = getattr(embedder, "batch_size", 100)
+        self.embed_group = embed_group or batch_size * getattr(embedder, "max_in_flight", 1)
+        self.write_batch = write_batch
+        self.progress = progress
+        self.stats = {stage: {"items": 0, "seconds": 0.0} for stage in ("extract", "embed", "write")}
+        self.counts = {"files": 0, "skipped": 0, "failed": 0, "chunks": 0}
+        self.failures = []  # (path, error)
+        self._stop = threading.Event()
+        self._errors = []
+        self._previous = {}  # source key -> IDs stored before this run, for files not yet rewritten
+
+    def _put(self, q, item):
+        # Blocks while the queue is full (backpressure), but gives up if another stage died
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _extract(self, files, chunk_queue):
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = {}
+                for path in files:
+                    if self._stop.is_set():
+                        break
+                    signature = file_signature(path)
+                    if self.checkpoint.is_done(path, signature):
+                        self.counts["skipped"] += 1
+                        continue
+                    future = pool.submit(extract_and_chunk, path, self.chunk_size, self.overlap)
+                    pending[future] = (path, signature)
+                    if len(pending) >= 2 * self.workers:
+                        self._collect(pending, chunk_queue, FIRST_COMPLETED)
+                if self._stop.is_set():
+                    pool.shutdown(cancel_futures=True)
+                else:
+                    self._collect(pending, chunk_queue, ALL_COMPLETED)
+        except BaseException as exc:
+            self._errors.append(exc)
+            self._stop.set()
+        finally:
+            self._put(chunk_queue, _DONE)
+
+    def _collect(self, pending, chunk_queue, return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            path, signature = pending.pop(future)
+            try:
+                texts, metadatas, ids, seconds = future.result()
+            except Exception as exc:
+                # A broken file should not stop the run; it is retried next time
+                self.failures.append((path, f"{type(exc).__name__}: {exc}"))
+                self.counts["failed"] += 1
+                continue
+            self.stats["extract"]["items"] += 1
+            self.stats["extract"]["seconds"] += seconds
+            self._put(chunk_queue, {"path": path, "signature": signature, "texts": texts,
+                                    "metadatas": metadatas, "ids": ids})
+
+    def _embed(self, chunk_queue, write_queue):
+        try:
+            rows, finished = [], False  # rows: (file, chunk index)
+            while not finished:
+                # Wait for one file, then take whatever else is already queued (up to a full group)
+                item = self._get(chunk_queue)
+                while item is not _DONE:
+                    if not item["texts"]:
+                        self._put(write_queue, ([], None, [item]))
+                    rows.extend((item, i) for i in range(len(item["texts"])))
+                    if len(rows) >= self.embed_group:
+                        break
+                    try:
+                        item = chunk_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                finished = item is _DONE
+                # Embed full groups; a partial one only if nothing else is waiting
+                while rows and not self._stop.is_set() and (
+                        len(rows) >= self.embed_group or finished or chunk_queue.empty()):
+                    group, rows = rows[:self.embed_group], rows[self.embed_group:]
+                    start = time.perf_counter()
+                    vectors = self.embedder.embed([item["texts"][i] for item, i in group])
+                    self.stats["embed"]["seconds"] += time.perf_counter() - start
+                    self.stats["embed"]["items"] += len(group)
+                    self._put(write_queue, (group, vectors, []))
+        except BaseException as exc:
+            self._errors.append(exc)
+            self._stop.set()
+        finally:
+            self._put(write_queue, _DONE)
+
+    def _clear(self, paths):
+        # Whatever an earlier run left for these files goes, before their new chunks are written
+        stale = [chunk_id for path in paths for chunk_id in self._previous.pop(source_key(path), ())]
+        if stale:
+            self.store.delete(stale)
+
+    def _flush(self, buffer, written):
+        rows = [row for group, _ in buffer for row in group]
+        start = time.perf_counter()
+        if rows:
+            ids = [item["ids"][i] for item, i in rows]
+            self._clear({item["path"] for item, _ in rows})
+            self.store.add(np.vstack([vectors for _, vectors in buffer]), [item["texts"][i] for item, i in rows],
+                           ids=ids, metadatas=[item["metadatas"][i] for item, i in rows])
+        finished = []
+        for item, _ in rows:
+            written[item["path"]] = written.get(item["path"], 0) + 1
+            if written[item["path"]] == len(item["texts"]):
+                finished.append(item)
+        self._finish(finished, written)
+        self.stats["write"]["seconds"] += time.perf_counter() - start
+        self.stats["write"]["items"] += len(rows)
+
+    def _finish(self, items, written):
+        if not items:
+            return
+        self.checkpoint.mark([{"path": item["path"], "signature": item["signature"], "chunks": len(item["texts"])}
+                              for item in items])
+        for item in items:
+            written.pop(item["path"], None)
+        self.counts["files"] += len(items)
+        self.counts["chunks"] += sum(len(item["texts"]) for item in items)
+        if self.progress:
+            self.progress(self.counts)
+
+    def run(self, root):
+        start = time.perf_counter()
+        self._previous = {}
+        for chunk_id in self.store.ids():
+            self._previous.setdefault(chunk_id.split("-", 1)[0], []).append(chunk_id)
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._extract, args=(find_files(root), chunk_queue), name="extract", daemon=True),
+            threading.Thread(target=self._embed, args=(chunk_queue, write_queue), name="embed", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        buffer, buffered, written = [], 0, {}
+        try:
+            while True:
+                message = self._get(write_queue)
+                if message is _DONE:
+                    break
+                group, vectors, empty_files = message
+                self._clear(item["path"] for item in empty_files)
+                self._finish(empty_files, written)
+                if group:
+                    buffer.append((group, vectors))
+                    buffered += len(group)
+                if buffered >= self.write_batch:
+                    self._flush(buffer, written)
+                    buffer, buffered = [], 0
+            if not self._errors:
+                self._flush(buffer, written)
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.checkpoint.close()
+        if self._errors:
+            raise self._errors[0]
+        return self.report(time.perf_counter() - start)
+
+    def report(self, wall):
+        stages = {
+            stage: dict(values, per_second=values["items"] / values["seconds"] if values["seconds"] else 0.0)
+            for stage, values in self.stats.items()
+        }
+        return {"wall_seconds": wall, "stages": stages, **self.counts,
+                "chunks_per_second": self.counts["chunks"] / wall if wall else 0.0, "failures": self.failures}
+
+
+def format_report(report):
+    # Busy seconds of "extract" are summed over all worker processes
+    lines = [f"{'stage':>8} | {'items':>9} | {'unit':>6} | {'busy s':>8} | {'items/s':>10}", "-" * 53]
+    for stage, values in report["stages"].items():
+        unit = "files" if stage == "extract" else "chunks"
+        lines.append(f"{stage:>8} | {values['items']:>9} | {unit:>6} | {values['seconds']:>8.2f} | "
+                     f"{values['per_second']:>10.1f}")
+    lines.append(f"\n{report['files']} files ({report['skipped']} already done, {report['failed']} failed), "
+                 f"{report['chunks']} chunks in {report['wall_seconds']:.1f}s "
+                 f"-> {report['chunks_per_second']:.1f} chunks/s end to end")
+    for path, error in report["failures"]:
+        lines.append(f"  failed: {path} ({error})")
+    return "\n".join(lines)
+
+
+# --- EXECUTION ---
+def main():
+    parser = argparse.ArgumentParser(description="Parallel, resumable ingestion of a directory of PDFs / text files.")
+    parser.add_argument("root", help="directory to walk")
+    parser.add_argument("--store", required=True, help="SegmentStore directory (created if missing)")
+    parser.add_argument("--stub", action="store_true", help="Offline fake embedder")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--queue-size", type=int, default=8, help="max items waiting between two stages")
+    parser.add_argument("--write-batch", type=int, default=5000, help="chunks per store append")
+    args = parser.parse_args()
+
+    from rag_core.embeddings import EmbeddingClient, FakeEmbeddingBackend, GeminiEmbeddingBackend
+
+    if args.stub:
+        embedder = EmbeddingClient(FakeEmbeddingBackend())
+    else:
+        from dotenv import load_dotenv
+
+        from rag_core.embedding_cache import EmbeddingCache
+
+        load_dotenv(dotenv_path=".env")
+        embedder = EmbeddingClient(GeminiEmbeddingBackend(api_key=os.getenv("GEMINI_API_KEY")), cache=EmbeddingCache())
+
+    os.makedirs(args.store, exist_ok=True)
+    store = SegmentStore(args.store)
+    ingestor = BulkIngestor(
+        store, embedder, os.path.join(args.store, CHECKPOINT), workers=args.workers,
+        chunk_size=args.chunk_size, overlap=args.overlap, queue_size=args.queue_size, write_batch=args.write_batch,
+        progress=lambda c: print(f"\r{c['files']} files, {c['chunks']} chunks", end="", file=sys.stderr),
+    )
+    try:
+        report = ingestor.run(args.root)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Finished files are checkpointed; run the same command again to resume.",
+              file=sys.stderr)
+        return
+    finally:
+        store.close()
+    print("", file=sys.stderr)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+🧩 Bulk, Idempotent Chroma Ingestion
+
+The Goal: Re-running ingestion on a changed corpus should only pay for what changed.
+
+The Algorithm: Content-Hash IDs + Diff + Bulk Upsert.
+1. ID: Every chunk's ID is the hash of its (normalized) text, so the same
+   text always gets the same ID, on every run and every machine.
+2. Diff: Ask Chroma which of those IDs it already has (a few bulk `get` calls).
+3. Embed: Only the new/changed chunks are embedded (in API-sized batches).
+4. Write: Upsert in large batches instead of one `add` per document.
+5. Prune (optional): Delete stored IDs that are no longer in the corpus.
+"""
+
+from rag_core.embedding_cache import text_key
+
+DEFAULT_BATCH_SIZE = 5000  # Chroma's default max batch is a little above this
+
+
+def content_id(text):
+    return text_key(text)[:32]
+
+
+def batches(items, size):
+    """Consecutive slices of `items`, at most `size` long (shared by the batched readers and writers)."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(collection, ids, batch_size=DEFAULT_BATCH_SIZE):
+    found = set()
+    for batch in batches(ids, batch_size):
+        found.update(collection.get(ids=batch, include=[])["ids"])
+    return found
+
+
+def upsert_texts(collection, texts, embed, metadatas=None, batch_size=DEFAULT_BATCH_SIZE,
+                 delete_missing=False):
+    """
+    Idempotently syncs `texts` into `collection`.
+    `embed` maps a list of texts to a list/matrix of vectors (e.g. EmbeddingClient.embed).
+    Returns counts: {"added", "unchanged", "deleted"}.
+    """
+    # Drop duplicate texts up front: same content, same ID
+    unique = {}
+    for i, text in enumerate(texts):
+        unique.setdefault(content_id(text), i)
+    ids = list(unique)
+
+    stored = existing_ids(collection, ids, batch_size)
+    new_ids = [doc_id for doc_id in ids if doc_id not in stored]
+
+    for batch_ids in batches(new_ids, batch_size):
+        rows = [unique[doc_id] for doc_id in batch_ids]
+        documents = [texts[row] for row in rows]
+        kwargs = {"metadatas": [metadatas[row] for row in rows]} if metadatas else {}
+        collection.upsert(
+            ids=batch_ids,
+            embeddings=[list(map(float, vec)) for vec in embed(documents)],
+            documents=documents,
+            **kwargs,
+        )
+
+    deleted = 0
+    if delete_missing:
+        wanted = set(ids)
+        stale = [doc_id for doc_id in collection.get(include=[])["ids"] if doc_id not in wanted]
+        for batch in batches(stale, batch_size):
+            collection.delete(ids=batch)
+        deleted = len(stale)
+
+    return {"added": len(new_ids), "unchanged": len(ids) - len(new_ids), "deleted": deleted}
@@ -0,0 +1,60 @@
+"""
+🧩 Streaming Ingestion (Pages -> Chunks -> Batches)
+
+The Goal: Chunk a 1,000-page PDF without ever holding the whole text in RAM,
+and start embedding as soon as the first chunks are ready.
+
+The Algorithm:
+1. Pages: A generator yields one page of text at a time (lazy parsing).
+2. Chunks: A sliding window runs over the stream of pages. A small carry
+   buffer holds the tail of the previous page, so chunks that cross a page
+   boundary come out exactly as if the text had been one big string.
+3. Batches: Chunks are grouped into fixed-size lists that can go straight
+   to the embedding API.
+"""
+
+from itertools import islice
+
+
+def iter_pdf_pages(file_path, workers=None):
+    # Same text as Day 5's load_pdf (page text + "\n"), one page at a time.
+    # Long PDFs are extracted by a process pool (see pdf_extract.py).
+    from rag_core.pdf_extract import iter_page_texts
+
+    for text in iter_page_texts(file_path, workers=workers):
+        yield text + "\n"
+
+
+def iter_chunks(pieces, chunk_size=1000, overlap=100):
+    """
+    Sliding-window chunker over an iterable of text pieces (e.g. pages).
+    Produces the same chunks as slicing "".join(pieces) every
+    `chunk_size - overlap` characters. A plain string counts as one piece.
+    """
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError("overlap must be smaller than chunk_size.")
+    if isinstance(pieces, str):
+        pieces = [pieces]
+
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        # Emit every window that is fully known; keep only the unfinished tail
+        start = 0
+        while len(buffer) - start >= chunk_size:
+            yield buffer[start:start + chunk_size]
+            start += step
+        buffer = buffer[start:]
+
+    # The final partial windows (same as the `while start < len(text)` loop)
+    start = 0
+    while start < len(buffer):
+        yield buffer[start:start + chunk_size]
+        start += step
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
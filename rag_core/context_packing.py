@@ -0,0 +1,175 @@
+"""
+🧩 Context Packing (Fewer Prompt Tokens, Same Facts)
+
+The Goal: Hand the LLM every retrieved fact exactly once, inside a fixed
+token budget. Chunks are split with an overlap, so two neighbouring hits
+repeat ~100 characters; joining the top-k with "\\n\\n" pays for that text
+twice and lets the prompt grow with k.
+
+The Algorithm:
+1. Group: Hits are grouped by (source, page).
+2. Merge: Inside a group, hits are sorted by their position on the page and
+   overlapping / adjacent ones are stitched into one passage. Positions come
+   from the splitter's `start_index` metadata (`add_start_index=True`);
+   without it, the longest suffix of one chunk that is a prefix of the
+   other is used. Chunks contained in another one are dropped.
+3. Dedupe: Passages with identical text (the same page indexed twice, a
+   repeated boilerplate block) are kept once.
+4. Fill: Passages are taken best score first while they fit the budget.
+   The first one that does not fit is cut at a word boundary to use what is
+   left (if at least `min_fragment_tokens` remain), then packing stops.
+
+Hits can be LangChain Documents, (Document, score) pairs or dicts with
+"text" / "metadata" / "score". Without scores, retrieval order is used.
+"""
+
+from rag_core.conversation_memory import estimate_tokens
+
+MIN_OVERLAP_CHARS = 20  # Shorter text matches are coincidence, not chunk overlap
+MAX_GAP_CHARS = 2  # Adjacent chunks are separated by at most the whitespace the splitter stripped
+
+
+# --- INPUT ---
+def _hit(item, rank):
+    score = None
+    if isinstance(item, tuple):
+        item, score = item
+    if isinstance(item, dict):
+        text, metadata = item["text"], item.get("metadata") or {}
+        score = item.get("score", score)
+    else:
+        text, metadata = item.page_content, item.metadata or {}
+    return {
+        "text": text,
+        "metadata": metadata,
+        # Higher is better; rank order stands in when the retriever gives no score
+        "score": float(score) if score is not None else -float(rank),
+        "rank": rank,
+        "start": metadata.get("start_index"),
+        "chunks": 1,
+    }
+
+
+def _text_overlap(left, right):
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    longest = min(len(left), len(right))
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _join(left, right):
+    """Stitches two hits from the same page into one, or returns None."""
+    if left["start"] is not None and right["start"] is not None:
+        skip = left["start"] + len(left["text"]) - right["start"]
+        if right["start"] < left["start"] or skip < -MAX_GAP_CHARS:
+            return None  # A gap: the chunk between them was not retrieved
+        if skip < 0:
+            text = left["text"] + " " + right["text"]  # Only the whitespace the splitter stripped is missing
+        else:
+            text = left["text"] + right["text"][skip:] if skip < len(right["text"]) else left["text"]
+    elif right["text"] in left["text"]:
+        text = left["text"]
+    else:
+        overlap = _text_overlap(left["text"], right["text"])
+        if not overlap:
+            return None
+        text = left["text"] + right["text"][overlap:]
+    merged = dict(left, text=text, score=max(left["score"], right["score"]),
+                  rank=min(left["rank"], right["rank"]), chunks=left["chunks"] + right["chunks"])
+    return merged
+
+
+def _merge_group(hits):
+    if all(hit["start"] is not None for hit in hits):
+        pending = sorted(hits, key=lambda hit: hit["start"])
+    else:
+        pending = sorted(hits, key=lambda hit: hit["rank"])
+    passages = []
+    for hit in pending:
+        for i, passage in enumerate(passages):
+            merged = _join(passage, hit) or _join(hit, passage)
+            if merged:
+                passages[i] = merged
+                break
+        else:
+            passages.append(hit)
+    return passages
+
+
+def _truncate(text, budget, count_tokens):
+    # Binary search on characters, then back off to the last whitespace
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle] + " ...") <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text.rfind(" ", 0, low)
+    return (text[:cut] if cut > 0 else text[:low]).rstrip() + " ..."
+
+
+# --- PACKING ---
+def merge_hits(hits):
+    """Merges overlapping / adjacent hits per (source, page) and drops duplicates. Best score first."""
+    groups = {}
+    for rank, item in enumerate(hits):
+        hit = _hit(item, rank)
+        key = (hit["metadata"].get("source"), hit["metadata"].get("page"))
+        groups.setdefault(key, []).append(hit)
+
+    passages, seen = [], set()
+    for group in groups.values():
+        for passage in _merge_group(group):
+            normalized = " ".join(passage["text"].split())
+            if normalized not in seen:
+                seen.add(normalized)
+                passages.append(passage)
+    return sorted(passages, key=lambda passage: (-passage["score"], passage["rank"]))
+
+
+def pack_context(hits, budget_tokens=1500, separator="\n\n", count_tokens=estimate_tokens,
+                 min_fragment_tokens=50, order="score"):
+    """
+    Returns {"text", "passages", "stats"}. `order="document"` lays the chosen
+    passages out in page order instead of best first.
+    """
+    hits = list(hits)
+    passages = merge_hits(hits)
+    separator_tokens = count_tokens(separator) if separator else 0
+
+    chosen, used = [], 0
+    for passage in passages:
+        cost = count_tokens(passage["text"]) + (separator_tokens if chosen else 0)
+        if used + cost <= budget_tokens:
+            chosen.append(passage)
+            used += cost
+            continue
+        remaining = budget_tokens - used - (separator_tokens if chosen else 0)
+        if remaining >= min_fragment_tokens:
+            passage = dict(passage, text=_truncate(passage["text"], remaining, count_tokens), truncated=True)
+            chosen.append(passage)
+            used += count_tokens(passage["text"]) + (separator_tokens if len(chosen) > 1 else 0)
+        break
+
+    if order == "document":
+        chosen.sort(key=lambda p: (str(p["metadata"].get("source")), p["metadata"].get("page") or 0,
+                                   p["start"] if p["start"] is not None else p["rank"]))
+    text = separator.join(passage["text"] for passage in chosen)
+
+    naive_tokens = count_tokens(separator.join(_hit(item, rank)["text"] for rank, item in enumerate(hits))) if hits else 0
+    return {
+        "text": text,
+        "passages": [{"text": p["text"], "metadata": p["metadata"], "score": p["score"],
+                      "chunks": p["chunks"], "truncated": p.get("truncated", False)} for p in chosen],
+        "stats": {
+            "hits": len(hits),
+            "passages": len(passages),
+            "packed": len(chosen),
+            "naive_tokens": naive_tokens,
+            "tokens": count_tokens(text) if text else 0,
+            "dropped": len(passages) - len(chosen),
+        },
+    }
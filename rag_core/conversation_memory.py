@@ -0,0 +1,132 @@
+"""
+🧩 Conversation Memory (Bounded History + Cheap Rewrites)
+
+The Goal: Keep follow-up questions working without letting every turn get
+slower and more expensive as the chat grows.
+
+The Algorithm:
+1. Window: Keep the most recent turns that fit in a token budget.
+2. Summary: Turns that fall out of the window are folded into a running
+   summary, incrementally (only the evicted turns are summarized, once).
+3. Rewrite Gate: Only ask the LLM to rewrite a question into a standalone
+   one when it looks like a follow-up ("he", "that", "and the price?").
+   The first question and self-contained questions skip the extra round trip.
+4. Rewrite Cache: The same follow-up after the same last exchange reuses the
+   previous rewrite.
+
+Turns are (role, content) tuples with role "human" or "ai", which LangChain's
+MessagesPlaceholder accepts directly.
+"""
+
+import re
+from collections import OrderedDict
+
+# Words that usually point back at something said earlier
+FOLLOW_UP_WORDS = {
+    "he", "she", "it", "they", "them", "him", "his", "her", "hers", "its", "their", "theirs",
+    "this", "that", "these", "those", "there", "then", "former", "latter", "same",
+    "above", "previous", "earlier", "else", "another", "other", "also", "too",
+}
+FOLLOW_UP_OPENERS = ("and ", "but ", "so ", "what about", "how about", "why not", "what else")
+SHORT_QUESTION_WORDS = 3
+
+_WORD = re.compile(r"[a-z']+")
+
+
+def estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting English text
+    return max(1, len(text) // 4)
+
+
+def truncate_tokens(text, budget):
+    # Keeps the most recent part of the text
+    limit = budget * 4
+    return text if len(text) <= limit else "..." + text[-limit:]
+
+
+class ConversationMemory:
+    """Token-budgeted window of recent turns plus a running summary of older ones."""
+
+    def __init__(self, token_budget=1500, summary_budget=300, summarizer=None, rewrite_cache_size=256):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        # summarizer(previous_summary, evicted_turns_text) -> new summary
+        self.summarizer = summarizer
+        self.turns = []
+        self.summary = ""
+        self.rewrites = 0
+        self.rewrites_skipped = 0
+        self.rewrite_cache_hits = 0
+        self._window_tokens = 0
+        self._rewrite_cache = OrderedDict()
+        self._rewrite_cache_size = rewrite_cache_size
+
+    # --- HISTORY ---
+    def add(self, role, content):
+        self.turns.append((role, content))
+        self._window_tokens += estimate_tokens(content)
+        self._compact()
+
+    def _compact(self):
+        evicted = []
+        # Always keep the latest turn, even if it alone is over budget
+        while self._window_tokens > self.token_budget and len(self.turns) > 1:
+            role, content = self.turns.pop(0)
+            self._window_tokens -= estimate_tokens(content)
+            evicted.append(f"{role}: {content}")
+        if evicted:
+            self._fold_into_summary("\n".join(evicted))
+
+    def _fold_into_summary(self, evicted_text):
+        if self.summarizer is not None:
+            self.summary = self.summarizer(self.summary, evicted_text)
+        else:
+            # No LLM available: keep the most recent evicted text verbatim
+            self.summary = (self.summary + "\n" + evicted_text).strip()
+        self.summary = truncate_tokens(self.summary, self.summary_budget)
+
+    def window(self):
+        return list(self.turns)
+
+    def prompt_tokens(self):
+        return self._window_tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    # --- QUESTION REWRITING ---
+    def needs_rewrite(self, question):
+        if not self.turns:
+            return False  # Nothing to refer back to
+        text = question.strip().lower()
+        words = _WORD.findall(text)
+        if len(words) <= SHORT_QUESTION_WORDS:
+            return True  # Elliptical: "and the price?"
+        if text.startswith(FOLLOW_UP_OPENERS):
+            return True
+        return any(word in FOLLOW_UP_WORDS for word in words)
+
+    def standalone_question(self, question, rewriter):
+        """Returns `question`, rewritten by `rewriter(question)` only when it needs it."""
+        if not self.needs_rewrite(question):
+            self.rewrites_skipped += 1
+            return question
+
+        key = (question.strip().lower(), tuple(self.turns[-2:]))
+        if key in self._rewrite_cache:
+            self._rewrite_cache.move_to_end(key)
+            self.rewrite_cache_hits += 1
+            return self._rewrite_cache[key]
+
+        rewritten = rewriter(question).strip() or question
+        self.rewrites += 1
+        self._rewrite_cache[key] = rewritten
+        if len(self._rewrite_cache) > self._rewrite_cache_size:
+            self._rewrite_cache.popitem(last=False)
+        return rewritten
+
+    def stats(self):
+        return {
+            "turns_in_window": len(self.turns),
+            "prompt_tokens": self.prompt_tokens(),
+            "rewrites": self.rewrites,
+            "rewrites_skipped": self.rewrites_skipped,
+            "rewrite_cache_hits": self.rewrite_cache_hits,
+        }
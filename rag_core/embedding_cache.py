@@ -0,0 +1,143 @@
+"""
+🧩 The Persistent Embedding Cache
+
+The Goal: Never pay twice to embed the same text with the same model.
+
+The Algorithm: Content Addressing.
+1. Key: (embedding model, SHA-256 of the normalized text). Whitespace and
+   Unicode form are normalized so trivial re-extraction noise still hits.
+2. Value: the vector as raw float32 bytes (768 dims -> 3 KB per entry).
+3. Storage: one SQLite file shared by every day's script (stdlib only).
+4. Eviction: every hit bumps a `last_used` counter; when the cache grows
+   past `max_entries` the least recently used rows are deleted. The table
+   is counted once, then a running upper bound (every put counted as new)
+   decides when a real COUNT(*) + eviction is needed.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(REPO_ROOT, ".rag_cache", "embeddings.sqlite3")
+
+_WHITESPACE = re.compile(r"\s+")
+_SQL_BATCH = 500  # Stay well under SQLite's bound-parameter limit
+
+
+def normalize_text(text):
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def text_key(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk (model, text-hash) -> float32 vector cache with LRU eviction."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=500_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._count = None  # Upper bound on the row count (replaced rows are counted as new)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Streamlit runs each rerun on a new thread, so share one guarded connection
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, key TEXT NOT NULL, dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL, last_used INTEGER NOT NULL,"
+                " PRIMARY KEY (model, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings (last_used)")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model, texts):
+        """Returns one entry per text: a float32 vector, or None on a miss."""
+        keys = [text_key(text) for text in texts]
+        found = {}
+        now = time.time_ns()
+        with self._lock, self._conn:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = list(set(keys[start:start + _SQL_BATCH]))
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({marks})",
+                    [model, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE model = ? AND key IN ({marks})",
+                        [now, model, *batch],
+                    )
+
+        results = [found.get(key) for key in keys]
+        hit_count = sum(vec is not None for vec in results)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    def get(self, model, text):
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model, texts, vectors):
+        now = time.time_ns()
+        rows = []
+        for text, vec in zip(texts, vectors):
+            vec = np.asarray(vec, dtype=np.float32)
+            rows.append((model, text_key(text), vec.shape[0], vec.tobytes(), now))
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict(len(rows))
+
+    def put(self, model, text, vector):
+        self.put_many(model, [text], [vector])
+
+    def _evict(self, added):
+        # COUNT(*) scans the whole table: only run it when the running bound says we may be over
+        if self._count is not None:
+            self._count += added
+            if self._count <= self.max_entries:
+                return
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+            self._count = self.max_entries
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self),
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,190 @@
+"""
+🧩 The Batched Embedding Client
+
+The Goal: Embed thousands of chunks without paying one round trip per text.
+
+The Algorithm:
+1. Pack: Split the texts into batches up to the backend's batch limit
+   (Gemini's batch endpoint takes 100 texts per request).
+2. Overlap: Keep a bounded number of batches in flight on a thread pool,
+   so throughput is limited by the quota instead of by latency.
+3. Retry: If the API says "slow down" (HTTP 429 / ResourceExhausted),
+   wait with exponential backoff + jitter and try the same batch again.
+4. Reassemble: Put every vector back in the same order as the input.
+
+Backends are tiny objects with `max_batch_size` and `embed_batch(texts)`,
+so a deterministic fake can stand in for Gemini in tests and benchmarks.
+An optional EmbeddingCache is consulted first, so only misses hit the API.
+`embed_stream` does the same for a lazy stream of texts (see chunking.py).
+"""
+
+import hashlib
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from rag_core.chunking import batched
+
+DEFAULT_MODEL = "models/text-embedding-004"
+
+
+class RateLimitError(Exception):
+    """Raised by backends when the provider asks us to slow down."""
+
+
+def is_rate_limited(exc):
+    # Recognize 429s without importing any provider SDK
+    if isinstance(exc, RateLimitError):
+        return True
+    if type(exc).__name__ in ("ResourceExhausted", "TooManyRequests"):
+        return True
+    return getattr(exc, "code", None) == 429 or getattr(exc, "status_code", None) == 429
+
+
+# --- BACKENDS ---
+class GeminiEmbeddingBackend:
+    """Calls `genai.embed_content` with a whole list of texts per request."""
+
+    max_batch_size = 100
+
+    def __init__(self, model=DEFAULT_MODEL, task_type=None, api_key=None):
+        self.model = model
+        self.task_type = task_type
+        self.api_key = api_key
+        self._genai = None
+
+    def _client(self):
+        # Imported on the first request: a fully cached run never loads the SDK
+        if self._genai is None:
+            import google.generativeai as genai
+
+            if self.api_key:
+                genai.configure(api_key=self.api_key)  # Otherwise configured by the calling script
+            self._genai = genai
+        return self._genai
+
+    def embed_batch(self, texts):
+        kwargs = {"task_type": self.task_type} if self.task_type else {}
+        response = self._client().embed_content(model=self.model, content=list(texts), **kwargs)
+        return response["embedding"]
+
+
+class FakeEmbeddingBackend:
+    """
+    Deterministic offline embedder: the same text always maps to the same
+    vector. `latency` simulates a network round trip per batch.
+    """
+
+    def __init__(self, dim=768, latency=0.0, max_batch_size=100, model="fake-embedding"):
+        self.dim = dim
+        self.latency = latency
+        self.max_batch_size = max_batch_size
+        self.model = model
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_one(self, text):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+    def embed_batch(self, texts):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self.embed_one(text) for text in texts]
+
+
+# --- THE CLIENT ---
+class EmbeddingClient:
+    """Order-preserving, batched, concurrent embedding with retry on 429s."""
+
+    def __init__(self, backend=None, batch_size=None, max_in_flight=4,
+                 max_retries=6, base_delay=1.0, max_delay=60.0, cache=None):
+        self.backend = backend if backend is not None else GeminiEmbeddingBackend()
+        self.cache = cache
+        limit = getattr(self.backend, "max_batch_size", 100)
+        self.batch_size = min(batch_size or limit, limit)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._sleep = time.sleep
+
+    @property
+    def model(self):
+        return getattr(self.backend, "model", type(self.backend).__name__)
+
+    def _embed_batch(self, batch):
+        attempt = 0
+        while True:
+            try:
+                with self._lock:
+                    self.requests += 1
+                vectors = self.backend.embed_batch(batch)
+                break
+            except Exception as exc:
+                if not is_rate_limited(exc) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                with self._lock:
+                    self.retries += 1
+                self._sleep(delay * (0.5 + random.random() / 2))
+                attempt += 1
+
+        if len(vectors) != len(batch):
+            raise ValueError(f"Backend returned {len(vectors)} vectors for {len(batch)} texts.")
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _embed_uncached(self, texts):
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if len(batches) == 1 or self.max_in_flight == 1:
+            return np.vstack([self._embed_batch(batch) for batch in batches])
+
+        # executor.map yields results in submission order, so the output lines up with the input
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as pool:
+            return np.vstack(list(pool.map(self._embed_batch, batches)))
+
+    def embed(self, texts):
+        """Embeds `texts` and returns a (len(texts), dim) float32 matrix in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        cached = self.cache.get_many(self.model, texts)
+        missing = [i for i, vec in enumerate(cached) if vec is None]
+        if missing:
+            fresh = self._embed_uncached([texts[i] for i in missing])
+            self.cache.put_many(self.model, [texts[i] for i in missing], fresh)
+            for i, vec in zip(missing, fresh):
+                cached[i] = vec
+        return np.vstack(cached)
+
+    def embed_one(self, text):
+        return self.embed([text])[0]
+
+    def embed_stream(self, texts):
+        """
+        Embeds a (possibly endless) iterable of texts lazily. Yields
+        (batch_texts, matrix) pairs in input order while at most
+        `max_in_flight` batches are pending, so memory stays flat.
+        """
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for batch in batched(texts, self.batch_size):
+                pending.append((batch, pool.submit(self.embed, batch)))
+                if len(pending) >= self.max_in_flight:
+                    batch, future = pending.popleft()
+                    yield batch, future.result()
+            while pending:
+                batch, future = pending.popleft()
+                yield batch, future.result()
@@ -0,0 +1,72 @@
+"""
+🧩 Hybrid Retrieval (Keywords + Meaning)
+
+The Goal: Get the best of both searches. BM25 nails exact terms
+("Aero-2000"); embeddings catch paraphrases ("buy things" ~ "currency").
+
+The Algorithm:
+1. Score: Dense cosine scores + BM25 scores for the same chunks.
+2. Normalize: BM25 scores are divided by the best BM25 score (-> 0..1),
+   so both signals live on a comparable scale.
+3. Fuse: final = alpha * dense + (1 - alpha) * lexical.
+4. Prefilter (optional): Score vectors ONLY for the top lexical hits,
+   instead of scanning every vector. Falls back to a full scan when the
+   query shares no terms with the corpus.
+
+`reciprocal_rank_fusion` merges ranked lists when only ranks are available
+(e.g. Chroma results + BM25 results in Day 7).
+"""
+
+import numpy as np
+
+from rag_core.vector_store import normalize_rows, top_k
+
+
+class HybridRetriever:
+    """Fuses dense scores over `vectors` (unit rows) with a BM25Index over the same rows."""
+
+    def __init__(self, vectors, texts, bm25, alpha=0.5, prefilter=None):
+        self.vectors = vectors
+        self.texts = texts
+        self.bm25 = bm25
+        self.alpha = alpha
+        self.prefilter = prefilter  # e.g. 200 -> only score the 200 best lexical hits
+
+    def search(self, query_text, query_vec, k=3, prefilter=None):
+        query_vec = normalize_rows(query_vec)[0]
+        prefilter = prefilter if prefilter is not None else self.prefilter
+
+        if prefilter:
+            rows, lexical = self.bm25.search(query_text, prefilter)
+            if rows.size == 0:
+                rows = np.arange(len(self.texts))
+                lexical = np.zeros(rows.size, dtype=np.float32)
+        else:
+            rows = np.arange(len(self.texts))
+            lexical = self.bm25.scores(query_text)
+
+        dense = self.vectors[rows] @ query_vec if prefilter else self.vectors @ query_vec
+        best_lexical = float(lexical.max()) if lexical.size else 0.0
+        if best_lexical > 0:
+            lexical = lexical / best_lexical
+        fused = self.alpha * dense + (1.0 - self.alpha) * lexical
+
+        return [
+            {
+                "row": int(rows[i]),
+                "text": self.texts[rows[i]],
+                "score": float(fused[i]),
+                "dense": float(dense[i]),
+                "lexical": float(lexical[i]),
+            }
+            for i in top_k(fused, k)
+        ]
+
+
+def reciprocal_rank_fusion(ranked_lists, k=60):
+    """Merges lists of keys (best first). Returns keys sorted by sum of 1 / (k + rank)."""
+    scores = {}
+    for ranked in ranked_lists:
+        for rank, key in enumerate(ranked):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,162 @@
+"""
+🧩 Incremental Re-Indexing (Only Pay for What Changed)
+
+The Goal: Re-running ingestion on the same PDF should cost nothing, and
+editing one page should only re-embed that page. `Chroma.from_documents`
+re-embeds everything on every run and appends duplicates to the store.
+
+The Algorithm: A Manifest Next to the Store.
+1. Source hash: SHA-256 of the file bytes (+ the splitter / embedding
+   config). Same hash as last run -> skip the file without even parsing it.
+2. Page hashes: A changed file is loaded and every page is hashed. Pages
+   with the same hash keep their chunks untouched.
+3. Re-chunk: Only new / changed pages are split and embedded. Chunk IDs are
+   derived from (source, page, page hash, chunk number), so a retried run
+   overwrites instead of duplicating.
+4. Prune: Chunks of changed or vanished pages, of sources that are no longer
+   listed, and any stored chunk the manifest does not know about (e.g. the
+   random-ID duplicates of older runs) are deleted.
+5. Commit: The manifest is rewritten atomically after the store is updated,
+   so a crash mid-run only means that work is redone next time.
+
+Works with any LangChain VectorStore that supports `add_documents(ids=...)`,
+`delete(ids)` and `get()` (Chroma does).
+"""
+
+import hashlib
+import json
+import os
+
+from rag_core.atomic_write import write_json_atomic
+from rag_core.chroma_ingest import DEFAULT_BATCH_SIZE, content_id
+
+MANIFEST_VERSION = 1
+
+
+def file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def page_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IncrementalIndexer:
+    """
+    Keeps `vector_store` in sync with a list of source files.
+
+    `split(documents)` turns page Documents into chunk Documents
+    (e.g. RecursiveCharacterTextSplitter(...).split_documents) and `config`
+    is anything that changes the chunks or vectors (chunk size, model...):
+    when it changes, every source is re-indexed.
+    """
+
+    def __init__(self, vector_store, manifest_path, split, config=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.manifest_path = manifest_path
+        self.split = split
+        self.config = config or {}
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        empty = {"version": MANIFEST_VERSION, "config": self.config, "sources": {}, "fresh": True}
+        if not os.path.exists(self.manifest_path):
+            return empty
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("config") != self.config:
+            # Different chunking or embedding model: nothing stored can be reused
+            return dict(empty, previous_ids=self._manifest_ids(manifest))
+        return manifest
+
+    @staticmethod
+    def _manifest_ids(manifest):
+        return [chunk_id for entry in manifest.get("sources", {}).values()
+                for page in entry["pages"].values() for chunk_id in page["chunk_ids"]]
+
+    def _chunk_ids(self, source, page, digest, chunks):
+        return [content_id(f"{source}\x00{page}\x00{digest}\x00{i}") for i in range(len(chunks))]
+
+    def sync(self, sources, load):
+        """
+        `load(path)` returns one Document per page (e.g. load_pdf_documents).
+        Returns counts: sources skipped / indexed, pages unchanged / indexed,
+        chunks added / deleted.
+        """
+        stats = {"sources_skipped": 0, "sources_indexed": 0, "pages_unchanged": 0, "pages_indexed": 0,
+                 "chunks_added": 0, "chunks_deleted": 0}
+        known = self.manifest["sources"]
+        keys = {os.path.abspath(path): path for path in sources}
+        stale = list(self.manifest.pop("previous_ids", []))
+        written = set()  # IDs upserted this run: never delete these, even if an old manifest listed them
+
+        # Sources that were removed from the list
+        for key in [key for key in known if key not in keys]:
+            stale.extend(self._manifest_ids({"sources": {key: known.pop(key)}}))
+
+        for key, path in keys.items():
+            digest = file_hash(path)
+            entry = known.get(key)
+            if entry and entry["hash"] == digest:
+                stats["sources_skipped"] += 1
+                stats["pages_unchanged"] += len(entry["pages"])
+                continue
+
+            old_pages = entry["pages"] if entry else {}
+            new_pages, pending, pending_ids = {}, [], []
+            for number, doc in enumerate(load(path)):
+                page = str(doc.metadata.get("page", number))
+                page_digest = page_hash(doc.page_content)
+                old = old_pages.get(page)
+                if old and old["hash"] == page_digest:
+                    new_pages[page] = old
+                    stats["pages_unchanged"] += 1
+                    continue
+                chunks = self.split([doc])
+                ids = self._chunk_ids(key, page, page_digest, chunks)
+                pending.extend(chunks)
+                pending_ids.extend(ids)
+                written.update(ids)
+                new_pages[page] = {"hash": page_digest, "chunk_ids": ids}
+                stats["pages_indexed"] += 1
+                stats["chunks_added"] += len(ids)
+
+            # Changed pages are embedded together, in batches, not one request per page
+            for start in range(0, len(pending), self.batch_size):
+                self.vector_store.add_documents(pending[start:start + self.batch_size],
+                                                ids=pending_ids[start:start + self.batch_size])
+
+            kept = {chunk_id for page in new_pages.values() for chunk_id in page["chunk_ids"]}
+            stale.extend(chunk_id for page in old_pages.values() for chunk_id in page["chunk_ids"]
+                         if chunk_id not in kept)
+            known[key] = {"hash": digest, "pages": new_pages}
+            stats["sources_indexed"] += 1
+
+        if self.manifest.pop("fresh", False):
+            # First run against this store: drop whatever the manifest cannot account for
+            wanted = set(self._manifest_ids(self.manifest))
+            stale.extend(doc_id for doc_id in self.vector_store.get(include=[])["ids"] if doc_id not in wanted)
+        # A config change re-derives the same IDs for the same pages (they do not depend on
+        # the config), so the previous run's list overlaps with what was just written
+        stale = sorted(set(stale) - written)
+        for start in range(0, len(stale), DEFAULT_BATCH_SIZE):
+            self.vector_store.delete(ids=stale[start:start + DEFAULT_BATCH_SIZE])
+        stats["chunks_deleted"] = len(stale)
+
+        write_json_atomic(self.manifest_path, self.manifest, indent=1)
+        return stats
+
+    def documents(self):
+        """Every stored chunk as a Document, in (source, page, position) order."""
+        from langchain_core.documents import Document
+
+        stored = self.vector_store.get(include=["documents", "metadatas"])
+        docs = [Document(page_content=text, metadata=metadata or {}, id=doc_id)
+                for doc_id, text, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])]
+        return sorted(docs, key=lambda d: (str(d.metadata.get("source")), d.metadata.get("page") or 0,
+                                           d.metadata.get("start_index") or 0))
@@ -0,0 +1,45 @@
+"""
+🧩 Cache Adapter for LangChain Embeddings
+
+The Goal: Give the LangChain path (Days 7-9) the same persistent cache as the
+hand-written `get_embedding` helpers.
+
+The Algorithm: Wrap any LangChain `Embeddings` object (e.g.
+GoogleGenerativeAIEmbeddings). Look every text up in the EmbeddingCache and
+forward only the misses to the wrapped model, in one call.
+"""
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag_core.embedding_cache import EmbeddingCache
+
+
+class CachedEmbeddings(Embeddings):
+    """Drop-in `Embeddings` that serves repeats from an EmbeddingCache."""
+
+    def __init__(self, embeddings, cache=None, model_name=None):
+        self.embeddings = embeddings
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = [i for i, vec in enumerate(vectors) if vec is None]
+        if missing:
+            # Round through float32 so fresh and cached results are identical
+            fresh = np.asarray(self.embeddings.embed_documents([texts[i] for i in missing]), dtype=np.float32)
+            self.cache.put_many(self.model_name, [texts[i] for i in missing], fresh)
+            for i, vec in zip(missing, fresh):
+                vectors[i] = vec
+        return [[float(x) for x in vec] for vec in vectors]
+
+    def embed_query(self, text):
+        # Queries use a different task type upstream, so they get their own namespace
+        model = f"{self.model_name}#query"
+        vec = self.cache.get(model, text)
+        if vec is None:
+            vec = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            self.cache.put(model, text, vec)
+        return [float(x) for x in vec]
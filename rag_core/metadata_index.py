@@ -0,0 +1,196 @@
+"""
+🧩 Metadata Filters (Posting Lists Over Chunk Metadata)
+
+The Goal: Search only one PDF, a page range or one upload session without
+scoring every vector in the store.
+
+The Algorithm:
+1. Postings: For every metadata field, each distinct value keeps the
+   sorted list of rows that carry it ("source" = "a.pdf" -> [0, 1, 2, 7]).
+2. Ranges: Numeric fields also get their distinct values sorted once (on
+   first use after an add), so `page >= 3` is a binary search plus a slice.
+3. Resolve: A filter is turned into ONE sorted array of candidate rows
+   BEFORE any scoring. AND intersects (smallest list first, stops at
+   empty), OR merges.
+4. Score: The store then scores only those rows, so a filtered query costs
+   O(matches x dim) instead of O(N x dim).
+
+Filters use Chroma's `where` syntax, so the same dict works in Day 6:
+    {"source": "a.pdf"}
+    {"page": {"$gte": 2, "$lte": 5}}
+    {"$and": [{"source": {"$in": ["a.pdf", "b.pdf"]}}, {"session": "s1"}]}
+    {"$or": [{"page": 0}, {"page": {"$gt": 10}}]}
+Operators: $eq $ne $gt $gte $lt $lte $in $nin. `$ne` / `$nin` only match
+rows that have the field, and cost O(rows with the field).
+"""
+
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.int64)
+_RANGE_OPS = ("$gt", "$gte", "$lt", "$lte")
+_ALL = object()  # Posting-cache key for "every row that has the field"
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def _check_scalar(field, op, value):
+    # Filter values must be hashable scalars, like the metadata values themselves
+    if not isinstance(value, (str, bool, int, float, np.generic)):
+        raise ValueError(f"{op} needs a string, number or bool for field {field!r}, got {value!r}.")
+    return value
+
+
+class MetadataIndex:
+    """Per-field posting lists: field -> value -> rows (ascending)."""
+
+    def __init__(self):
+        self.size = 0
+        self._postings = {}  # field -> {value: [rows]}
+        self._packed = {}  # (field, value) -> np.ndarray, rebuilt after adds
+        self._ranges = {}  # field -> (sorted numeric values, rows grouped by value, group starts)
+
+    def add(self, metadatas):
+        """Indexes one metadata dict (or None) per new row, in row order."""
+        touched = set()
+        for row, metadata in enumerate(metadatas, start=self.size):
+            for field, value in (metadata or {}).items():
+                if isinstance(value, (list, dict, set)) or value is None:
+                    continue  # Only scalar values are filterable (same rule as Chroma)
+                self._postings.setdefault(field, {}).setdefault(value, []).append(row)
+                touched.add(field)
+            self.size = row + 1
+        for field in touched:
+            self._ranges.pop(field, None)
+        self._packed = {key: rows for key, rows in self._packed.items() if key[0] not in touched}
+
+    def fields(self):
+        return sorted(self._postings)
+
+    def values(self, field):
+        """Distinct values of `field` with their row counts."""
+        return {value: len(rows) for value, rows in self._postings.get(field, {}).items()}
+
+    # --- POSTINGS ---
+    def _rows(self, field, value):
+        key = (field, value)
+        rows = self._packed.get(key)
+        if rows is None:
+            postings = self._postings.get(field, {}).get(value)
+            if postings is None:
+                return _EMPTY  # Not cached: queries for missing values must not grow the cache
+            rows = np.asarray(postings, dtype=np.int64)
+            self._packed[key] = rows
+        return rows
+
+    def _range_table(self, field):
+        table = self._ranges.get(field)
+        if table is None:
+            postings = self._postings.get(field, {})
+            keys = sorted(value for value in postings if _is_number(value))
+            lists = [postings[value] for value in keys]
+            starts = np.zeros(len(keys) + 1, dtype=np.int64)
+            starts[1:] = np.cumsum([len(rows) for rows in lists])
+            rows = np.fromiter((row for rows in lists for row in rows), dtype=np.int64, count=int(starts[-1]))
+            table = (np.asarray(keys, dtype=np.float64), rows, starts)
+            self._ranges[field] = table
+        return table
+
+    def _range(self, field, low=None, high=None, include_low=True, include_high=True):
+        keys, rows, starts = self._range_table(field)
+        first = 0 if low is None else np.searchsorted(keys, low, side="left" if include_low else "right")
+        last = len(keys) if high is None else np.searchsorted(keys, high, side="right" if include_high else "left")
+        if first >= last:
+            return _EMPTY
+        return np.sort(rows[starts[first]:starts[last]])
+
+    def _all_with(self, field):
+        key = (field, _ALL)
+        rows = self._packed.get(key)
+        if rows is None:
+            rows = _union([self._rows(field, value) for value in list(self._postings.get(field, {}))])
+            self._packed[key] = rows
+        return rows
+
+    # --- FILTER EXPRESSIONS ---
+    def resolve(self, where):
+        """Sorted int64 array of the rows matching `where`."""
+        if not isinstance(where, dict) or not where:
+            raise ValueError(f"A filter must be a non-empty dict, got {where!r}.")
+        parts = []
+        for key, condition in where.items():
+            if key in ("$and", "$or") and (not isinstance(condition, list) or not condition):
+                raise ValueError(f"{key} needs a non-empty list of filters, got {condition!r}.")
+            if key == "$and":
+                parts.append(_intersect([self.resolve(child) for child in condition]))
+            elif key == "$or":
+                parts.append(_union([self.resolve(child) for child in condition]))
+            elif key.startswith("$"):
+                raise ValueError(f"Unknown logical operator {key!r} (use $and / $or).")
+            else:
+                parts.append(self._field_condition(key, condition))
+        # Several keys in one dict mean AND
+        return parts[0] if len(parts) == 1 else _intersect(parts)
+
+    def _field_condition(self, field, condition):
+        if not isinstance(condition, dict):
+            return self._rows(field, _check_scalar(field, "A filter value", condition))
+        if not condition:
+            raise ValueError(f"Empty operator dict for field {field!r}; give at least one operator, e.g. $eq.")
+
+        parts, low, high, include_low, include_high = [], None, None, True, True
+        for op, value in condition.items():
+            if op in ("$in", "$nin") and not isinstance(value, list):
+                raise ValueError(f"{op} needs a list of values for field {field!r}, got {value!r}.")
+            if op in ("$eq", "$ne", "$in", "$nin"):
+                for v in value if op in ("$in", "$nin") else [value]:
+                    _check_scalar(field, op, v)
+            if op == "$eq":
+                parts.append(self._rows(field, value))
+            elif op == "$in":
+                parts.append(_union([self._rows(field, v) for v in value]))
+            elif op in ("$ne", "$nin"):
+                excluded = [value] if op == "$ne" else value
+                parts.append(np.setdiff1d(self._all_with(field), _union([self._rows(field, v) for v in excluded]),
+                                          assume_unique=True))
+            elif op in _RANGE_OPS:
+                if not _is_number(value):
+                    raise ValueError(f"{op} needs a number, got {value!r} for field {field!r}.")
+                if op in ("$gt", "$gte"):
+                    low, include_low = value, op == "$gte"
+                else:
+                    high, include_high = value, op == "$lte"
+            else:
+                raise ValueError(f"Unknown operator {op!r} for field {field!r}.")
+        if low is not None or high is not None:
+            parts.append(self._range(field, low, high, include_low, include_high))
+        return _intersect(parts)
+
+
+def _intersect(arrays):
+    if not arrays:
+        raise ValueError("Nothing to intersect: a filter needs at least one condition.")
+    arrays = sorted(arrays, key=len)
+    result = arrays[0]
+    for rows in arrays[1:]:
+        if result.size == 0:
+            break
+        # Binary-search the smaller list in the larger one: O(small x log(large))
+        positions = np.minimum(np.searchsorted(rows, result), rows.size - 1)
+        result = result[rows[positions] == result] if rows.size else _EMPTY
+    return result
+
+
+def _union(arrays):
+    arrays = [rows for rows in arrays if rows.size]
+    if not arrays:
+        return _EMPTY
+    if len(arrays) == 1:
+        return arrays[0]
+    rows = np.sort(np.concatenate(arrays))
+    # Drop repeats (sorted, so they are neighbours); cheaper than np.unique's hashing
+    keep = np.empty(rows.size, dtype=bool)
+    keep[0] = True
+    np.not_equal(rows[1:], rows[:-1], out=keep[1:])
+    return rows[keep]
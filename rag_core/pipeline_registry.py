@@ -0,0 +1,53 @@
+"""
+🧩 The Pipeline Registry (Build Once, Reuse Every Rerun)
+
+The Goal: Stop rebuilding LLM clients, prompts and chains on every Streamlit rerun.
+
+The Algorithm: Memoization keyed by configuration.
+1. Key: Everything that changes what gets built, e.g. ("rag_chain", model, temperature, k).
+2. First request for a key runs the builder and times it.
+3. Every later request returns the same object and books the build time it
+   avoided as "saved", so the payoff is visible.
+
+Anything per-user (like the session's vector store) is NOT part of the
+pipeline; it is passed in at call time.
+"""
+
+import threading
+import time
+
+
+class PipelineRegistry:
+    """Process-wide cache of heavy pipeline objects, keyed by configuration."""
+
+    def __init__(self):
+        self._items = {}
+        self._build_seconds = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.reuses = 0
+        self.saved_seconds = 0.0
+
+    def get(self, key, builder):
+        with self._lock:
+            if key in self._items:
+                self.reuses += 1
+                self.saved_seconds += self._build_seconds[key]
+                return self._items[key]
+
+            start = time.perf_counter()
+            item = builder()
+            self._build_seconds[key] = time.perf_counter() - start
+            self._items[key] = item
+            self.builds += 1
+            return item
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pipelines": len(self._items),
+                "builds": self.builds,
+                "reuses": self.reuses,
+                "build_seconds": sum(self._build_seconds.values()),
+                "saved_seconds": self.saved_seconds,
+            }
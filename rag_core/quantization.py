@@ -0,0 +1,281 @@
+"""
+🧩 Quantized Vector Store (int8 / 1-bit Codes + Full-Precision Rescoring)
+
+The Goal: Keep tens of millions of 768-dim embeddings searchable without
+paying 3 KB of RAM per chunk.
+
+The Algorithm:
+1. Calibrate: Learn per-dimension statistics from a sample: either
+   `train(sample)` up front, or the first `train_size` rows added (until
+   then rows are only buffered in float32 and searched exactly).
+   - int8: each dimension's value range (clipped percentiles) is mapped
+     onto 256 levels -> 1 byte per dimension (4x smaller than float32).
+   - binary: each dimension's median is the threshold; one bit says
+     "above or below" -> 768 dims fit in 96 bytes (32x smaller).
+2. First Pass: Score the query against the compact codes only.
+   - int8: dot product against the codes, converted in cache-sized blocks.
+   - binary: Hamming distance (XOR + popcount) between bit codes.
+3. Rescore: Take the `k * rescore` best candidates and score them again
+   with their exact float32 vectors, which live on disk (memory-mapped)
+   and are only read for that shortlist.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from rag_core.vector_store import normalize_rows, top_k
+
+_BLOCK = 2048  # Codes dequantized per matrix product; small enough to stay in CPU cache
+MIN_TRAIN_ROWS = 1000  # Calibration sample size: percentiles / medians of a few rows are noise
+_ENCODE_BLOCK = 65_536  # Rows encoded at a time when (re)calibrating an existing store
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(codes):
+        return _POPCOUNT_TABLE[codes]
+
+
+def _grow(array, size, rows):
+    # Writes `rows` after the first `size` rows, doubling the capacity when full (amortized O(1) per row)
+    needed = size + rows.shape[0]
+    if array is None or needed > array.shape[0]:
+        capacity = max(needed, 1024, 2 * (0 if array is None else array.shape[0]))
+        grown = np.empty((capacity, rows.shape[1]), dtype=rows.dtype)
+        if array is not None:
+            grown[:size] = array[:size]
+        array = grown
+    array[size:needed] = rows
+    return array
+
+
+# --- QUANTIZERS ---
+class ScalarQuantizer:
+    """Per-dimension int8 quantization: value = low + code * step (code in 0..255)."""
+
+    def __init__(self, clip_percentile=0.1):
+        self.clip_percentile = clip_percentile
+        self.low = None
+        self.step = None
+
+    def train(self, vectors):
+        low = np.percentile(vectors, self.clip_percentile, axis=0)
+        high = np.percentile(vectors, 100 - self.clip_percentile, axis=0)
+        self.low = low.astype(np.float32)
+        self.step = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+
+    def encode(self, vectors):
+        codes = np.rint((vectors - self.low) / self.step)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes):
+        return self.low + codes.astype(np.float32) * self.step
+
+    def scores(self, codes, query):
+        # query . (low + code * step) = query . low + (query * step) . code
+        scaled = query * self.step
+        bias = float(query @ self.low)
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        buffer = np.empty((min(_BLOCK, codes.shape[0]), codes.shape[1]), dtype=np.float32)
+        for start in range(0, codes.shape[0], _BLOCK):
+            block = codes[start:start + _BLOCK]
+            np.copyto(buffer[:block.shape[0]], block, casting="unsafe")
+            out[start:start + block.shape[0]] = buffer[:block.shape[0]] @ scaled
+        return out + bias
+
+
+class BinaryQuantizer:
+    """One bit per dimension: is the value above that dimension's median?"""
+
+    def __init__(self):
+        self.threshold = None
+
+    def train(self, vectors):
+        self.threshold = np.median(vectors, axis=0).astype(np.float32)
+
+    def encode(self, vectors):
+        return np.packbits(vectors > self.threshold, axis=1)
+
+    def scores(self, codes, query):
+        # Fewer differing bits = more similar; negate so "higher is better" like cosine
+        query_bits = self.encode(query.reshape(1, -1))[0]
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], _BLOCK):
+            diff = np.bitwise_xor(codes[start:start + _BLOCK], query_bits)
+            out[start:start + _BLOCK] = -_popcount(diff).sum(axis=1, dtype=np.int32)
+        return out
+
+
+QUANTIZERS = {"int8": ScalarQuantizer, "binary": BinaryQuantizer}
+
+
+# --- THE STORE ---
+class QuantizedVectorStore:
+    """VectorStore-compatible `add` / `search` over quantized codes, rescored in float32."""
+
+    def __init__(self, dim, mode="int8", rescore=4, directory=None, train_size=MIN_TRAIN_ROWS):
+        if mode not in QUANTIZERS:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {sorted(QUANTIZERS)}.")
+        self.dim = dim
+        self.mode = mode
+        self.rescore = rescore  # Shortlist = k * rescore candidates
+        self.train_size = train_size  # Rows buffered before calibrating automatically
+        self.directory = directory
+        self.quantizer = QUANTIZERS[mode]()
+        self.texts = []
+        self.ids = []
+        self._codes = None
+        self._size = 0
+        self._full = None  # float32 rows in RAM when there is no directory
+        self._mmap = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path):
+                # Appending after someone else's rows would misalign every rescore
+                raise ValueError(f"{directory} already holds a store; open it with QuantizedVectorStore.load().")
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def is_trained(self):
+        return self._codes is not None
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.directory, "vectors.f32") if self.directory else None
+
+    @property
+    def codes(self):
+        return self._codes[:self._size]
+
+    def memory_usage(self):
+        """Bytes held in RAM by the codes vs. what a float32 matrix would need."""
+        code_bytes = self.codes.nbytes if self.is_trained else 0
+        return {
+            "code_bytes": code_bytes,
+            "float32_bytes": self._size * self.dim * 4,
+            "bytes_per_vector": code_bytes / self._size if self._size else 0.0,
+            "full_precision_on_disk": self.directory is not None,
+        }
+
+    def _append_codes(self, codes):
+        self._codes = _grow(self._codes, self._size, codes)
+
+    def _append_full(self, vectors):
+        if self.directory is None:
+            # No directory: the float32 rows stay in RAM (fine for tests, not for the memory goal)
+            self._full = _grow(self._full, self._size, vectors)
+            return
+        # Append-only raw float32 file; the memmap is reopened on the next rescore
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._mmap = None
+
+    def _full_rows(self, rows):
+        if self.directory is None:
+            return self._full[rows]
+        if self._mmap is None or self._mmap.shape[0] != self._size:
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._size, self.dim))
+        # Sorted row order turns the disk reads into a forward sweep
+        order = np.argsort(rows)
+        out = np.empty((rows.size, self.dim), dtype=np.float32)
+        out[order] = self._mmap[rows[order]]
+        return out
+
+    def train(self, sample):
+        """
+        Calibrates the quantizer on a representative sample (at least
+        `train_size` rows). Rows already in the store are re-encoded.
+        """
+        sample = normalize_rows(sample)
+        if sample.shape[0] < self.train_size:
+            raise ValueError(f"Need at least {self.train_size} sample rows to calibrate, got {sample.shape[0]}.")
+        self.quantizer.train(sample)
+        self._codes = self.quantizer.encode(sample[:0])
+        for start in range(0, self._size, _ENCODE_BLOCK):
+            rows = np.arange(start, min(start + _ENCODE_BLOCK, self._size))
+            self._codes = _grow(self._codes, start, self.quantizer.encode(self._full_rows(rows)))
+
+    def add(self, vectors, texts, ids=None):
+        vectors = normalize_rows(vectors)
+        texts = list(texts)
+        if len(texts) != vectors.shape[0]:
+            raise ValueError(f"Got {vectors.shape[0]} vectors but {len(texts)} texts.")
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}.")
+        if ids is None:
+            ids = [str(i) for i in range(self._size, self._size + len(texts))]
+        else:
+            ids = [str(i) for i in ids]
+            if len(ids) != len(texts):
+                raise ValueError(f"Got {len(ids)} ids but {len(texts)} texts.")
+        if self.is_trained:
+            self._append_codes(self.quantizer.encode(vectors))
+        self._append_full(vectors)
+        self._size += len(texts)
+        self.texts.extend(texts)
+        self.ids.extend(ids)
+        if not self.is_trained and self._size >= self.train_size:
+            # Enough rows buffered: they become the calibration sample
+            self.train(self._full_rows(np.arange(self._size)))
+        return ids
+
+    def search(self, query, k=3, rescore=None):
+        if self._size == 0:
+            return []
+        query = normalize_rows(query)[0]
+        if not self.is_trained:
+            # Still buffering the calibration sample: exact search over the float32 rows
+            shortlist = np.arange(self._size)
+        else:
+            shortlist = top_k(self.quantizer.scores(self.codes, query), k * (rescore or self.rescore))
+        if shortlist.size == 0:
+            return []
+        exact = self._full_rows(shortlist) @ query
+        return [
+            {"id": self.ids[shortlist[i]], "text": self.texts[shortlist[i]], "score": float(exact[i])}
+            for i in top_k(exact, k)
+        ]
+
+    # --- PERSISTENCE (float32 rows are already on disk) ---
+    def save(self):
+        if self.directory is None:
+            raise ValueError("Pass directory=... to save a QuantizedVectorStore.")
+        state = {}  # Empty while the calibration sample is still being buffered
+        if self.is_trained:
+            state["codes"] = self.codes
+            if self.mode == "int8":
+                state.update(low=self.quantizer.low, step=self.quantizer.step)
+            else:
+                state.update(threshold=self.quantizer.threshold)
+        np.savez(os.path.join(self.directory, "codes.npz"), **state)
+        with open(os.path.join(self.directory, "payload.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "mode": self.mode, "rescore": self.rescore, "train_size": self.train_size,
+                       "size": self._size, "texts": self.texts, "ids": self.ids}, f)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "payload.json"), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        store = cls(payload["dim"], mode=payload["mode"], rescore=payload["rescore"],
+                    train_size=payload.get("train_size", MIN_TRAIN_ROWS))
+        store.directory = directory
+        data = np.load(os.path.join(directory, "codes.npz"))
+        if "codes" in data:
+            if store.mode == "int8":
+                store.quantizer.low, store.quantizer.step = data["low"], data["step"]
+            else:
+                store.quantizer.threshold = data["threshold"]
+            store._codes = data["codes"]
+        store._size = payload.get("size", len(payload["ids"]))
+        store.texts = payload["texts"]
+        store.ids = payload["ids"]
+        # Rows appended after the last save() have no codes: drop them so file rows match code rows
+        with open(store.vectors_path, "r+b") as f:
+            f.truncate(store._size * store.dim * 4)
+        return store
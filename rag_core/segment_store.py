@@ -0,0 +1,367 @@
+"""
+🧩 Segment Store (Memory-Mapped, Append-Only Vector Files)
+
+The Goal: Open a store with millions of chunks instantly, instead of
+re-embedding (Day 4/5) or reloading everything into RAM on every run.
+
+The Algorithm:
+1. Segments: Vectors live in fixed-width float32 files (`seg-000001.vec`,
+   rows x dim, no header). Chunk text + metadata live in a separate
+   records file (`.txt`, one JSON record per row) with an offsets file
+   (`.off`, int64 end offset per row), plus the ids (`.ids`).
+   Search results carry {"id", "text", "metadata", "score"}.
+2. Append-Only Writes: New rows are appended to the newest segment until it
+   holds `segment_size` rows, then a fresh segment is started. After the
+   bytes are written, `manifest.json` is replaced atomically with the new
+   row counts, so a crash mid-write never exposes half a row.
+3. Zero-Copy Open: Opening reads the manifest and memory-maps the files.
+   Nothing is parsed up front, so startup cost does not grow with the
+   corpus, and every process that opens the store shares the OS page cache.
+4. Deletes + Compaction: `delete()` appends row numbers to a tombstone file
+   (`.del`); search skips them. `compact()` (optionally in a background
+   thread) copies the live rows of segments with tombstones into new
+   segments and swaps the manifest.
+"""
+
+import json
+import mmap
+import os
+import threading
+
+import numpy as np
+
+from rag_core.atomic_write import write_json_atomic
+from rag_core.vector_store import normalize_rows, top_k
+
+MANIFEST = "manifest.json"
+_EXTENSIONS = (".vec", ".off", ".txt", ".ids", ".del")
+
+
+class _Segment:
+    """Read-side view of one segment: memory-mapped vectors, offsets and records."""
+
+    def __init__(self, directory, name, dim, rows, text_bytes, id_bytes):
+        self.directory = directory
+        self.name = name
+        self.dim = dim
+        self.rows = rows
+        self.text_bytes = text_bytes
+        self.id_bytes = id_bytes
+        self.vectors = None
+        self.ends = None
+        self._records = None
+        self.deleted = np.zeros(rows, dtype=bool)
+        self.open()
+
+    def path(self, extension):
+        return os.path.join(self.directory, self.name + extension)
+
+    def open(self):
+        # Swap in fresh maps without closing the old ones: a search on another
+        # thread may still be reading them (they are released once unreferenced)
+        if self.rows:
+            self.vectors = np.memmap(self.path(".vec"), dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+            self.ends = np.memmap(self.path(".off"), dtype=np.int64, mode="r", shape=(self.rows,))
+            with open(self.path(".txt"), "rb") as f:
+                self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.vectors = np.empty((0, self.dim), dtype=np.float32)
+            self.ends = np.empty(0, dtype=np.int64)
+        deleted = np.zeros(self.rows, dtype=bool)
+        if os.path.exists(self.path(".del")):
+            rows = np.fromfile(self.path(".del"), dtype=np.int64)
+            deleted[rows[rows < self.rows]] = True
+        self.deleted = deleted
+
+    def close(self):
+        # Drop references; the OS unmaps once no array views remain
+        self.vectors = self.ends = self._records = None
+
+    @property
+    def live_rows(self):
+        return self.rows - int(self.deleted.sum())
+
+    def record(self, row):
+        start = int(self.ends[row - 1]) if row else 0
+        return json.loads(self._records[start:int(self.ends[row])])
+
+    def ids(self):
+        if not self.rows:
+            return []
+        with open(self.path(".ids"), "rb") as f:
+            return [json.loads(line) for line in f.read(self.id_bytes).splitlines()]
+
+    def scores(self, query):
+        if not self.rows:
+            return np.empty(0, dtype=np.float32)
+        scores = self.vectors @ query
+        scores[self.deleted] = -np.inf
+        return scores
+
+    def manifest_entry(self):
+        return {"name": self.name, "rows": self.rows, "text_bytes": self.text_bytes, "id_bytes": self.id_bytes}
+
+
+class SegmentStore:
+    """Disk-backed vector store: `add` / `search` / `delete` over memory-mapped segments."""
+
+    def __init__(self, directory, dim=None, segment_size=100_000, readonly=False):
+        self.directory = directory
+        self.dim = dim
+        self.segment_size = segment_size
+        self.readonly = readonly
+        self.segments = []
+        self._next_segment = 1
+        self._id_map = None  # id -> [(segment name, row)], built on first delete
+        self._lock = threading.RLock()
+        self._compacting = False
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        self.refresh()
+        if not readonly:
+            self._remove_orphans()
+
+    def __len__(self):
+        return sum(segment.live_rows for segment in self.segments)
+
+    # --- MANIFEST ---
+    def refresh(self):
+        """(Re)reads the manifest; readers call this to see rows added by a writer."""
+        path = os.path.join(self.directory, MANIFEST)
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        with self._lock:
+            if self.dim is not None and manifest["dim"] != self.dim:
+                raise ValueError(f"Store at {self.directory} holds {manifest['dim']}-dim vectors, not {self.dim}.")
+            self.dim = manifest["dim"]
+            self.segment_size = manifest.get("segment_size", self.segment_size)
+            self._next_segment = manifest["next_segment"]
+            for segment in self.segments:
+                segment.close()
+            self.segments = [_Segment(self.directory, e["name"], self.dim, e["rows"], e["text_bytes"], e["id_bytes"])
+                             for e in manifest["segments"]]
+            self._id_map = None
+            if not self.readonly:
+                self._truncate_uncommitted()
+
+    def _commit(self):
+        write_json_atomic(os.path.join(self.directory, MANIFEST), {
+            "dim": self.dim,
+            "segment_size": self.segment_size,
+            "next_segment": self._next_segment,
+            "segments": [segment.manifest_entry() for segment in self.segments],
+        })
+
+    def _truncate_uncommitted(self):
+        # Bytes past the committed row counts come from an interrupted write
+        if not self.segments:
+            return
+        segment = self.segments[-1]
+        sizes = {".vec": segment.rows * self.dim * 4, ".off": segment.rows * 8,
+                 ".txt": segment.text_bytes, ".ids": segment.id_bytes}
+        for extension, size in sizes.items():
+            path = segment.path(extension)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _remove_orphans(self):
+        # Files of segments missing from the manifest come from an interrupted compaction
+        live = {segment.name for segment in self.segments}
+        for filename in os.listdir(self.directory):
+            name, extension = os.path.splitext(filename)
+            if filename.startswith("seg-") and extension in _EXTENSIONS and name not in live:
+                os.remove(os.path.join(self.directory, filename))
+
+    def _new_segment(self):
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        return _Segment(self.directory, name, self.dim, 0, 0, 0)
+
+    # --- WRITE PATH ---
+    def _append(self, segment, vectors, records, ids):
+        encoded = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in records]
+        ends = segment.text_bytes + np.cumsum([len(e) for e in encoded], dtype=np.int64)
+        id_lines = b"".join(json.dumps(i).encode("utf-8") + b"\n" for i in ids)
+        with open(segment.path(".vec"), "ab") as f:
+            np.ascontiguousarray(vectors, dtype=np.float32).tofile(f)
+        with open(segment.path(".off"), "ab") as f:
+            ends.tofile(f)
+        with open(segment.path(".txt"), "ab") as f:
+            f.write(b"".join(encoded))
+        with open(segment.path(".ids"), "ab") as f:
+            f.write(id_lines)
+        segment.rows += len(records)
+        segment.text_bytes = int(ends[-1])
+        segment.id_bytes += len(id_lines)
+
+    def add(self, vectors, texts, ids=None, metadatas=None):
+        if self.readonly:
+            raise ValueError("This SegmentStore was opened read-only.")
+        vectors = normalize_rows(vectors)
+        texts = list(texts)
+        if len(texts) != vectors.shape[0]:
+            raise ValueError(f"Got {vectors.shape[0]} vectors but {len(texts)} texts.")
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(texts)
+        if len(metadatas) != len(texts):
+            raise ValueError(f"Got {len(metadatas)} metadatas but {len(texts)} texts.")
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}.")
+            if ids is None:
+                start = sum(segment.rows for segment in self.segments)
+                ids = [str(i) for i in range(start, start + len(texts))]
+            else:
+                ids = [str(i) for i in ids]
+                if len(ids) != len(texts):
+                    raise ValueError(f"Got {len(ids)} ids but {len(texts)} texts.")
+
+            done, touched = 0, []
+            while done < len(texts):
+                if not self.segments or self.segments[-1].rows >= self.segment_size:
+                    self.segments.append(self._new_segment())
+                segment = self.segments[-1]
+                touched.append(segment)
+                take = min(self.segment_size - segment.rows, len(texts) - done)
+                rows = slice(done, done + take)
+                first_row = segment.rows
+                records = [{"id": i, "text": t, "metadata": m}
+                           for i, t, m in zip(ids[rows], texts[rows], metadatas[rows])]
+                self._append(segment, vectors[rows], records, ids[rows])
+                if self._id_map is not None:
+                    for offset, id_ in enumerate(ids[rows]):
+                        self._id_map.setdefault(id_, []).append((segment.name, first_row + offset))
+                done += take
+            # Publish the new rows only after every byte is on disk
+            self._commit()
+            for segment in touched:
+                segment.open()
+        return ids
+
+    def delete(self, ids):
+        """Tombstones every row with one of `ids`. Returns how many rows were deleted."""
+        if self.readonly:
+            raise ValueError("This SegmentStore was opened read-only.")
+        with self._lock:
+            by_name = {segment.name: segment for segment in self.segments}
+            tombstones = {}
+            for id_ in ids:
+                for name, row in self._ids().get(str(id_), []):
+                    if not by_name[name].deleted[row]:
+                        tombstones.setdefault(name, []).append(row)
+            for name, rows in tombstones.items():
+                self._tombstone(by_name[name], rows)
+            return sum(len(rows) for rows in tombstones.values())
+
+    def _tombstone(self, segment, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        with open(segment.path(".del"), "ab") as f:
+            f.write(rows.tobytes())
+        segment.deleted[rows] = True
+
+    def ids(self):
+        """IDs of every live (not deleted) row, in row order."""
+        with self._lock:
+            return [id_ for segment in self.segments
+                    for id_, deleted in zip(segment.ids(), segment.deleted) if not deleted]
+
+    def __contains__(self, id_):
+        """True if a live row has this ID."""
+        with self._lock:
+            by_name = {segment.name: segment for segment in self.segments}
+            return any(not by_name[name].deleted[row] for name, row in self._ids().get(str(id_), []))
+
+    def _ids(self):
+        if self._id_map is None:
+            self._id_map = {}
+            for segment in self.segments:
+                for row, id_ in enumerate(segment.ids()):
+                    self._id_map.setdefault(id_, []).append((segment.name, row))
+        return self._id_map
+
+    # --- READ PATH ---
+    def search(self, query, k=3):
+        query = normalize_rows(query)[0]
+        with self._lock:
+            segments = list(self.segments)
+        candidates = []  # (score, segment, row), k best per segment
+        for segment in segments:
+            scores = segment.scores(query)
+            for row in top_k(scores, k):
+                if np.isfinite(scores[row]):
+                    candidates.append((float(scores[row]), segment, int(row)))
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        # Only the k winners have their records parsed
+        return [dict(segment.record(row), score=score) for score, segment, row in candidates[:k]]
+
+    # --- COMPACTION ---
+    def compact(self, min_deleted_ratio=0.0):
+        """Rewrites segments whose tombstoned share exceeds `min_deleted_ratio`. Returns rows dropped."""
+        if self.readonly:
+            raise ValueError("This SegmentStore was opened read-only.")
+        with self._lock:
+            if self._compacting:
+                return 0
+            # Never compact the segment that is still being appended to
+            victims = [s for s in self.segments[:-1] if s.rows and s.deleted.sum() / s.rows > min_deleted_ratio]
+            if not victims:
+                return 0
+            self._compacting = True
+            snapshots = {s.name: s.deleted.copy() for s in victims}
+            output = self._new_segment()
+        try:
+            # The heavy copying runs without the lock; searches and appends continue
+            new_rows = {}
+            for segment in victims:
+                live = np.flatnonzero(~snapshots[segment.name])
+                mapping = np.full(segment.rows, -1, dtype=np.int64)
+                mapping[live] = output.rows + np.arange(live.size)
+                new_rows[segment.name] = mapping
+                ids = segment.ids()
+                for start in range(0, live.size, 10_000):
+                    block = live[start:start + 10_000]
+                    self._append(output, segment.vectors[block], [segment.record(r) for r in block],
+                                 [ids[r] for r in block])
+            output.open()
+
+            with self._lock:
+                # Carry over deletes that arrived while we were copying
+                late = []
+                for segment in victims:
+                    rows = np.flatnonzero(segment.deleted & ~snapshots[segment.name])
+                    late.extend(new_rows[segment.name][rows].tolist())
+                if late:
+                    self._tombstone(output, late)
+                position = self.segments.index(victims[0])
+                kept = [s for s in self.segments if s not in victims]
+                self.segments = kept[:position] + ([output] if output.rows else []) + kept[position:]
+                self._commit()
+                self._id_map = None
+            # Searches that grabbed the old segments keep their maps until they finish
+            for segment in victims:
+                for extension in _EXTENSIONS:
+                    if os.path.exists(segment.path(extension)):
+                        os.remove(segment.path(extension))
+            if not output.rows:
+                for extension in _EXTENSIONS:
+                    if os.path.exists(output.path(extension)):
+                        os.remove(output.path(extension))
+            return sum(int(snapshots[s.name].sum()) for s in victims)
+        finally:
+            self._compacting = False
+
+    def compact_in_background(self, min_deleted_ratio=0.2):
+        """Starts `compact()` on a daemon thread and returns the thread."""
+        thread = threading.Thread(target=self.compact, args=(min_deleted_ratio,), daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        with self._lock:
+            for segment in self.segments:
+                segment.close()
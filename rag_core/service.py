@@ -0,0 +1,305 @@
+"""
+🧩 Async RAG Service (Many Chats, One Process)
+
+The Goal: Serve hundreds of concurrent users from one process, instead of
+one blocking script per user.
+
+The Algorithm:
+1. Micro-Batch: Questions that arrive within a few milliseconds of each
+   other are embedded in ONE batch request (up to the backend's batch
+   limit), so 100 users cost 1 round trip instead of 100.
+2. Retrieve: The vector search runs on a small thread pool; NumPy releases
+   the GIL during the matrix product, so the event loop keeps serving.
+3. Generate: LLM calls run on their own threads, capped by a semaphore, so
+   a traffic spike queues up instead of blowing through the quota.
+4. Serve: A tiny JSON-over-HTTP server (standard library only):
+   POST /ask {"question", "k"}, POST /retrieve {"question", "k"}, GET /stats,
+   and GET /metrics (per-stage timings in Prometheus text format).
+
+Run it over a PDF (Gemini) or fully offline with stub backends:
+
+    python -m rag_core.service --pdf Day_05_Chat_with_PDF/document.pdf
+    python -m rag_core.service --pdf Day_05_Chat_with_PDF/document.pdf --stub
+    curl -d '{"question": "What is the currency on Mars?"}' localhost:8000/ask
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rag_core.conversation_memory import estimate_tokens
+from rag_core.tracing import token_usage, tracer as default_tracer
+
+MAX_BODY_BYTES = 1 << 20  # Larger request bodies are refused (413) before any of it is read
+
+PROMPT_TEMPLATE = """
+Answer the question based ONLY on the context below.
+### CONTEXT:
+{context}
+### QUESTION:
+{question}
+"""
+
+
+# --- MICRO-BATCHING ---
+class MicroBatcher:
+    """Coalesces concurrent `embed(text)` calls into `embed_many(texts)` batches."""
+
+    def __init__(self, embed_many, max_batch_size=100, window=0.005, executor=None):
+        self.embed_many = embed_many  # Blocking: list of texts -> (n, dim) matrix
+        self.max_batch_size = max_batch_size
+        self.window = window  # Seconds to wait for more questions after the first one
+        self.executor = executor
+        self.batches = 0
+        self.texts = 0
+        self._pending = []  # (text, future)
+        self._timer = None
+        self._tasks = set()  # Running batches; the loop only keeps weak references to tasks
+
+    async def embed(self, text):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        self.batches += 1
+        self.texts += len(batch)
+        loop = asyncio.get_running_loop()
+        try:
+            vectors = await loop.run_in_executor(self.executor, self.embed_many, [text for text, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+        }
+
+
+# --- THE SERVICE ---
+class RAGService:
+    """
+    embed query -> search -> generate, for many concurrent callers.
+
+    `embedder` is an EmbeddingClient (or anything with `embed(texts)`),
+    `search(question, query_vec, k)` returns [{"text", "score", ...}]
+    (HybridRetriever.search fits as-is), and `llm` has `invoke(prompt)`.
+    """
+
+    def __init__(self, embedder, search, llm, retrieval_workers=4, max_generations=32,
+                 batch_window=0.005, max_batch_size=None, tracer=None):
+        self.tracer = tracer or default_tracer
+        self.search_fn = search
+        self.llm = llm
+        self.max_generations = max_generations
+        self._embed_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="embed")
+        self._retrieval_pool = ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="retrieve")
+        self._generation_pool = ThreadPoolExecutor(max_workers=max_generations, thread_name_prefix="generate")
+        self.batcher = MicroBatcher(
+            embedder.embed,
+            max_batch_size=max_batch_size or getattr(embedder, "batch_size", 100),
+            window=batch_window,
+            executor=self._embed_pool,
+        )
+        self._generations = None  # asyncio.Semaphore, created inside the running loop
+        self.requests = 0
+        self.active_generations = 0
+        self.queued_generations = 0
+
+    async def retrieve(self, question, k=3):
+        with self.tracer.span("embed_query", items=1):
+            query_vec = await self.batcher.embed(question)
+        loop = asyncio.get_running_loop()
+        with self.tracer.span("search") as span:
+            sources = await loop.run_in_executor(self._retrieval_pool, self.search_fn, question, query_vec, k)
+            span.set(items=len(sources))
+        return sources
+
+    async def ask(self, question, k=3):
+        self.requests += 1
+        with self.tracer.trace("ask"):
+            start = time.perf_counter()
+            sources = await self.retrieve(question, k)
+            retrieved = time.perf_counter()
+
+            prompt = PROMPT_TEMPLATE.format(context="\n\n".join(s["text"] for s in sources), question=question)
+            if self._generations is None:
+                self._generations = asyncio.Semaphore(self.max_generations)
+            self.queued_generations += 1
+            with self.tracer.span("generation_queue"):
+                await self._generations.acquire()
+            self.queued_generations -= 1
+            self.active_generations += 1
+            try:
+                with self.tracer.span("generate", prompt_tokens=estimate_tokens(prompt)) as span:
+                    loop = asyncio.get_running_loop()
+                    response = await loop.run_in_executor(self._generation_pool, self.llm.invoke, prompt)
+                    span.set(response_tokens=token_usage(response)[1])
+            finally:
+                self.active_generations -= 1
+                self._generations.release()
+        answer = getattr(response, "content", getattr(response, "text", response))
+
+        return {
+            "answer": answer if isinstance(answer, str) else str(answer),
+            "sources": sources,
+            "timings": {
+                "retrieve": retrieved - start,
+                "generate": time.perf_counter() - retrieved,
+                "total": time.perf_counter() - start,
+            },
+        }
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "active_generations": self.active_generations,
+            "queued_generations": self.queued_generations,
+            "embedding": self.batcher.stats(),
+        }
+
+    def close(self):
+        for pool in (self._embed_pool, self._retrieval_pool, self._generation_pool):
+            pool.shutdown(wait=False)
+
+
+# --- HTTP (JSON in, JSON out) ---
+async def _handle(service, reader, writer):
+    status, payload = 200, None
+    try:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length < 0:
+            raise ValueError(f"Content-Length must not be negative, got {length}.")
+
+        method, path = request_line[0], request_line[1]
+        if length > MAX_BODY_BYTES:
+            status, payload = 413, {"error": f"Request body over {MAX_BODY_BYTES} bytes."}
+        elif method == "GET" and path == "/metrics":
+            payload = service.tracer.prometheus_text()
+        elif method == "GET" and path == "/stats":
+            payload = service.stats()
+        elif method == "POST" and path in ("/ask", "/retrieve"):
+            data = json.loads(await reader.readexactly(length) or b"{}")
+            if not isinstance(data, dict):
+                raise ValueError("the body must be a JSON object.")
+            question, k = str(data.get("question", "")).strip(), int(data.get("k", 3))
+            if not question:
+                status, payload = 400, {"error": "'question' is required."}
+            elif path == "/ask":
+                payload = await service.ask(question, k)
+            else:
+                payload = {"sources": await service.retrieve(question, k)}
+        else:
+            status, payload = 404, {"error": f"No route for {method} {path}."}
+    except (ValueError, IndexError, asyncio.IncompleteReadError) as exc:
+        status, payload = 400, {"error": f"Bad request: {exc}"}
+    except Exception as exc:
+        status, payload = 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    if isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Content Too Large", 500: "Internal Server Error"}[status]
+    writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(service, host="127.0.0.1", port=8000):
+    server = await asyncio.start_server(lambda r, w: _handle(service, r, w), host, port, backlog=1024)
+    print(f"RAG service listening on http://{host}:{port} (POST /ask, POST /retrieve, GET /stats, GET /metrics)")
+    async with server:
+        await server.serve_forever()
+
+
+# --- EXECUTION ---
+def build_pdf_service(pdf_path, stub=False, chunk_size=1000, overlap=100, **service_kwargs):
+    """Day 5's pipeline (chunk -> embed -> hybrid search -> generate) behind a RAGService."""
+    from rag_core.bm25 import BM25Index
+    from rag_core.chunking import iter_chunks, iter_pdf_pages
+    from rag_core.embeddings import EmbeddingClient, FakeEmbeddingBackend, GeminiEmbeddingBackend
+    from rag_core.hybrid import HybridRetriever
+    from rag_core.vector_store import normalize_rows
+
+    if stub:
+        from rag_core.streaming import StubStreamingLLM
+
+        embedder = EmbeddingClient(FakeEmbeddingBackend(latency=0.05))
+        llm = StubStreamingLLM(delay=0.01)
+    else:
+        from dotenv import load_dotenv
+
+        from rag_core.backends import gemini_chat
+
+        load_dotenv(dotenv_path=".env")
+        embedder = EmbeddingClient(GeminiEmbeddingBackend(api_key=os.getenv("GEMINI_API_KEY")))
+        llm = gemini_chat("gemini-2.0-flash", api_key=os.getenv("GEMINI_API_KEY"))
+
+    chunks = list(iter_chunks(iter_pdf_pages(pdf_path), chunk_size, overlap))
+    bm25 = BM25Index()
+    bm25.add(chunks)
+    retriever = HybridRetriever(normalize_rows(embedder.embed(chunks)), chunks, bm25)
+    print(f"Indexed {len(chunks)} chunks from {pdf_path}.")
+    return RAGService(embedder, retriever.search, llm, **service_kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async RAG service over one PDF.")
+    parser.add_argument("--pdf", required=True)
+    parser.add_argument("--stub", action="store_true", help="Offline fake embedder + stub LLM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-generations", type=int, default=32)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    service = build_pdf_service(args.pdf, stub=args.stub, max_generations=args.max_generations,
+                                batch_window=args.batch_window_ms / 1000)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+🧩 Sharded Store (One Memory-Mapped Shard per Worker Process)
+
+The Goal: A single process scanning a multi-million-chunk store uses one
+core. Split the chunks into shards and let every core scan its own.
+
+The Algorithm: Scatter -> Scan -> Gather.
+1. Shards: The store is N SegmentStores (`shard-0000/`, `shard-0001/`...)
+   listed in `shards.json`. New chunks go to the smallest shards first, so
+   shard sizes stay even as the store grows.
+2. Workers: Each worker process (spawned, so a threaded host is safe) opens
+   its shards read-only (memory-mapped, so they share the OS page cache
+   with the writer and with each other) and waits on a pipe. Shard i
+   belongs to worker i % workers.
+3. Scatter: `search(query, k)` sends the query to every worker at once;
+   each worker scans its shards and answers with its own top-k.
+4. Gather: The workers' top-k lists are merged into the global top-k
+   (at most workers x k candidates, deduplicated by id).
+5. Rebalance: When a shard grows past `max_shard_rows`, shards are added
+   and chunks are moved from the biggest shards into the new ones in
+   bounded steps. Each step is recorded in `shards.json` before it starts,
+   so an interrupted move is finished (or dropped) on the next open.
+
+Same `search(query, k)` results as the Day 4 store:
+{"id", "text", "metadata", "score"}.
+"""
+
+import json
+import math
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+
+from rag_core.atomic_write import write_json_atomic
+from rag_core.segment_store import SegmentStore
+
+MANIFEST = "shards.json"
+MOVE_BATCH = 50_000  # Rows copied per rebalancing step (bounds memory and redo work)
+GROWTH_FILL = 0.75  # After growing, shards are at most this full
+
+
+def _shard_name(number):
+    return f"shard-{number:04d}"
+
+
+def _best(hits, k):
+    # Merge top-k lists: one copy per id (an interrupted move can leave two), best score first
+    unique = {}
+    for hit in hits:
+        if hit["id"] not in unique or hit["score"] > unique[hit["id"]]["score"]:
+            unique[hit["id"]] = hit
+    return sorted(unique.values(), key=lambda hit: hit["score"], reverse=True)[:k]
+
+
+def _fill_plan(sizes, count):
+    """How many of `count` new rows each shard gets so the smallest ones fill up first."""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    order = np.argsort(sizes, kind="stable")
+    ordered = sizes[order]
+    # Water-filling: raise the j smallest shards to a common level
+    for j in range(1, len(ordered) + 1):
+        level = (count + int(ordered[:j].sum())) / j
+        if j == len(ordered) or level <= ordered[j]:
+            break
+    plan = np.zeros(len(sizes), dtype=np.int64)
+    shares = np.maximum(0, math.floor(level) - ordered[:j])
+    shares[:count - int(shares.sum())] += 1  # Hand out the remainder one row each
+    plan[order[:j]] = shares
+    return plan
+
+
+def _take_rows(store, count):
+    """Copies the first `count` live rows of `store`: (vectors, texts, ids, metadatas)."""
+    vectors, texts, ids, metadatas = [], [], [], []
+    for segment in list(store.segments):
+        if len(ids) >= count:
+            break
+        rows = np.flatnonzero(~segment.deleted)[:count - len(ids)]
+        vectors.append(np.asarray(segment.vectors[rows]))
+        for row in rows:
+            record = segment.record(int(row))
+            texts.append(record["text"])
+            ids.append(record["id"])
+            metadatas.append(record["metadata"])
+    vectors = np.concatenate(vectors) if vectors else np.empty((0, store.dim), dtype=np.float32)
+    return vectors, texts, ids, metadatas
+
+
+# --- WORKER PROCESS ---
+def _serve(directory, names, conn):
+    stores, generation = [], None
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        try:
+            current, query, k = message
+            if current != generation:
+                # The writer changed something: see the new rows / shards
+                for store in stores:
+                    store.close()
+                stores = [SegmentStore(os.path.join(directory, name), readonly=True) for name in names]
+                generation = current
+            hits = []
+            for store in stores:
+                hits.extend(store.search(query, k))
+            conn.send(_best(hits, k))
+        except Exception as exc:
+            conn.send(exc)
+    for store in stores:
+        store.close()
+    conn.close()
+
+
+class ShardedStore:
+    """N SegmentStores searched in parallel by worker processes, merged into one top-k."""
+
+    def __init__(self, directory, num_shards=4, dim=None, workers=None, max_shard_rows=1_000_000,
+                 segment_size=100_000):
+        self.directory = directory
+        self.dim = dim
+        self.workers = workers
+        self.max_shard_rows = max_shard_rows
+        self.segment_size = segment_size
+        self.shards = []  # [(name, SegmentStore)]
+        self.generation = 0  # Bumped on every write; workers reopen their shards when it changes
+        self._pool = []  # [(process, connection)]
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        manifest = self._load_manifest()
+        names = manifest["shards"] if manifest else [_shard_name(i) for i in range(num_shards)]
+        self._open_shards(names)
+        if manifest is None:
+            self._commit()
+        elif manifest.get("move"):
+            self._finish_move(manifest["move"])
+
+    def __len__(self):
+        return sum(len(store) for _, store in self.shards)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- MANIFEST ---
+    def _load_manifest(self):
+        path = os.path.join(self.directory, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if self.dim is not None and manifest["dim"] not in (None, self.dim):
+            raise ValueError(f"Store at {self.directory} holds {manifest['dim']}-dim vectors, not {self.dim}.")
+        self.dim = manifest["dim"]
+        self.max_shard_rows = manifest.get("max_shard_rows", self.max_shard_rows)
+        return manifest
+
+    def _commit(self, move=None):
+        write_json_atomic(os.path.join(self.directory, MANIFEST), {
+            "dim": self.dim,
+            "max_shard_rows": self.max_shard_rows,
+            "shards": [name for name, _ in self.shards],
+            "move": move,
+        })
+
+    def _open_shards(self, names):
+        opened = dict(self.shards)
+        self.shards = [(name, opened.get(name) or SegmentStore(os.path.join(self.directory, name), dim=self.dim,
+                                                                segment_size=self.segment_size))
+                       for name in names]
+
+    def shard_sizes(self):
+        return [len(store) for _, store in self.shards]
+
+    # --- WRITE PATH ---
+    def add(self, vectors, texts, ids=None, metadatas=None):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        texts = list(texts)
+        if len(texts) != vectors.shape[0]:
+            raise ValueError(f"Got {vectors.shape[0]} vectors but {len(texts)} texts.")
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(texts)
+        with self._lock:
+            if ids is None:
+                start = len(self)
+                ids = [str(i) for i in range(start, start + len(texts))]
+            ids = [str(i) for i in ids]
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._commit()
+
+            done = 0
+            for (_, store), count in zip(self.shards, _fill_plan(self.shard_sizes(), len(texts))):
+                if count:
+                    rows = slice(done, done + int(count))
+                    store.add(vectors[rows], texts[rows], ids=ids[rows], metadatas=metadatas[rows])
+                    done += int(count)
+            self.generation += 1
+            if max(self.shard_sizes()) > self.max_shard_rows:
+                self.rebalance(math.ceil(len(self) / (self.max_shard_rows * GROWTH_FILL)))
+        return ids
+
+    def delete(self, ids):
+        """Deletes every chunk with one of `ids`, whichever shard holds it. Returns rows deleted."""
+        ids = list(ids)
+        with self._lock:
+            deleted = sum(store.delete(ids) for _, store in self.shards)
+            self.generation += 1
+        return deleted
+
+    # --- REBALANCING ---
+    def rebalance(self, num_shards=None):
+        """
+        Grows to `num_shards` shards (never shrinks) and moves chunks from the
+        biggest shards to the smallest until sizes differ by at most one move
+        step. Returns how many rows were moved.
+        """
+        with self._lock:
+            names = [name for name, _ in self.shards]
+            for number in range(len(names), max(num_shards or 0, len(names))):
+                names.append(_shard_name(number))
+            self._open_shards(names)
+            self._commit()
+            # Workers are bound to the old shard list
+            self._stop_pool()
+
+            moved = 0
+            while True:
+                sizes = self.shard_sizes()
+                source, target = int(np.argmax(sizes)), int(np.argmin(sizes))
+                count = min(MOVE_BATCH, (sizes[source] - sizes[target]) // 2)
+                if count <= 0 or sizes[source] - sizes[target] <= 1:
+                    break
+                vectors, texts, ids, metadatas = _take_rows(self.shards[source][1], count)
+                move = {"from": self.shards[source][0], "to": self.shards[target][0], "ids": ids}
+                self._commit(move)
+                self.shards[target][1].add(vectors, texts, ids=ids, metadatas=metadatas)
+                self.shards[source][1].delete(ids)
+                self._commit()
+                moved += len(ids)
+            for _, store in self.shards:
+                store.compact()
+            self.generation += 1
+            return moved
+
+    def _finish_move(self, move):
+        # The copy into "to" is one atomic SegmentStore.add: if it landed, drop the originals
+        stores = dict(self.shards)
+        target, source = stores[move["to"]], stores[move["from"]]
+        if move["ids"] and move["ids"][-1] in target:
+            source.delete(move["ids"])
+        self._commit()
+
+    # --- READ PATH ---
+    def start(self, workers=None):
+        """Starts the worker processes (search() also starts them on first use)."""
+        with self._lock:
+            self._stop_pool()
+            count = min(workers or self.workers or os.cpu_count() or 1, len(self.shards))
+            names = [name for name, _ in self.shards]
+            # Spawned, not forked: the host process may have threads (e.g. the service's pools)
+            context = multiprocessing.get_context("spawn")
+            for worker in range(count):
+                parent, child = context.Pipe()
+                process = context.Process(target=_serve, args=(self.directory, names[worker::count], child),
+                                          daemon=True)
+                process.start()
+                child.close()
+                self._pool.append((process, parent))
+
+    def search(self, query, k=3):
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self.workers == 0:
+                # In-process scan, shard after shard (the single-core baseline)
+                return _best([hit for _, store in self.shards for hit in store.search(query, k)], k)
+            if not self._pool:
+                self.start()
+            for _, conn in self._pool:
+                conn.send((self.generation, query, k))
+            # Read every answer before raising, or the unread ones would answer the next search
+            answers = [conn.recv() for _, conn in self._pool]
+            for answer in answers:
+                if isinstance(answer, Exception):
+                    raise answer
+            return _best([hit for answer in answers for hit in answer], k)
+
+    def _stop_pool(self):
+        for process, conn in self._pool:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            conn.close()
+            process.join(timeout=5)
+        self._pool = []
+
+    def close(self):
+        with self._lock:
+            self._stop_pool()
+            for _, store in self.shards:
+                store.close()
@@ -0,0 +1,80 @@
+"""
+🧩 Token Streaming
+
+The Goal: Show the answer while it is being written instead of after it is done.
+
+The Algorithm:
+1. Ask the LLM for a stream (`llm.stream(prompt)`) instead of one blocking call.
+2. Hand every new piece to a callback (e.g. re-render a Streamlit container).
+3. Record time-to-first-token (TTFT) and total time.
+4. Cancellation: if the cancel event is set, or the caller is interrupted,
+   close the stream. Closing the generator closes the HTTP response, so the
+   provider stops generating too.
+
+`StubStreamingLLM` yields canned tokens with a configurable delay, so the
+whole loop can be exercised offline.
+"""
+
+import threading
+import time
+
+
+class StubChunk:
+    """Looks like a LangChain AIMessageChunk as far as `.content` goes."""
+
+    def __init__(self, content):
+        self.content = content
+
+
+class StubStreamingLLM:
+    """Offline LLM: streams `text` word by word, sleeping `delay` seconds per token."""
+
+    def __init__(self, text=None, delay=0.05):
+        self.text = text or (
+            "This is a stubbed answer streamed one token at a time, "
+            "so the chat UI can be tested without a Gemini key."
+        )
+        self.delay = delay
+        self.tokens_sent = 0
+
+    def stream(self, prompt):
+        for i, word in enumerate(self.text.split(" ")):
+            time.sleep(self.delay)
+            self.tokens_sent += 1
+            yield StubChunk(word if i == 0 else " " + word)
+
+    def invoke(self, prompt):
+        return StubChunk("".join(chunk.content for chunk in self.stream(prompt)))
+
+
+class StreamResult:
+    def __init__(self, text, ttft, total, cancelled):
+        self.text = text
+        self.ttft = ttft  # Seconds until the first token (None if nothing arrived)
+        self.total = total
+        self.cancelled = cancelled
+
+
+def stream_answer(llm, prompt, on_token, cancel_event=None):
+    """Streams `prompt` through `llm`, calling on_token(text_so_far) per chunk."""
+    cancel_event = cancel_event or threading.Event()
+    start = time.perf_counter()
+    ttft = None
+    text = ""
+    cancelled = False
+
+    stream = llm.stream(prompt)
+    try:
+        for chunk in stream:
+            if cancel_event.is_set():
+                cancelled = True
+                break
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            text += chunk.content if isinstance(chunk.content, str) else str(chunk.content)
+            on_token(text)
+    finally:
+        # Runs on break, on errors, and when Streamlit interrupts the script
+        stream.close()
+
+    return StreamResult(text, ttft, time.perf_counter() - start, cancelled)
@@ -0,0 +1,377 @@
+"""
+🧩 Tracing (Where Did the Time Go?)
+
+The Goal: When a question is slow, see whether parsing, chunking, embedding,
+search or generation is to blame, without a tracing vendor.
+
+The Algorithm:
+1. Span: `with tracer.span("embed", items=100):` records wall time plus
+   counts (items, prompt/response tokens). Spans nest: a span opened inside
+   another becomes its child (tracked per thread / asyncio task).
+2. Trace: `with tracer.trace("question"):` is the root span of one request;
+   afterwards `tracer.last_trace` holds all of its spans, e.g. for a
+   per-request timing panel.
+3. Decorate: `@tracer.traced("load_pdf")` wraps a function. If it returns a
+   generator, the span times only the work done inside the generator while
+   it is consumed (not the consumer's work in between) and counts the
+   yielded items.
+4. Aggregate + Export: Every finished span updates per-stage counters and a
+   latency histogram. `prometheus_text()` renders them in Prometheus text
+   format; with `jsonl_path` set (or RAG_TRACE_FILE), every finished trace
+   is appended to a JSON lines file.
+
+`langchain_callbacks(tracer)` turns LangChain chain / LLM / retriever runs
+(Day 7-9) into spans as well.
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from rag_core.conversation_memory import estimate_tokens
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNTERS = ("items", "prompt_tokens", "response_tokens")
+
+_current = contextvars.ContextVar("rag_current_span", default=None)
+_ids = itertools.count(1)
+_producing = threading.local()  # Stack of generator spans currently inside next()
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.span_id = next(_ids)
+        self.trace_id = trace_id or self.span_id
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self.discard = False
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+def token_usage(response, prompt=None):
+    """(prompt_tokens, response_tokens) from a Gemini / LangChain response, estimated if absent."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        if isinstance(usage, dict):  # LangChain AIMessage
+            return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+        prompt_tokens = getattr(usage, "prompt_token_count", None)  # google.generativeai
+        if prompt_tokens is not None:
+            return prompt_tokens, getattr(usage, "candidates_token_count", 0) or 0
+    text = getattr(response, "content", None) or getattr(response, "text", None) or str(response)
+    return (estimate_tokens(prompt) if prompt else 0), estimate_tokens(text if isinstance(text, str) else str(text))
+
+
+class Tracer:
+    """Records spans, keeps per-stage metrics, and exports them as JSON lines / Prometheus text."""
+
+    def __init__(self, jsonl_path=None, keep_traces=100, enabled=True):
+        self.jsonl_path = jsonl_path
+        self.keep_traces = keep_traces
+        self.enabled = enabled
+        self.traces = []  # Most recent finished traces (lists of span dicts), newest last
+        self._open = {}  # trace id -> finished spans of that trace so far
+        self._stages = {}  # span name -> aggregated metrics
+        self._lock = threading.Lock()
+
+    # --- RECORDING ---
+    def start_span(self, name, parent=None, **attributes):
+        """Opens a span without making it the current one (for callbacks and generators)."""
+        parent = parent if parent is not None else _current.get()
+        return Span(name, parent.trace_id if parent else None, parent.span_id if parent else None, attributes)
+
+    def end_span(self, span, error=None):
+        if span.duration is None:
+            span.duration = time.perf_counter() - span._t0
+        if error is not None:
+            span.error = type(error).__name__
+        if self.enabled and not span.discard:
+            self._finish(span)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = self.start_span(name, **attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = type(exc).__name__
+            raise
+        finally:
+            _current.reset(token)
+            self.end_span(span)
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Root span of one request; opened outside any other span."""
+        token = _current.set(None)
+        try:
+            with self.span(name, **attributes) as span:
+                yield span
+        finally:
+            _current.reset(token)
+
+    def traced(self, name=None, items=None):
+        """Decorator. `items(result)` may count the items a plain function returned."""
+        def decorate(func):
+            stage = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                parent = _current.get()
+                with self.span(stage) as span:
+                    result = func(*args, **kwargs)
+                    if inspect.isgenerator(result):
+                        span.discard = True  # The generator span below replaces it
+                    elif items is not None:
+                        span.set(items=items(result))
+                if inspect.isgenerator(result):
+                    return self._trace_generator(stage, result, parent)
+                return result
+
+            return wrapper
+
+        return decorate
+
+    def _trace_generator(self, stage, generator, parent):
+        span = self.start_span(stage, parent=parent, items=0)
+        span.duration = 0.0
+        stack = _producing.__dict__.setdefault("stack", [])
+        error = None
+        try:
+            while True:
+                # Time only our own next() calls; time spent in a nested traced
+                # generator (e.g. load_pdf inside split_text) is booked to it instead
+                stack.append(span)
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed = time.perf_counter() - start
+                    stack.pop()
+                    span.duration += elapsed
+                    if stack:
+                        stack[-1].duration -= elapsed
+                span.add("items")
+                yield item
+        except GeneratorExit:
+            raise  # The consumer stopped early; not an error
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            generator.close()
+            self.end_span(span, error)
+
+    def _finish(self, span):
+        record = span.to_dict()
+        with self._lock:
+            stage = self._stages.setdefault(span.name, {
+                "count": 0, "errors": 0, "seconds": 0.0, "buckets": [0] * len(BUCKETS),
+                **{counter: 0 for counter in COUNTERS},
+            })
+            stage["count"] += 1
+            stage["errors"] += span.error is not None
+            stage["seconds"] += span.duration
+            for i, bound in enumerate(BUCKETS):
+                if span.duration <= bound:
+                    stage["buckets"][i] += 1
+            for counter in COUNTERS:
+                value = span.attributes.get(counter)
+                if isinstance(value, (int, float)):
+                    stage[counter] += value
+
+            self._open.setdefault(span.trace_id, []).append(record)
+            if span.parent_id is not None:
+                # Children whose root already closed (e.g. a lazily consumed
+                # generator) would otherwise pile up here forever
+                while len(self._open) > 10 * self.keep_traces:
+                    del self._open[next(iter(self._open))]
+                return
+            # Root span closed: the trace is complete
+            spans = sorted(self._open.pop(span.trace_id), key=lambda s: s["start"])
+            self.traces.append(spans)
+            del self.traces[:-self.keep_traces]
+        if self.jsonl_path:
+            self._write_jsonl(spans)
+
+    def _write_jsonl(self, spans):
+        with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+            for record in spans:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    @property
+    def last_trace(self):
+        return self.traces[-1] if self.traces else []
+
+    def get_trace(self, trace_id):
+        """Spans of one finished trace (safe when several users share the tracer)."""
+        with self._lock:
+            for spans in reversed(self.traces):
+                if spans and spans[0]["trace_id"] == trace_id:
+                    return spans
+        return []
+
+    # --- REPORTING ---
+    def stats(self):
+        with self._lock:
+            return {name: {k: v for k, v in stage.items() if k != "buckets"} for name, stage in self._stages.items()}
+
+    def summary(self, spans=None):
+        """One line per trace, e.g. 'question 1.23s | embed 0.12s · search 0.01s · generate 1.05s'."""
+        spans = self.last_trace if spans is None else spans
+        if not spans:
+            return ""
+        root = next((s for s in spans if s["span_id"] == s["trace_id"]), spans[0])
+        children = [s for s in spans if s["parent_id"] == root["span_id"]]
+        parts = " · ".join(f"{s['name']} {s['duration']:.2f}s" for s in children)
+        return f"{root['name']} {root['duration']:.2f}s" + (f" | {parts}" if parts else "")
+
+    def table(self, spans=None):
+        """Rows for a timing panel: one per span, indented by nesting depth."""
+        spans = self.last_trace if spans is None else spans
+        depth = {}
+        rows = []
+        for span in spans:
+            depth[span["span_id"]] = depth.get(span["parent_id"], -1) + 1
+            rows.append({
+                "stage": "  " * depth[span["span_id"]] + span["name"],
+                "ms": round(span["duration"] * 1000, 1),
+                "items": span.get("items", ""),
+                "prompt tokens": span.get("prompt_tokens", ""),
+                "response tokens": span.get("response_tokens", ""),
+            })
+        return rows
+
+    def prometheus_text(self, prefix="rag"):
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = {name: dict(stage, buckets=list(stage["buckets"])) for name, stage in self._stages.items()}
+        for name, stage in sorted(stages.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for bound, count in zip(BUCKETS, stage["buckets"]):
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{label}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{label}",le="+Inf"}} {stage["count"]}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{label}"}} {stage["seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {stage["count"]}')
+        for counter, help_text in (("errors", "Spans that raised."), ("items", "Items processed per stage."),
+                                   ("prompt_tokens", "Prompt tokens sent."),
+                                   ("response_tokens", "Response tokens received.")):
+            lines.append(f"# HELP {prefix}_stage_{counter}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_stage_{counter}_total counter")
+            for name, stage in sorted(stages.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{prefix}_stage_{counter}_total{{stage="{label}"}} {stage[counter]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+
+    def reset(self):
+        with self._lock:
+            self.traces.clear()
+            self._open.clear()
+            self._stages.clear()
+
+
+# --- LANGCHAIN ---
+def langchain_callbacks(tracer):
+    """A LangChain callback handler that records chain / LLM / retriever runs as spans."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class SpanCallbackHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._spans = {}  # run id -> open span
+            self._parent = _current.get()  # e.g. the request's trace span
+
+        def _start(self, run_id, name, parent_run_id=None, **attributes):
+            # LangChain may run callbacks in copied contexts, so spans are linked
+            # through run ids instead of the current-span context variable
+            parent = self._spans.get(parent_run_id) or self._parent
+            self._spans[run_id] = tracer.start_span(name, parent=parent, **attributes)
+
+        def _end(self, run_id, error=None, **attributes):
+            span = self._spans.pop(run_id, None)
+            if span is not None:
+                span.set(**attributes)
+                tracer.end_span(span, error)
+
+        def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+            name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+            self._start(run_id, f"chain:{name}", parent_run_id)
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            self._end(run_id)
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+            text = " ".join(str(m.content) for batch in messages for m in batch)
+            self._start(run_id, "llm", parent_run_id, prompt_tokens=estimate_tokens(text))
+
+        def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+            self._start(run_id, "llm", parent_run_id, prompt_tokens=sum(estimate_tokens(p) for p in prompts))
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            attributes = {}
+            generations = [g for batch in response.generations for g in batch]
+            if generations:
+                message = getattr(generations[0], "message", None)
+                prompt_tokens, response_tokens = token_usage(message if message is not None else generations[0].text)
+                attributes["response_tokens"] = response_tokens
+                if prompt_tokens:
+                    attributes["prompt_tokens"] = prompt_tokens
+            self._end(run_id, **attributes)
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+        def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+            self._start(run_id, "retrieve", parent_run_id)
+
+        def on_retriever_end(self, documents, *, run_id, **kwargs):
+            self._end(run_id, items=len(documents))
+
+        def on_retriever_error(self, error, *, run_id, **kwargs):
+            self._end(run_id, error)
+
+    return SpanCallbackHandler()
+
+
+# Process-wide default; set RAG_TRACE_FILE=traces.jsonl to log every request
+tracer = Tracer(jsonl_path=os.getenv("RAG_TRACE_FILE"))
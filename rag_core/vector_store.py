@@ -0,0 +1,215 @@
+"""
+🧩 The Matrix-Backed Vector Store
+
+The Goal: Replace Day 4's list-of-dicts store with something that scales.
+
+The Algorithm:
+1. Normalize every vector ONCE when it is added, so Cosine Similarity
+   becomes a plain dot product.
+2. Keep all vectors in one contiguous float32 matrix (rows = documents).
+3. Score a query against every row with a single matrix-vector product.
+4. Pick the top-k with a partial selection (np.argpartition) instead of
+   sorting every score.
+5. Filter (optional): `search(..., where=...)` resolves a metadata filter
+   to candidate rows first (metadata_index.py) and scores only those.
+6. Many Queries: `search_many` scores a block of queries against a tile of
+   rows with ONE matrix-matrix product, keeps a running row-wise top-k,
+   and moves on, so memory stays at one (queries x rows) tile.
+"""
+
+import numpy as np
+
+from rag_core.metadata_index import MetadataIndex
+
+# Above this share of matching rows, one full matrix product + a gather is
+# cheaper than copying the matching rows out first
+DENSE_FILTER_RATIO = 0.3
+
+# search_many tiling: rows per tile, and floats per (queries x rows) score tile (16 MB)
+ROW_TILE = 16_384
+MAX_TILE_FLOATS = 4_194_304
+
+
+# --- HELPERS: VECTOR MATH ---
+def normalize_rows(matrix):
+    # Unit-length rows; zero vectors stay zero instead of becoming NaN
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores, k):
+    # Returns the indices of the k highest scores, best first.
+    # argpartition is O(N); only the k winners get sorted.
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(scores, n - k)[n - k:]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def top_k_rows(scores, k):
+    # Row-wise top_k for a (queries, n) score matrix: one argpartition for every row at once.
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(scores, n - k, axis=1)[:, n - k:]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=1), axis=1)[:, ::-1]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+# --- THE STORE ---
+class VectorStore:
+    """In-memory vector store with exact cosine search."""
+
+    def __init__(self, dim=None, capacity=1024):
+        self.dim = dim
+        self.texts = []
+        self.ids = []
+        self.metadatas = []
+        self.index = MetadataIndex()
+        self._size = 0
+        self._matrix = None
+        if dim is not None:
+            self._matrix = np.empty((capacity, dim), dtype=np.float32)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        # A view over the filled rows (no copy)
+        if self._matrix is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._matrix[:self._size]
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if self._matrix is None:
+            self._matrix = np.empty((max(needed, 1024), self.dim), dtype=np.float32)
+        elif needed > self._matrix.shape[0]:
+            # Double the capacity so repeated adds stay amortized O(1)
+            grown = np.empty((max(needed, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+
+    def add(self, vectors, texts, ids=None, metadatas=None):
+        vectors = normalize_rows(vectors)
+        texts = list(texts)
+        if len(texts) != vectors.shape[0]:
+            raise ValueError(f"Got {vectors.shape[0]} vectors but {len(texts)} texts.")
+        if ids is None:
+            ids = [str(i) for i in range(self._size, self._size + len(texts))]
+        else:
+            ids = [str(i) for i in ids]
+            if len(ids) != len(texts):
+                raise ValueError(f"Got {len(ids)} ids but {len(texts)} texts.")
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(texts)
+        if len(metadatas) != len(texts):
+            raise ValueError(f"Got {len(metadatas)} metadatas but {len(texts)} texts.")
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {vectors.shape[1]}.")
+
+        self._reserve(len(texts))
+        self._matrix[self._size:self._size + len(texts)] = vectors
+        self._size += len(texts)
+        self.texts.extend(texts)
+        self.ids.extend(ids)
+        self.metadatas.extend(metadatas)
+        self.index.add(metadatas)
+        return ids
+
+    def scores(self, query):
+        # Cosine Similarity of the query against every stored vector
+        query = normalize_rows(query)[0]
+        return self.vectors @ query
+
+    def search(self, query, k=3, where=None):
+        if self._size == 0:
+            return []
+        if where is None:
+            scores = self.scores(query)
+            best = top_k(scores, k)
+            rows, scores = best, scores[best]
+        else:
+            # Only the rows that pass the filter are scored
+            candidates = self.index.resolve(where)
+            if candidates.size == 0:
+                return []
+            if candidates.size > DENSE_FILTER_RATIO * self._size:
+                subset = self.scores(query)[candidates]
+            else:
+                subset = self.vectors[candidates] @ normalize_rows(query)[0]
+            best = top_k(subset, k)
+            rows, scores = candidates[best], subset[best]
+        return self._results(rows, scores)
+
+    def _results(self, rows, scores):
+        return [
+            {"id": self.ids[i], "text": self.texts[i], "score": float(score), "metadata": self.metadatas[i] or {}}
+            for i, score in zip(rows, scores)
+        ]
+
+    def top_k_many(self, queries, k=3, where=None):
+        """
+        Row numbers and scores of the top-k for every query: two (len(queries), k)
+        arrays, best first. No per-query Python work.
+        """
+        queries = normalize_rows(queries)
+        matrix, candidates = self.vectors, None
+        if where is not None:
+            # Same filter for every query: gather the candidate rows once
+            candidates = self.index.resolve(where)
+            matrix = matrix[candidates]
+        n = matrix.shape[0]
+        k = min(k, n)
+        best_rows = np.empty((queries.shape[0], k), dtype=np.int64)
+        best_scores = np.empty((queries.shape[0], k), dtype=np.float32)
+        if k == 0:
+            return best_rows, best_scores
+
+        tile = min(n, ROW_TILE)
+        query_block = max(1, MAX_TILE_FLOATS // tile)
+        for q_start in range(0, queries.shape[0], query_block):
+            block = queries[q_start:q_start + query_block]
+            rows, scores = None, None
+            for r_start in range(0, n, tile):
+                tile_scores = block @ matrix[r_start:r_start + tile].T
+                local = top_k_rows(tile_scores, k)
+                local_scores = np.take_along_axis(tile_scores, local, axis=1)
+                if rows is None:
+                    rows, scores = local + r_start, local_scores
+                    continue
+                # Merge the running top-k with this tile's top-k
+                rows = np.concatenate([rows, local + r_start], axis=1)
+                scores = np.concatenate([scores, local_scores], axis=1)
+                keep = top_k_rows(scores, k)
+                rows = np.take_along_axis(rows, keep, axis=1)
+                scores = np.take_along_axis(scores, keep, axis=1)
+            best_rows[q_start:q_start + len(block)] = rows
+            best_scores[q_start:q_start + len(block)] = scores
+
+        if candidates is not None:
+            best_rows = candidates[best_rows]
+        return best_rows, best_scores
+
+    def search_many(self, queries, k=3, where=None):
+        """`search` for a (num_queries, dim) matrix of queries: one result list per query."""
+        if self._size == 0:
+            return [[] for _ in range(len(queries))]
+        rows, scores = self.top_k_many(queries, k, where=where)
+        return [self._results(r, s) for r, s in zip(rows, scores)]